@@ -0,0 +1,151 @@
+"""
+Benchmark of the genetic operators: pygad's crossover and mutation against
+the vectorized operators of `walkingsim.algorithms.operators`.
+
+Both evolve the same population for a few generations with the settings of
+`walkingsim train` (tournament selection, elitism, gene space with a step
+of 0.1), the fitness being a cheap function of the genes so that only the
+overhead of the generations is measured.
+
+Both start from the same seed, so the first generation also checks that the
+vectorized operators follow pygad's: the benchmark fails when their first
+crossovers differ, or when their first mutations do not change the same
+number of genes in each offspring.
+
+Usage (from the root of the repository):
+    python -m benchmarks.operators [--genes 4000] [--population 100]
+        [--crossover uniform] [--mutation adaptive]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from walkingsim.algorithms.ga import _PopulationGA
+
+
+def _timed(function, timings: dict, name: str):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        timings[name] += time.perf_counter() - start
+        return result
+
+    return wrapper
+
+
+def _first_call(function, calls: dict, name: str):
+    def wrapper(offspring, *args, **kwargs):
+        before = np.array(offspring, copy=True)
+        result = function(offspring, *args, **kwargs)
+        calls.setdefault(name, (before, np.array(result, copy=True)))
+        return result
+
+    return wrapper
+
+
+def run(args, vectorized: bool):
+    np.random.seed(0)
+    initial_population = np.random.uniform(
+        -1, 1, (args.population, args.genes)
+    )
+    mutation_percent_genes = (
+        (60, 10) if args.mutation == "adaptive" else args.mutation_percent
+    )
+    ga = _PopulationGA(
+        population_fitness=lambda population, *_, **__: -np.sum(
+            np.asarray(population) ** 2, axis=1
+        ),
+        vectorized_operators=vectorized,
+        initial_population=initial_population,
+        num_generations=args.generations,
+        num_parents_mating=4,
+        mutation_percent_genes=mutation_percent_genes,
+        parent_selection_type="tournament",
+        crossover_type=args.crossover,
+        mutation_type=args.mutation,
+        keep_elitism=5,
+        gene_space={"low": -1, "high": 1, "step": 0.1},
+        fitness_func=lambda solution, idx: 0,
+    )
+
+    timings = {"crossover": 0, "mutation": 0}
+    ga.crossover = _timed(ga.crossover, timings, "crossover")
+    ga.mutation = _timed(ga.mutation, timings, "mutation")
+    # The first crossover and mutation are recorded outside of the timings
+    first = {}
+    ga.crossover = _first_call(ga.crossover, first, "crossover")
+    ga.mutation = _first_call(ga.mutation, first, "mutation")
+
+    start = time.perf_counter()
+    ga.run()
+    elapsed = time.perf_counter() - start
+
+    generations = args.generations
+    return (
+        timings["crossover"] / generations,
+        timings["mutation"] / generations,
+        elapsed / generations,
+        np.max(ga.last_generation_fitness),
+        first,
+    )
+
+
+def _mutated_genes(mutation):
+    before, after = mutation
+    return np.sum(before != after, axis=1)
+
+
+def _check(pygad_first: dict, vectorized_first: dict):
+    _, pygad_offspring = pygad_first["crossover"]
+    _, offspring = vectorized_first["crossover"]
+    if not np.array_equal(offspring, pygad_offspring):
+        raise SystemExit(
+            "The vectorized crossover differs from pygad's with the same seed"
+        )
+
+    # Both mutate the same offspring, the mutated genes themselves are drawn
+    # differently
+    expected = _mutated_genes(pygad_first["mutation"])
+    mutated = _mutated_genes(vectorized_first["mutation"])
+    if not np.array_equal(mutated, expected):
+        raise SystemExit(
+            f"The vectorized mutation changed {mutated.sum()} genes, "
+            f"pygad's {expected.sum()}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="benchmarks.operators")
+    parser.add_argument("--genes", type=int, default=4000)
+    parser.add_argument("--population", type=int, default=100)
+    parser.add_argument("--generations", type=int, default=5)
+    parser.add_argument(
+        "--crossover",
+        default="uniform",
+        choices=["uniform", "single_point", "two_points"],
+    )
+    parser.add_argument(
+        "--mutation", default="adaptive", choices=["adaptive", "random"]
+    )
+    parser.add_argument("--mutation-percent", type=float, default=10)
+    args = parser.parse_args()
+
+    print(
+        f"{args.genes} genes, population of {args.population}, "
+        f"{args.crossover} crossover, {args.mutation} mutation"
+    )
+    print("operators  | crossover (ms) | mutation (ms) | generation (ms)")
+    first = {}
+    for name, vectorized in (("pygad", False), ("vectorized", True)):
+        crossover, mutation, generation, _, first[name] = run(args, vectorized)
+        print(
+            f"{name:10s} | {crossover * 1e3:14.1f} | {mutation * 1e3:13.1f} "
+            f"| {generation * 1e3:15.1f}"
+        )
+    _check(first["pygad"], first["vectorized"])
+    print("first crossover and mutation: same as pygad's")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark of `ChronoEnvironment.reset`: compares the cost of rebuilding the
+whole world with the cost of restoring its initial snapshot, and checks that
+a restored world follows the same trajectory as a freshly built one: the
+benchmark fails when their positions differ by more than `--tolerance`
+meters.
+
+Usage (from the root of the repository):
+    python -m benchmarks.reset [--creature quadrupede] [--resets 200]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from walkingsim.envs.chrono import ChronoEnvironment
+from walkingsim.loader import EnvironmentProps
+
+
+def _time_resets(env, props, resets: int, rebuild: bool):
+    start = time.perf_counter()
+    for _ in range(resets):
+        env.reset(props, rebuild=rebuild)
+    return (time.perf_counter() - start) / resets
+
+
+def _trajectory(env, props, actions, timestep: float, rebuild: bool):
+    env.reset(props, rebuild=rebuild)
+    for action in actions:
+        env.step(action, timestep)
+    return env.observations.position.copy()
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="benchmarks.reset")
+    parser.add_argument("--creature", default="quadrupede")
+    parser.add_argument("--environment", default="default")
+    parser.add_argument("--resets", type=int, default=200)
+    parser.add_argument("--steps", type=int, default=500)
+    parser.add_argument("--timestep", type=float, default=1e-2)
+    parser.add_argument("--tolerance", type=float, default=1e-6)
+    args = parser.parse_args()
+
+    props = EnvironmentProps("./environments").load(args.environment)
+    env = ChronoEnvironment(creature=args.creature)
+    env.reset(props)
+
+    rebuild_time = _time_resets(env, props, args.resets, rebuild=True)
+    restore_time = _time_resets(env, props, args.resets, rebuild=False)
+    print(f"rebuild: {rebuild_time * 1e3:.3f} ms/reset")
+    print(f"restore: {restore_time * 1e3:.3f} ms/reset")
+    print(f"speedup: {rebuild_time / restore_time:.1f}x")
+
+    rng = np.random.default_rng(0)
+    shape = (args.steps, env.creature_shape)
+    actions = rng.uniform(-1000, 1000, shape)
+
+    fresh = _trajectory(env, props, actions, args.timestep, rebuild=True)
+    # Move the creature around before restoring the world
+    _trajectory(
+        env, props, rng.uniform(-1000, 1000, shape), args.timestep, False
+    )
+    restored = _trajectory(env, props, actions, args.timestep, rebuild=False)
+
+    error = np.abs(fresh - restored).max()
+    print(f"max trajectory difference (fresh vs restored): {error:.3e}")
+    if not error <= args.tolerance:
+        raise SystemExit(
+            f"The restored trajectory differs from the fresh one by {error:.3e} m, "
+            f"more than the tolerance of {args.tolerance:.0e} m"
+        )
+
+
+if __name__ == "__main__":
+    main()
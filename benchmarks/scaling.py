@@ -0,0 +1,118 @@
+"""
+Scaling benchmark of the per-step cost with the number of motors.
+
+Creatures with more and more pairs of legs are built, and for each of them
+the time of a whole `ChronoEnvironment.step` is measured, along with the
+time needed to retrieve the motors and links of the creature, from its
+compiled flat lists and by walking its tree of bodies.
+
+Usage (from the root of the repository):
+    python -m benchmarks.scaling [--max-pairs 8] [--steps 1000]
+"""
+import argparse
+import math
+import time
+import typing as t
+
+import numpy as np
+
+from walkingsim.creature.creature import Creature, _CreatureBody
+from walkingsim.envs.chrono import ChronoEnvironment
+from walkingsim.loader import EnvironmentProps
+
+
+class _Multipede(Creature):
+    """Quadrupede-like creature with `_PAIRS` pairs of legs"""
+
+    _CREATURE_HEIGHT = 1.65
+    _PAIRS = 2
+
+    def __init__(
+        self, body_cls: t.Type[_CreatureBody], root_pos: tuple = None
+    ) -> None:
+        super().__init__(body_cls, (0.5 * self._PAIRS, 0.5, 0.5), root_pos)
+
+    def create(self):
+        yoffset = (-self.root.size[1] / 2) + 0.01
+        spacing = self.root.size[0] / self._PAIRS
+        for pair in range(self._PAIRS):
+            x = -self.root.size[0] / 2 + spacing * (pair + 0.5)
+            for zfactor in [1, -1]:
+                z = self.root.size[2] * zfactor / 2
+                (
+                    self.root.branch(
+                        size=(0.3, 0.7, 0.15), relpos=(x, yoffset, z)
+                    )
+                    .join(
+                        relpos=(0, 0.7 / 2, 0),
+                        constraints_z=[-math.pi / 3, math.pi / 3],
+                        motor="torque",
+                    )
+                    .branch(size=(0.3, 0.7, 0.15), relpos=(0, -0.7, 0))
+                    .join(
+                        relpos=(0, 0.7 / 2, 0),
+                        constraints_z=[-0.1, math.pi / 2],
+                        motor="torque",
+                    )
+                    .branch(size=(0.4, 0.1, 0.4), relpos=(0, -0.4, 0))
+                    .join(relpos=(0, 0.1 / 2, 0))
+                )
+
+
+def _multipede(pairs: int):
+    return type(
+        f"Multipede{pairs}",
+        (_Multipede,),
+        {"_PAIRS": pairs, "_CREATURE_MOTORS": 4 * pairs},
+    )
+
+
+def _timeit(func, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="benchmarks.scaling")
+    parser.add_argument("--environment", default="default")
+    parser.add_argument("--max-pairs", type=int, default=8)
+    parser.add_argument("--steps", type=int, default=1000)
+    parser.add_argument("--timestep", type=float, default=1e-3)
+    args = parser.parse_args()
+
+    props = EnvironmentProps("./environments").load(args.environment)
+    rng = np.random.default_rng(0)
+
+    print("motors | step (us) | compiled lookup (us) | tree walk (us)")
+    for pairs in range(1, args.max_pairs + 1):
+        creature_cls = _multipede(pairs)
+        env = ChronoEnvironment(creature=creature_cls)
+        env.reset(props)
+
+        actions = rng.uniform(-1000, 1000, (args.steps, env.creature_shape))
+        start = time.perf_counter()
+        for action in actions:
+            env.step(action, args.timestep)
+        step_time = (time.perf_counter() - start) / args.steps
+
+        creature = env._ChronoEnvironment__creature
+        compiled = _timeit(
+            lambda: (creature.motors(), creature.links()), args.steps
+        )
+        walked = _timeit(
+            lambda: (
+                creature.motors(creature.root),
+                creature.links(creature.root),
+            ),
+            args.steps,
+        )
+        print(
+            f"{env.creature_shape:6d} | {step_time * 1e6:9.1f} | "
+            f"{compiled * 1e6:20.2f} | {walked * 1e6:14.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
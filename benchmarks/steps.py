@@ -0,0 +1,90 @@
+"""
+Microbenchmark of the physics inner loop: number of `ChronoEnvironment.step`
+per second, with the torques applied through constant functions updated in
+place, compared with the previous path creating a python setpoint callback
+per motor on each step.
+
+Both paths apply the same actions, and the benchmark fails when their
+trajectories differ by more than `--tolerance` meters.
+
+Usage (from the root of the repository):
+    python -m benchmarks.steps [--creature quadrupede] [--steps 5000]
+"""
+import argparse
+import time
+
+import numpy as np
+import pychrono as chrono
+
+from walkingsim.envs.chrono import ChronoEnvironment
+from walkingsim.loader import EnvironmentProps
+
+
+class _SetpointCallbackFunction(chrono.ChFunction_SetpointCallback):
+    def __init__(self, value: float):
+        super().__init__()
+        self.__value = value
+
+    def SetpointCallback(self, t: float):
+        return self.__value
+
+
+class _CallbackEnvironment(ChronoEnvironment):
+    """Applies the torques the way it was done before, for comparison"""
+
+    def _apply_forces(self, action: list):
+        motors = self._ChronoEnvironment__creature.motors()
+        self.__functions = []
+        for i, joint in enumerate(motors):
+            self.__functions.append(_SetpointCallbackFunction(action[i]))
+            if isinstance(joint, chrono.ChLinkMotorRotationTorque):
+                joint.SetTorqueFunction(self.__functions[i])
+            elif isinstance(joint, chrono.ChLinkMotorRotationAngle):
+                joint.SetAngleFunction(self.__functions[i])
+
+
+def _steps_per_second(env, props, actions, timestep: float):
+    env.reset(props)
+    start = time.perf_counter()
+    for action in actions:
+        env.step(action, timestep)
+    return len(actions) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="benchmarks.steps")
+    parser.add_argument("--creature", default="quadrupede")
+    parser.add_argument("--environment", default="default")
+    parser.add_argument("--steps", type=int, default=5000)
+    parser.add_argument("--timestep", type=float, default=1e-3)
+    parser.add_argument("--tolerance", type=float, default=1e-6)
+    args = parser.parse_args()
+
+    props = EnvironmentProps("./environments").load(args.environment)
+    rng = np.random.default_rng(0)
+
+    positions = []
+    actions = None
+    for name, env_cls in [
+        ("callback", _CallbackEnvironment),
+        ("constant", ChronoEnvironment),
+    ]:
+        env = env_cls(creature=args.creature)
+        if actions is None:
+            shape = (args.steps, env.creature_shape)
+            actions = rng.uniform(-1000, 1000, shape)
+        sps = _steps_per_second(env, props, actions, args.timestep)
+        positions.append(env.observations.position.copy())
+        print(f"{name}: {sps:.0f} steps/s")
+
+    error = np.abs(positions[0] - positions[1]).max()
+    print(f"max trajectory difference (callback vs constant): {error:.3e}")
+    if not error <= args.tolerance:
+        raise SystemExit(
+            f"The trajectories of both paths differ by {error:.3e} m, "
+            f"more than the tolerance of {args.tolerance:.0e} m"
+        )
+
+
+if __name__ == "__main__":
+    main()
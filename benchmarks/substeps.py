@@ -0,0 +1,97 @@
+"""
+Benchmark of the control period: each action is held for K physics
+substeps, which shrinks the genomes and the number of python calls per
+simulated second.
+
+For each K, random open-loop genomes covering the whole duration are
+simulated and the wall-clock time per rollout is reported along with the
+fitness they reach. Holding a row for K substeps must give the same
+trajectory as repeating it K times without substeps: the benchmark fails
+when their positions differ by more than `--tolerance` meters.
+
+Usage (from the root of the repository):
+    python -m benchmarks.substeps [--substeps 1 2 5 10] [--rollouts 20]
+"""
+import argparse
+import math
+import time
+
+import numpy as np
+
+from walkingsim.loader import EnvironmentProps
+from walkingsim.simulation.ga import GA_Simulation
+
+
+def _substeps_error(simulation, reference, genome, substeps: int):
+    """
+    Largest difference between the positions reached by holding each row of
+    `genome` for `substeps` steps (`simulation`), and by repeating each row
+    `substeps` times (`reference`), at the end of each control period
+    """
+    _, props = simulation.evaluate(genome)
+    _, reference_props = reference.evaluate(
+        np.repeat(genome, substeps, axis=0)
+    )
+    held = props["trajectory"]["position"]
+    repeated = reference_props["trajectory"]["position"][::substeps]
+    # A fall can end one of them before the other
+    rows = min(len(held), len(repeated))
+    return np.abs(held[:rows] - repeated[:rows]).max()
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="benchmarks.substeps")
+    parser.add_argument("--creature", default="quadrupede")
+    parser.add_argument("--environment", default="default")
+    parser.add_argument("--target", default="walking-v0")
+    parser.add_argument("--substeps", type=int, nargs="+", default=[1, 2, 5])
+    parser.add_argument("--rollouts", type=int, default=20)
+    parser.add_argument("--timestep", type=float, default=1e-2)
+    parser.add_argument("--duration", type=float, default=5)
+    parser.add_argument("--tolerance", type=float, default=1e-6)
+    args = parser.parse_args()
+
+    props = EnvironmentProps("./environments").load(args.environment)
+    rng = np.random.default_rng(0)
+    sim_kwargs = {
+        "env_props": props,
+        "creature": args.creature,
+        "fitness": args.target,
+        "timestep": args.timestep,
+        "duration": args.duration,
+    }
+    reference = GA_Simulation(**sim_kwargs, record_trajectory=True)
+
+    print("substeps | genes | rollout (ms) | mean fitness | best fitness")
+    for substeps in args.substeps:
+        simulation = GA_Simulation(**sim_kwargs, substeps=substeps)
+        rows = math.ceil(args.duration / (args.timestep * substeps))
+        shape = (rows, simulation.creature_shape)
+
+        fitnesses = []
+        start = time.perf_counter()
+        for _ in range(args.rollouts):
+            fitness, _ = simulation.evaluate(rng.uniform(-1, 1, shape))
+            fitnesses.append(fitness)
+        elapsed = (time.perf_counter() - start) / args.rollouts
+
+        print(
+            f"{substeps:8d} | {rows * shape[1]:5d} | {elapsed * 1e3:12.1f} | "
+            f"{np.mean(fitnesses):12.2f} | {np.max(fitnesses):12.2f}"
+        )
+
+        recording = GA_Simulation(
+            **sim_kwargs, substeps=substeps, record_trajectory=True
+        )
+        genome = rng.uniform(-1, 1, shape)
+        error = _substeps_error(recording, reference, genome, substeps)
+        if not error <= args.tolerance:
+            raise SystemExit(
+                f"With {substeps} substeps, the trajectory differs from the "
+                f"one of the repeated rows by {error:.3e} m, more than the "
+                f"tolerance of {args.tolerance:.0e} m"
+            )
+
+
+if __name__ == "__main__":
+    main()
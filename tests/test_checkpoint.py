@@ -0,0 +1,100 @@
+import os
+import random
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pychrono")
+
+from walkingsim.algorithms.ga import GeneticAlgorithm  # noqa: E402
+from walkingsim.loader import EnvironmentProps  # noqa: E402
+from walkingsim.utils.pygad_config import PygadConfig  # noqa: E402
+
+_ENVIRONMENTS = os.path.join(os.path.dirname(__file__), "..", "environments")
+
+
+class _Interrupted(Exception):
+    pass
+
+
+@pytest.fixture(autouse=True)
+def solutions(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "solutions" / GeneticAlgorithm._dm_group).mkdir(parents=True)
+
+
+def _seed():
+    np.random.seed(0)
+    random.seed(0)
+
+
+def _model(date, num_generations=4):
+    config = PygadConfig(
+        num_generations=num_generations,
+        num_parents_mating=4,
+        mutation_percent_genes=(60, 10),
+        parallel_processing=None,
+        parent_selection_type="tournament",
+        keep_elitism=2,
+        crossover_type="uniform",
+        mutation_type="adaptive",
+        initial_population=None,
+        population_size=8,
+        num_joints=8,
+        save_solutions=False,
+        gene_space={"low": -1, "high": 1, "step": 0.1},
+        init_range_low=-1,
+        init_range_high=1,
+        random_mutation_min_val=-1,
+        random_mutation_max_val=1,
+        timesteps=10,
+    )
+    return GeneticAlgorithm(
+        config=config,
+        env_props=EnvironmentProps(_ENVIRONMENTS).load("default"),
+        duration=0.2,
+        date=date,
+        progress=False,
+    )
+
+
+def test_resume_continues_the_same_evolution(monkeypatch):
+    _seed()
+    uninterrupted = _model("uninterrupted")
+    uninterrupted.train()
+
+    # The training is interrupted right after the checkpoint of the second
+    # generation
+    _seed()
+    interrupted = _model("interrupted")
+    save_checkpoint = interrupted.save_checkpoint
+
+    def interrupt():
+        save_checkpoint()
+        if interrupted.ga.generations_completed == 2:
+            raise _Interrupted
+
+    monkeypatch.setattr(interrupted, "save_checkpoint", interrupt)
+    with pytest.raises(_Interrupted):
+        interrupted.train()
+
+    # Other random numbers are drawn in between
+    np.random.seed(1)
+    random.seed(1)
+    resumed = GeneticAlgorithm.resume("interrupted")
+    assert resumed.ga.generations_completed == 2
+    assert resumed.ga.num_generations == 2
+    resumed.train()
+
+    assert resumed.ga.generations_completed == 4
+    np.testing.assert_array_equal(
+        resumed.ga.population, uninterrupted.ga.population
+    )
+    np.testing.assert_array_equal(
+        resumed.ga.last_generation_fitness,
+        uninterrupted.ga.last_generation_fitness,
+    )
+    np.testing.assert_array_equal(
+        resumed.sim_data["best_solution"],
+        uninterrupted.sim_data["best_solution"],
+    )
@@ -0,0 +1,84 @@
+import os
+
+import numpy as np
+import pytest
+
+chrono = pytest.importorskip("pychrono")
+
+from walkingsim.envs.chrono import ChronoEnvironment  # noqa: E402
+from walkingsim.loader import EnvironmentProps  # noqa: E402
+
+_ENVIRONMENTS = os.path.join(os.path.dirname(__file__), "..", "environments")
+_TIMESTEP = 1e-2
+# Largest difference between the positions of two runs of the same actions,
+# in meters
+_TOLERANCE = 1e-6
+
+
+@pytest.fixture
+def props():
+    return EnvironmentProps(_ENVIRONMENTS).load("default")
+
+
+def _actions(env, steps=100, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(-1000, 1000, (steps, env.creature_shape))
+
+
+def _positions(env, props, actions, rebuild=False):
+    env.reset(props, rebuild=rebuild)
+    for action in actions:
+        env.step(action, _TIMESTEP)
+    return env.observations.position.copy()
+
+
+def _motor_function(motor):
+    if isinstance(motor, chrono.ChLinkMotorRotationTorque):
+        return motor.GetTorqueFunction()
+    return motor.GetAngleFunction()
+
+
+def test_restored_world_follows_a_rebuilt_one(props):
+    env = ChronoEnvironment()
+    actions = _actions(env)
+    rebuilt = _positions(env, props, actions, rebuild=True)
+    # The creature is moved around before the world is restored
+    _positions(env, props, _actions(env, seed=1))
+    restored = _positions(env, props, actions)
+
+    assert env.time == pytest.approx(len(actions) * _TIMESTEP)
+    np.testing.assert_allclose(restored, rebuilt, rtol=0, atol=_TOLERANCE)
+
+
+def test_motors_follow_the_actions(props):
+    env = ChronoEnvironment()
+    env.reset(props)
+    motors = env._ChronoEnvironment__creature.motors()
+    for action in _actions(env, steps=3):
+        env.step(action, _TIMESTEP)
+        values = [_motor_function(m).Get_y(env.time) for m in motors]
+        np.testing.assert_array_equal(values, action[: len(motors)])
+
+    # The restored world starts with motors at rest
+    env.reset(props)
+    assert all(_motor_function(m).Get_y(0) == 0 for m in motors)
+
+
+@pytest.mark.parametrize("substeps", [2, 5])
+def test_substeps_hold_each_row(props, substeps):
+    env = ChronoEnvironment()
+    actions = _actions(env, steps=10)
+    duration = 0.5
+    env.reset(props)
+    held = env.rollout(actions, _TIMESTEP, duration, substeps=substeps)
+    held = held.position.copy()
+    env.reset(props)
+    repeated = np.repeat(actions, substeps, axis=0)
+    repeated = env.rollout(repeated, _TIMESTEP, duration).position.copy()
+
+    # Same positions at the end of each control period
+    assert len(held) > 1
+    rows = min(len(held), len(repeated[::substeps]))
+    np.testing.assert_allclose(
+        held[:rows], repeated[::substeps][:rows], rtol=0, atol=_TOLERANCE
+    )
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from walkingsim.controllers import SplineController, controllers
+
+_MOTORS = 8
+_TIMESTEPS = 50
+_CONTROL_TIMESTEP = 0.05
+_DURATION = 2.0
+
+
+def _controller(name):
+    return controllers[name](_MOTORS, _TIMESTEPS, _CONTROL_TIMESTEP, _DURATION)
+
+
+@pytest.mark.parametrize(
+    "name, steps",
+    [
+        ("open-loop", _TIMESTEPS),
+        ("cpg", 41),
+        ("fourier", 41),
+        ("spline", _TIMESTEPS),
+    ],
+)
+def test_decode_shapes(name, steps):
+    controller = _controller(name)
+    population = np.random.default_rng(0).uniform(
+        -1, 1, (5, controller.num_genes)
+    )
+    actions = controller.decode_population(population)
+    assert actions.shape == (5, steps, _MOTORS)
+    assert np.all(np.abs(actions) <= 1)
+
+    # A single genome is decoded like in a population
+    np.testing.assert_array_equal(controller.decode(population[2]), actions[2])
+
+
+def test_open_loop_rows_are_control_steps():
+    controller = _controller("open-loop")
+    genome = np.arange(controller.num_genes) / controller.num_genes
+    actions = controller.decode(genome)
+    np.testing.assert_array_equal(actions[1], genome[_MOTORS : 2 * _MOTORS])
+
+
+def test_cpg_oscillates_around_its_offset():
+    controller = _controller("cpg")
+    # No amplitude: each motor stays at its offset
+    genome = np.zeros((4, _MOTORS))
+    genome[0] = -1
+    genome[3] = np.linspace(-0.5, 0.5, _MOTORS)
+    actions = controller.decode(genome.ravel())
+    np.testing.assert_allclose(actions, np.tile(genome[3], (41, 1)))
+
+
+def test_spline_goes_through_its_keyframes():
+    keyframes = SplineController._KEYFRAMES
+    controller = SplineController(_MOTORS, 6 * keyframes, 0.05, _DURATION)
+    genome = np.random.default_rng(1).uniform(-1, 1, (keyframes, _MOTORS))
+    actions = controller.decode(genome.ravel())
+    np.testing.assert_allclose(actions[::6], genome)
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from walkingsim.loader import default_friction, default_gravity
+from walkingsim.simulation.environments import (
+    aggregate,
+    combine_results,
+    perturb_environments,
+)
+
+_FITNESSES = [4.0, -2.0, 1.0, 3.0, 0.0, 6.0, -1.0, 5.0]
+
+
+@pytest.mark.parametrize(
+    "aggregation, cvar_alpha, expected",
+    [
+        ("mean", 0.25, 2.0),
+        ("min", 0.25, -2.0),
+        ("cvar", 0.25, -1.5),
+        ("cvar", 0.3, -1.0),
+        ("cvar", 0.01, -2.0),
+        ("cvar", 1, 2.0),
+    ],
+)
+def test_aggregate(aggregation, cvar_alpha, expected):
+    assert aggregate(_FITNESSES, aggregation, cvar_alpha) == expected
+
+
+def test_combine_results():
+    results = [
+        (1.0, {"distance": 2.0, "time_cut": 0.5, "early_stop": "fall"}),
+        (3.0, {"distance": 4.0, "time_cut": 0.25, "early_stop": None}),
+    ]
+    fitness, props = combine_results(results, ["flat", "ice"], "min")
+    assert fitness == 1.0
+    assert props == {
+        "distance": 3.0,
+        "time_cut": 0.75,
+        "early_stop": "fall",
+        "fitness.flat": 1.0,
+        "fitness.ice": 3.0,
+    }
+
+    fitness, _ = combine_results(results, ["flat", "ice"])
+    assert fitness == 2.0
+
+
+def test_perturb_environments():
+    environments = [("default", {}), ("ice", {"friction": 0.1})]
+    assert perturb_environments(environments) == environments
+
+    variants = perturb_environments(
+        environments, samples=3, friction=0.5, gravity=0.1, seed=1
+    )
+    assert [name for name, _ in variants] == [
+        "default-0",
+        "default-1",
+        "default-2",
+        "ice-0",
+        "ice-1",
+        "ice-2",
+    ]
+    for name, props in variants:
+        base = 0.1 if name.startswith("ice") else default_friction
+        assert 0.5 * base <= props["friction"] <= 1.5 * base
+        scale = np.divide(props["gravity"][1], default_gravity[1])
+        assert 0.9 <= scale <= 1.1
+        assert props["mass_scale"] == 1
+
+    # The variants are drawn once from the seed
+    assert variants == perturb_environments(
+        environments, samples=3, friction=0.5, gravity=0.1, seed=1
+    )
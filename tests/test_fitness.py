@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from walkingsim.fitness import fitnesses
+from walkingsim.trajectory import Trajectory
+
+_TIMESTEP = 0.01
+_DURATION = 1.0
+_MOTORS = 4
+
+
+def _rollout(fitness, rng, hit_step=None):
+    """
+    Records a random trajectory and computes `fitness` after each step, the
+    way the simulations do, until it is done
+    """
+    trajectory = Trajectory(8, _MOTORS)
+    trajectory.append(0, (0, 0.5, 0), np.zeros(_MOTORS), 0, False, False)
+    position = np.array([0, 0.5, 0], dtype=float)
+    steps = int(_DURATION / _TIMESTEP)
+    for step in range(1, steps + 1):
+        position += rng.normal(0.01, 0.02, 3)
+        trajectory.append(
+            step * _TIMESTEP,
+            tuple(position),
+            rng.uniform(-1, 1, _MOTORS),
+            0,
+            step == hit_step,
+            False,
+        )
+        actions = rng.uniform(-1, 1, _MOTORS)
+        trajectory.actions[-1] = actions
+        fitness.compute(trajectory, actions, step * _TIMESTEP)
+        if fitness.done:
+            break
+    return trajectory
+
+
+@pytest.mark.parametrize("name", ["walking-v0", "walking-v1"])
+@pytest.mark.parametrize("hit_step", [None, 1, 42])
+def test_score_matches_compute(name, hit_step):
+    fitness = fitnesses[name](_DURATION, _TIMESTEP)
+    trajectory = _rollout(fitness, np.random.default_rng(0), hit_step)
+
+    scored_fitness, props = fitnesses[name](_DURATION, _TIMESTEP).score(
+        trajectory.as_dict()
+    )
+    assert scored_fitness == fitness.fitness
+    assert props == fitness.props
+
+
+@pytest.mark.parametrize("name", ["walking-v0", "walking-v1"])
+def test_score_ignores_steps_after_the_fall(name):
+    fitness = fitnesses[name](_DURATION, _TIMESTEP)
+    trajectory = _rollout(fitness, np.random.default_rng(1), hit_step=10)
+    columns = trajectory.as_dict()
+    assert len(trajectory) == 11
+
+    # Steps recorded after the fall, e.g. by a trajectory kept until the
+    # end, do not change the score
+    extended = Trajectory(8, _MOTORS)
+    extended.restore(columns, len(trajectory))
+    extended.append(1, (5, 0.5, 0), np.zeros(_MOTORS), 0, False, False)
+    score = fitnesses[name](_DURATION, _TIMESTEP).score
+    assert score(extended.as_dict()) == score(columns)
+
+
+def test_score_of_the_initial_state_only():
+    trajectory = Trajectory(1, _MOTORS)
+    trajectory.append(0, (0, 0.5, 0), np.zeros(_MOTORS), 0, False, False)
+    fitness = fitnesses["walking-v1"](_DURATION, _TIMESTEP)
+    score, props = fitness.score(trajectory.as_dict())
+    assert score == 0
+    assert props == dict.fromkeys(fitness.props_range, 0.0)
@@ -0,0 +1,75 @@
+import numpy as np
+
+from walkingsim.utils.fitness_cache import FitnessCache
+
+_CONTEXT = {"creature": "quadrupede", "fitness": "walking-v0"}
+
+
+def test_key_is_quantized_on_the_grid():
+    cache = FitnessCache(_CONTEXT, step=0.1)
+    genome = np.array([0.1, -0.5, 0.3])
+    assert cache.key(genome) == cache.key(genome + 0.01)
+    assert cache.key(genome) == cache.key(list(genome))
+    assert cache.key(genome) != cache.key(genome + 0.1)
+
+    exact = FitnessCache(_CONTEXT)
+    assert exact.key(genome) != exact.key(genome + 1e-9)
+
+
+def test_key_depends_on_the_context():
+    genome = np.zeros(4)
+    key = FitnessCache(_CONTEXT).key(genome)
+    assert FitnessCache(dict(reversed(_CONTEXT.items()))).key(genome) == key
+    other = dict(_CONTEXT, fitness="walking-v1")
+    assert FitnessCache(other).key(genome) != key
+
+
+def test_lru_eviction():
+    cache = FitnessCache(_CONTEXT, max_size=2)
+    keys = [cache.key([i]) for i in range(3)]
+    cache.put(keys[0], 0.0, {})
+    cache.put(keys[1], 1.0, {})
+    # Reading the first entry makes the second one the least recently used
+    assert cache.get(keys[0]) == (0.0, {})
+    cache.put(keys[2], 2.0, {})
+
+    assert len(cache) == 2
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == (0.0, {})
+    assert cache.get(keys[2]) == (2.0, {})
+    assert cache.pop_stats() == {"hits": 3, "misses": 1}
+    assert cache.pop_stats() == {"hits": 0, "misses": 0}
+
+
+def test_disabled_cache():
+    cache = FitnessCache(_CONTEXT, max_size=0)
+    key = cache.key([0])
+    cache.put(key, 0.0, {})
+    assert len(cache) == 0
+    assert cache.get(key) is None
+
+
+def test_entries_restore():
+    cache = FitnessCache(_CONTEXT, max_size=3)
+    for i in range(4):
+        cache.put(cache.key([i]), float(i), {"distance": i})
+
+    restored = FitnessCache(_CONTEXT, max_size=3)
+    restored.restore(cache.entries())
+    assert restored.entries() == cache.entries()
+    assert restored.get(cache.key([3])) == (3.0, {"distance": 3})
+
+
+def test_store_is_shared_between_runs(tmp_path):
+    path = str(tmp_path / "cache" / "fitness")
+    cache = FitnessCache(_CONTEXT, max_size=1, path=path)
+    keys = [cache.key([i]) for i in range(2)]
+    cache.put(keys[0], 0.0, {})
+    cache.put(keys[1], 1.0, {})
+    # Evicted from memory, but still on disk
+    assert cache.get(keys[0]) == (0.0, {})
+    cache.close()
+
+    cache = FitnessCache(_CONTEXT, path=path)
+    assert cache.get(keys[1]) == (1.0, {})
+    cache.close()
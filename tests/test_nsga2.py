@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from walkingsim.algorithms.nsga2 import (
+    ParetoArchive,
+    crowded_fitness,
+    crowding_distance,
+    non_dominated_sort,
+)
+
+
+def _naive_sort(objectives):
+    """Peels the fronts one after the other, as described by NSGA-II"""
+    remaining = set(range(len(objectives)))
+    ranks = np.full(len(objectives), -1)
+    rank = 0
+    while remaining:
+        front = [
+            i
+            for i in remaining
+            if not any(
+                np.all(objectives[j] >= objectives[i])
+                and np.any(objectives[j] > objectives[i])
+                for j in remaining
+            )
+        ]
+        ranks[front] = rank
+        remaining -= set(front)
+        rank += 1
+    return ranks
+
+
+def test_sort_of_known_fronts():
+    objectives = np.array([[3, 1], [1, 3], [2, 2], [1, 1], [0, 2], [0, 0]])
+    assert list(non_dominated_sort(objectives)) == [0, 0, 0, 1, 1, 2]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_sort_matches_naive_sort(seed):
+    rng = np.random.default_rng(seed)
+    # Few distinct values, so that there are ties
+    objectives = rng.integers(0, 5, (40, 3)).astype(float)
+    np.testing.assert_array_equal(
+        non_dominated_sort(objectives), _naive_sort(objectives)
+    )
+
+
+def test_identical_individuals_share_their_front():
+    objectives = np.array([[1, 1], [1, 1], [0, 0]])
+    assert list(non_dominated_sort(objectives)) == [0, 0, 1]
+
+
+def test_crowding_distance():
+    objectives = np.array([[0, 4], [1, 3], [3, 1], [4, 0], [0, 0]])
+    ranks = non_dominated_sort(objectives)
+    distance = crowding_distance(objectives, ranks)
+    assert np.isinf(distance[[0, 3, 4]]).all()
+    # (3 - 0) / 4 on each objective, and (4 - 1) / 4
+    assert distance[1] == pytest.approx(1.5)
+    assert distance[2] == pytest.approx(1.5)
+
+
+def test_crowding_distance_of_flat_front():
+    objectives = np.array([[1, 0], [1, 1], [1, 2]])
+    distance = crowding_distance(objectives, np.zeros(3, dtype=int))
+    assert np.isinf(distance[[0, 2]]).all()
+    # Nothing is gained from the objective which has no span
+    assert distance[1] == pytest.approx(1)
+
+
+def test_crowded_fitness_orders_fronts_first():
+    ranks = np.array([0, 0, 1, 1])
+    crowding = np.array([0, np.inf, np.inf, 0.5])
+    fitness = crowded_fitness(ranks, crowding)
+    assert list(np.argsort(-fitness)) == [1, 0, 2, 3]
+    assert fitness.min() > -2
+
+
+def test_archive_keeps_the_front_and_extremes():
+    archive = ParetoArchive(max_size=3)
+    genomes = np.arange(10, dtype=float)[:, np.newaxis]
+    x = np.linspace(0, 1, 6)
+    objectives = np.r_[np.c_[x, 1 - x], [[0, 0]] * 4]
+    archive.update(genomes[:6], objectives[:6], np.zeros(6))
+    archive.update(genomes[6:], objectives[6:], np.zeros(4))
+    archive.update(genomes[:1], objectives[:1], np.zeros(1))
+
+    assert len(archive) == 3
+    kept = archive.genomes[:, 0]
+    assert {0, 5} <= set(kept)
+    assert not set(kept) & set(range(6, 10))
+    assert np.all(non_dominated_sort(archive.objectives) == 0)
+
+    restored = ParetoArchive()
+    restored.restore(archive.entries())
+    np.testing.assert_array_equal(restored.genomes, archive.genomes)
@@ -0,0 +1,84 @@
+import numpy as np
+import pygad
+import pytest
+
+from walkingsim.algorithms import operators
+
+_GENE_SPACE = {"low": -1, "high": 1, "step": 0.1}
+
+
+def _pygad_ga(genes, **kwargs):
+    return pygad.GA(
+        num_generations=1,
+        num_parents_mating=4,
+        fitness_func=lambda solution, idx: 0,
+        initial_population=np.zeros((10, genes)),
+        suppress_warnings=True,
+        **kwargs,
+    )
+
+
+@pytest.mark.parametrize("name", list(operators.crossovers))
+@pytest.mark.parametrize("genes", [1, 2, 7, 100])
+def test_crossover_matches_pygad(name, genes):
+    ga = _pygad_ga(genes)
+    parents = np.random.default_rng(0).uniform(-1, 1, (4, genes))
+
+    # Both draw the same random numbers from numpy's global generator, in
+    # the same order
+    np.random.seed(1)
+    expected = getattr(ga, f"{name}_crossover")(parents, (10, genes))
+    np.random.seed(1)
+    offspring = operators.crossovers[name](parents, (10, genes))
+    np.testing.assert_array_equal(offspring, expected.astype(float))
+
+
+@pytest.mark.parametrize("num_genes", [[0], [3], [10], [2, 5]])
+def test_mutation_mask_counts(num_genes):
+    np.random.seed(0)
+    num_genes = np.resize(num_genes, 20)
+    mask = operators.mutation_mask((20, 10), num_genes=num_genes)
+    np.testing.assert_array_equal(mask.sum(axis=1), num_genes)
+
+
+def test_mutation_mask_probability():
+    np.random.seed(0)
+    probability = np.r_[np.zeros(100), np.full(100, 0.3), np.ones(100)]
+    mask = operators.mutation_mask((300, 1000), probability=probability)
+    rates = mask.mean(axis=1)
+    assert np.all(rates[:100] == 0)
+    assert rates[100:200].mean() == pytest.approx(0.3, abs=0.01)
+    assert np.all(rates[200:] == 1)
+
+
+def test_mutation_by_space_matches_pygad():
+    genes = 50
+    ga = _pygad_ga(genes, gene_space=_GENE_SPACE, mutation_num_genes=5)
+    np.random.seed(0)
+    expected = ga.random_mutation(np.full((200, genes), 5.0))
+    offspring = np.full((200, genes), 5.0)
+    mask = operators.mutation_mask(offspring.shape, num_genes=[5] * 200)
+    offspring = operators.mutate(offspring, mask, gene_space=_GENE_SPACE)
+
+    # The same number of genes are mutated, to values of the same grid
+    grid = np.arange(-1, 1, 0.1)
+    for mutated in (expected, offspring):
+        changed = mutated != 5
+        np.testing.assert_array_equal(changed.sum(axis=1), 5)
+        assert np.isclose(mutated[changed][:, np.newaxis], grid).any(1).all()
+    # And the values are spread over the whole grid
+    assert len(np.unique(np.round(offspring[offspring != 5], 6))) == 20
+
+
+@pytest.mark.parametrize("by_replacement", [False, True])
+def test_mutation_without_space(by_replacement):
+    np.random.seed(0)
+    offspring = np.full((50, 20), 5.0)
+    mask = operators.mutation_mask(offspring.shape, num_genes=[4] * 50)
+    mutated = operators.mutate(
+        offspring.copy(), mask, by_replacement=by_replacement
+    )
+
+    np.testing.assert_array_equal(mutated[~mask], 5)
+    center = 0 if by_replacement else 5
+    assert np.all(np.abs(mutated[mask] - center) <= 1)
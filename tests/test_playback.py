@@ -0,0 +1,92 @@
+import types
+
+import numpy as np
+import pytest
+
+chronoirr = pytest.importorskip("pychrono.irrlicht")
+
+from walkingsim.envs.chrono.playback import (  # noqa: E402
+    ChronoPlayback,
+    _PlaybackControls,
+)
+
+
+def _playback(**kwargs):
+    times = np.linspace(0, 2, 201)
+    trajectory = {"time": times, "poses": np.zeros((len(times), 3, 7))}
+    return ChronoPlayback({}, "quadrupede", trajectory, **kwargs)
+
+
+def _key(key, pressed=True):
+    return types.SimpleNamespace(
+        EventType=chronoirr.EET_KEY_INPUT_EVENT,
+        KeyInput=types.SimpleNamespace(Key=key, PressedDown=pressed),
+    )
+
+
+def test_advance_follows_speed():
+    playback = _playback(speed=2)
+    assert not playback.advance(0.25)
+    assert playback.time == pytest.approx(0.5)
+    assert playback.frame() == 50
+
+
+def test_pause_freezes_time():
+    playback = _playback()
+    playback.paused = True
+    playback.advance(1)
+    assert playback.time == 0
+
+
+def test_seek_is_clamped():
+    playback = _playback()
+    playback.seek(-1)
+    assert playback.time == 0
+    playback.seek(10)
+    assert playback.time == pytest.approx(playback.duration)
+
+
+def test_end_waits_for_delay():
+    playback = _playback(delay=1)
+    assert not playback.advance(3)
+    assert playback.time == pytest.approx(2)
+    assert not playback.advance(0.5)
+    assert playback.advance(0.5)
+
+
+def test_end_without_delay():
+    assert _playback().advance(3)
+
+
+def test_loop_wraps_around():
+    playback = _playback(loop=True)
+    assert not playback.advance(2.5)
+    assert playback.time == pytest.approx(0.5)
+
+
+def test_controls():
+    playback = _playback(seek_step=0.5)
+    controls = _PlaybackControls(playback)
+
+    assert controls.OnEvent(_key(chronoirr.KEY_SPACE))
+    assert playback.paused
+    assert not controls.OnEvent(_key(chronoirr.KEY_SPACE, pressed=False))
+    assert playback.paused
+
+    controls.OnEvent(_key(chronoirr.KEY_RIGHT))
+    assert playback.time == pytest.approx(0.5)
+    controls.OnEvent(_key(chronoirr.KEY_LEFT))
+    controls.OnEvent(_key(chronoirr.KEY_LEFT))
+    assert playback.time == 0
+
+    controls.OnEvent(_key(chronoirr.KEY_UP))
+    assert playback.speed == 2
+    controls.OnEvent(_key(chronoirr.KEY_DOWN))
+    controls.OnEvent(_key(chronoirr.KEY_DOWN))
+    assert playback.speed == 0.5
+
+    controls.OnEvent(_key(chronoirr.KEY_KEY_L))
+    assert playback.loop
+    playback.seek(1.5)
+    controls.OnEvent(_key(chronoirr.KEY_HOME))
+    assert playback.time == 0
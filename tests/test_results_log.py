@@ -0,0 +1,96 @@
+import csv
+
+import numpy as np
+import pytest
+
+from walkingsim.utils.data_manager import DataManager
+from walkingsim.utils.results_log import ResultsLog, generation_stats
+
+
+@pytest.fixture
+def dm(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "solutions" / "test").mkdir(parents=True)
+    return DataManager("test", "run")
+
+
+def _fill(log):
+    fitness = {0: [1.0, 2.0, 6.0], 1: [-1.0, 3.5]}
+    for generation, values in fitness.items():
+        for specimen_id, value in enumerate(values):
+            log.append(
+                {
+                    "generation": generation,
+                    "specimen_id": specimen_id,
+                    "total_fitness": value,
+                }
+            )
+        log.flush()
+    return fitness
+
+
+def test_generation_stats(dm):
+    log = ResultsLog(dm)
+    fitness = _fill(log)
+    stats = log.generation_stats()
+
+    assert list(stats["generation"]) == list(fitness)
+    for i, values in enumerate(fitness.values()):
+        assert stats["count"][i] == len(values)
+        assert stats["min"][i] == min(values)
+        assert stats["max"][i] == max(values)
+        assert stats["mean"][i] == pytest.approx(np.mean(values))
+        assert stats["std"][i] == pytest.approx(np.std(values))
+
+
+def test_generation_stats_of_unordered_rows():
+    results = {
+        "generation": np.array([1, 0, 1, 0]),
+        "total_fitness": np.array([4.0, 1.0, 2.0, 3.0]),
+    }
+    stats = generation_stats(results)
+    assert list(stats["min"]) == [1, 2]
+    assert list(stats["max"]) == [3, 4]
+    assert generation_stats({}) == {}
+
+
+def test_chunks_with_different_columns(dm):
+    log = ResultsLog(dm)
+    log.append({"generation": 0, "total_fitness": 1.0})
+    log.flush()
+    log.append({"generation": 1, "total_fitness": 2.0, "distance": 0.5})
+    log.flush()
+    # Nothing is written without rows
+    log.flush()
+
+    # A new log of the same run, e.g. after a resume, appends new chunks
+    log = ResultsLog(dm)
+    log.append({"generation": 2, "total_fitness": 3.0, "distance": 1.5})
+    log.flush()
+
+    results = log.load()
+    np.testing.assert_array_equal(results["generation"], [0, 1, 2])
+    np.testing.assert_array_equal(results["distance"], [np.nan, 0.5, 1.5])
+
+
+def test_export_csv(dm):
+    log = ResultsLog(dm)
+    _fill(log)
+    log.append({"generation": 2, "total_fitness": 0.25, "distance": 1})
+    log.flush()
+
+    with open(log.export_csv()) as fp:
+        rows = list(csv.DictReader(fp))
+    assert len(rows) == 6
+    assert rows[0] == {
+        "generation": "0",
+        "specimen_id": "0",
+        "total_fitness": "1.0",
+        "distance": "",
+    }
+    assert rows[-1] == {
+        "generation": "2",
+        "specimen_id": "",
+        "total_fitness": "0.25",
+        "distance": "1",
+    }
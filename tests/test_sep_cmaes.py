@@ -0,0 +1,123 @@
+import numpy as np
+import pytest
+
+from walkingsim.algorithms.sep_cmaes import Restarts, SepCMAES
+
+_TARGET = np.linspace(-0.5, 0.5, 10)
+# Scales of the genes of the ellipsoid, from 1 to 10^4
+_SCALES = 10 ** np.linspace(0, 4, 10)
+
+
+def _sphere(solutions):
+    return -np.sum((solutions - _TARGET) ** 2, axis=1)
+
+
+def _ellipsoid(solutions):
+    return -np.sum(_SCALES * (solutions - _TARGET) ** 2, axis=1)
+
+
+def _optimize(strategy, fitness, generations):
+    for _ in range(generations):
+        strategy.tell(fitness(strategy.ask()))
+    return strategy
+
+
+@pytest.mark.parametrize("popsize", [1, -3])
+def test_population_too_small(popsize):
+    with pytest.raises(RuntimeError, match="at least 2"):
+        SepCMAES(np.zeros(10), 0.3, popsize=popsize)
+
+
+def test_smallest_population():
+    np.random.seed(0)
+    strategy = SepCMAES(np.zeros(10), 0.3, popsize=2)
+    samples = strategy.ask()
+    assert samples.shape == (2, 10)
+    strategy.tell(-np.sum(samples**2, axis=1))
+    assert np.all(np.isfinite(strategy.mean))
+
+
+def test_converges_on_the_sphere():
+    np.random.seed(0)
+    strategy = SepCMAES(np.full(10, 0.8), 0.3)
+    assert not strategy.should_stop()
+
+    # 2000 evaluations
+    _optimize(strategy, _sphere, 200)
+    np.testing.assert_allclose(strategy.mean, _TARGET, atol=1e-6)
+    assert strategy.sigma < 1e-4
+    assert strategy.should_stop()
+
+
+def test_diagonal_follows_the_ellipsoid():
+    np.random.seed(0)
+    strategy = _optimize(SepCMAES(np.full(10, 0.8), 0.3), _ellipsoid, 300)
+    np.testing.assert_allclose(strategy.mean, _TARGET, atol=1e-6)
+
+    # The variance of each gene is inversely proportional to its scale
+    ratio = strategy.C[0] / strategy.C[-1]
+    assert _SCALES[-1] / 3 < ratio < 3 * _SCALES[-1]
+
+
+def test_step_size_grows_on_a_slope():
+    np.random.seed(0)
+    strategy = SepCMAES(np.zeros(10), 0.01, bounds=(-1e6, 1e6))
+    _optimize(strategy, lambda solutions: np.sum(solutions, axis=1), 30)
+    assert strategy.sigma > 0.1
+    assert np.all(strategy.mean > 0)
+
+
+def test_samples_are_clipped():
+    np.random.seed(0)
+    strategy = SepCMAES(np.zeros(10), 10, bounds=(-1, 1))
+    samples = strategy.ask()
+    assert np.all(np.abs(samples) <= 1)
+    assert np.any(np.abs(samples) == 1)
+
+
+def test_ipop_doubles_the_population():
+    np.random.seed(0)
+    strategy = SepCMAES(np.full(10, 0.8), 0.3, popsize=6)
+    restarts = Restarts("ipop", strategy.popsize, 0.3)
+    popsizes = [strategy.popsize]
+    for _ in range(2000):
+        strategy.tell(_sphere(strategy.ask()))
+        restarts.record(strategy.popsize)
+        if strategy.should_stop():
+            popsize, sigma = restarts.next(strategy.popsize)
+            assert sigma == 0.3
+            strategy = SepCMAES(np.full(10, 0.8), sigma, popsize)
+            popsizes.append(strategy.popsize)
+            if restarts.count == 2:
+                break
+
+    assert popsizes == [6, 12, 24]
+    assert restarts.evaluations["small"] == 0
+
+
+def test_bipop_balances_the_regimes():
+    np.random.seed(0)
+    restarts = Restarts("bipop", 10, 0.3)
+
+    # The large regime goes next until it used more evaluations, with a
+    # population twice as large at each of its restarts
+    assert restarts.next(10) == (20, 0.3)
+    assert restarts.next(20) == (40, 0.3)
+    assert restarts.regime == "large"
+    restarts.record(1000)
+
+    # Then the small regime until it used as many evaluations, with at most
+    # half of the large population and a smaller step-size
+    popsizes = []
+    for _ in range(5):
+        popsize, sigma = restarts.next(10)
+        assert restarts.regime == "small"
+        assert 10 <= popsize <= 20
+        assert 0.3 / 100 <= sigma <= 0.3
+        popsizes.append(popsize)
+        restarts.record(200)
+    assert len(set(popsizes)) > 1
+
+    assert restarts.next(10) == (80, 0.3)
+    assert restarts.regime == "large"
+    assert restarts.count == 8
@@ -0,0 +1,131 @@
+import os
+
+import numpy as np
+import pytest
+
+from walkingsim.simulation.snapshots import SnapshotCache
+
+_ENVIRONMENTS = os.path.join(os.path.dirname(__file__), "..", "environments")
+
+
+def _snapshots(steps, size=10):
+    return [(step, np.full(size, step), ({}, 0, False)) for step in steps]
+
+
+def test_lookup_resumes_before_the_first_difference():
+    cache = SnapshotCache(max_bytes=10**6, interval=4)
+    actions = np.random.default_rng(0).uniform(-1, 1, (20, 3))
+    cache.add(actions, _snapshots([4, 8, 12, 16]), {}, 1.0)
+
+    # Same actions: the last snapshot
+    assert cache.lookup(actions.copy())[0] == 16
+
+    # The rows applied during the first 9 steps are the same
+    changed = actions.copy()
+    changed[9, 1] += 1
+    step, state, _, _ = cache.lookup(changed)
+    assert step == 8
+    np.testing.assert_array_equal(state, 8)
+
+    # A snapshot taken right before the first difference is usable
+    changed = actions.copy()
+    changed[12] = 0
+    assert cache.lookup(changed)[0] == 12
+
+    changed = actions.copy()
+    changed[2] = 0
+    assert cache.lookup(changed) is None
+    assert cache.lookup(actions[:10]) is None
+
+
+def test_lookup_takes_the_longest_prefix():
+    cache = SnapshotCache(max_bytes=10**6, interval=2)
+    actions = np.zeros((10, 2))
+    cache.add(actions, _snapshots([2, 4]), {"time": np.zeros(1)}, 1.0)
+    other = actions.copy()
+    other[6:] = 1
+    cache.add(other, _snapshots([2, 4, 6, 8]), {"time": np.ones(1)}, 0.0)
+
+    query = other.copy()
+    query[9] = 2
+    step, _, _, trajectory = cache.lookup(query)
+    assert step == 8
+    assert trajectory["time"][0] == 1
+
+
+def test_eviction_keeps_the_best_rollouts():
+    actions = np.zeros((10, 2))
+    cache = SnapshotCache(max_bytes=10**6, interval=2)
+    cache.add(actions, _snapshots([2]), {}, 0.0)
+    rollout_bytes = cache.nbytes
+    cache = SnapshotCache(max_bytes=2 * rollout_bytes, interval=2)
+
+    for fitness in (1.0, 3.0, 2.0):
+        cache.add(actions + fitness, _snapshots([2]), {}, fitness)
+    assert len(cache) == 2
+    assert cache.nbytes == 2 * rollout_bytes
+    assert cache.lookup(actions + 1) is None
+    assert cache.lookup(actions + 3) is not None
+
+    # Nothing is kept without snapshots, or when they do not fit at all
+    cache.add(actions + 4, [], {}, 4.0)
+    cache.add(actions + 5, _snapshots([2], size=10**6), {}, 5.0)
+    assert len(cache) == 2
+
+
+def _model(snapshot_cache_size):
+    from walkingsim.algorithms.ga import GeneticAlgorithm
+    from walkingsim.loader import EnvironmentProps
+    from walkingsim.utils.pygad_config import PygadConfig
+
+    config = PygadConfig(
+        num_generations=1,
+        num_parents_mating=2,
+        mutation_percent_genes=(60, 10),
+        parallel_processing=None,
+        parent_selection_type="tournament",
+        keep_elitism=1,
+        crossover_type="uniform",
+        mutation_type="adaptive",
+        initial_population=None,
+        population_size=4,
+        num_joints=8,
+        save_solutions=False,
+        gene_space={"low": -1, "high": 1, "step": 0.1},
+        init_range_low=-1,
+        init_range_high=1,
+        random_mutation_min_val=-1,
+        random_mutation_max_val=1,
+        timesteps=10,
+    )
+    return GeneticAlgorithm(
+        config=config,
+        env_props=EnvironmentProps(_ENVIRONMENTS).load("default"),
+        duration=0.2,
+        snapshot_cache_size=snapshot_cache_size,
+        progress=False,
+    )
+
+
+def test_resumed_results_are_not_cached(tmp_path, monkeypatch):
+    pytest.importorskip("pychrono")
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "solutions" / "ga").mkdir(parents=True)
+    model = _model(snapshot_cache_size=1)
+    genomes = np.stack([np.zeros(model._controller.num_genes)] * 2)
+    genomes[1] = 0.5
+
+    def simulate(genomes):
+        return [
+            (1.0, {"snapshot_steps": 0}, True),
+            (2.0, {"snapshot_steps": 5}, True),
+        ]
+
+    monkeypatch.setattr(model, "_simulate", simulate)
+    assert model.population_fitness(genomes, [0, 1]) == [1.0, 2.0]
+    assert model._cache.get(model._cache.key(genomes[0])) is not None
+    assert model._cache.get(model._cache.key(genomes[1])) is None
+
+    # The snapshot settings are part of the cache key
+    other = _model(snapshot_cache_size=0)
+    assert other._cache.key(genomes[0]) != model._cache.key(genomes[0])
@@ -0,0 +1,127 @@
+import numpy as np
+import pytest
+
+from walkingsim.fitness import fitnesses
+from walkingsim.trajectory import Trajectory
+from walkingsim.utils.data_manager import DataManager
+from walkingsim.utils.trajectory_archive import (
+    TrajectoryArchive,
+    _decode,
+    _encode,
+    _resolutions,
+    load_trajectories,
+    rescore,
+)
+
+_METADATA = {"fitness": "walking-v0", "duration": 1.0, "timestep": 0.01}
+
+
+@pytest.fixture
+def dm(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "solutions" / "test").mkdir(parents=True)
+    return DataManager("test", "run")
+
+
+def _trajectory(rng, steps=50, motors=4):
+    trajectory = Trajectory(steps, motors)
+    position = np.array([0, 0.5, 0], dtype=float)
+    for step in range(steps):
+        trajectory.append(
+            step * 0.01,
+            tuple(position),
+            rng.uniform(-1, 1, motors),
+            int(rng.integers(0, 3)),
+            False,
+            step == steps - 1,
+            rng.uniform(0.5, 1),
+        )
+        trajectory.actions[-1] = rng.uniform(-1, 1, motors)
+        position += rng.normal(0.01, 0.02, 3)
+    return trajectory.as_dict()
+
+
+@pytest.mark.parametrize("resolution", [None, 10**4, 10**6])
+def test_encode_decode_round_trip(resolution):
+    rng = np.random.default_rng(0)
+    column = rng.normal(0, 3, (30, 2))
+    if resolution is None:
+        column = np.round(column * 100).astype(np.int32)
+    offsets = np.array([0, 10, 25])
+
+    first, deltas = _encode(column, resolution, offsets)
+    assert deltas.itemsize <= 4
+    bounds = list(offsets) + [len(column)]
+    for i, (start, end) in enumerate(zip(bounds[:-1], bounds[1:])):
+        decoded = _decode(first[i], deltas[start:end], resolution)
+        if resolution is None:
+            np.testing.assert_array_equal(decoded, column[start:end])
+        else:
+            # The values are rounded down to the resolution
+            error = column[start:end] - decoded
+            assert np.all(error >= -1e-9)
+            assert np.all(error < 1 / resolution + 1e-9)
+
+
+def test_archive_round_trip(dm):
+    rng = np.random.default_rng(1)
+    trajectories = [_trajectory(rng, steps) for steps in (50, 1, 20)]
+    archive = TrajectoryArchive(dm, _METADATA)
+    for i, trajectory in enumerate(trajectories):
+        archive.append(0, i, float(i), trajectory)
+    archive.flush()
+    archive.append(1, None, 5.0, trajectories[0])
+    archive.flush()
+
+    metadata, reader = load_trajectories(dm)
+    assert metadata == _METADATA
+    assert len(reader) == 4
+    assert list(reader.index["specimen_id"]) == [0, 1, 2, -1]
+
+    for i, (_, _, _, trajectory) in enumerate(reader):
+        expected = trajectories[i % 3]
+        assert set(trajectory) == set(expected)
+        for name, column in expected.items():
+            resolution = _resolutions.get(name)
+            if column.dtype == bool or resolution is None:
+                np.testing.assert_array_equal(trajectory[name], column)
+            else:
+                np.testing.assert_allclose(
+                    trajectory[name], column, atol=1 / resolution + 1e-9
+                )
+
+
+def test_rescore_matches_score(dm):
+    rng = np.random.default_rng(2)
+    trajectories = [_trajectory(rng) for _ in range(5)]
+    archive = TrajectoryArchive(dm, _METADATA)
+    for i, trajectory in enumerate(trajectories):
+        archive.append(0, i, 0.0, trajectory)
+    archive.flush()
+
+    scores = rescore(dm, "walking-v1")
+    assert list(scores["new_fitness"]) == sorted(
+        scores["new_fitness"], reverse=True
+    )
+    scorer = fitnesses["walking-v1"](1.0, 0.01)
+    for i, new_fitness in zip(scores["trajectory"], scores["new_fitness"]):
+        expected, _ = scorer.score(trajectories[i])
+        assert new_fitness == pytest.approx(expected, rel=1e-3, abs=1e-3)
+
+    with pytest.raises(RuntimeError):
+        rescore(dm, "running-v0")
+
+
+@pytest.mark.parametrize(
+    "retention, kept",
+    [("all", [0, 1, 2, 3]), ("top", [3, 2]), ("elites", [3, 2, 1])],
+)
+def test_retention(dm, retention, kept):
+    rng = np.random.default_rng(3)
+    archive = TrajectoryArchive(dm, _METADATA, retention, top=2)
+    for i in range(4):
+        archive.append(0, i, float(i), _trajectory(rng, 5))
+    archive.flush(elites_fitness=1.0)
+
+    _, reader = load_trajectories(dm)
+    assert list(reader.index["specimen_id"]) == kept
@@ -0,0 +1,125 @@
+import math
+
+import numpy as np
+from loguru import logger
+
+from walkingsim.algorithms.ga import GeneticAlgorithm
+from walkingsim.algorithms.sep_cmaes import (
+    Restarts,
+    SepCMAES,
+    restart_strategies,
+)
+
+
+class CMAES(GeneticAlgorithm):
+    """
+    CMA-ES optimizer (separable variant) sharing the evaluation pipeline of
+        the genetic algorithm: controller, workers, cache, successive halving,
+        early stopping and logs.
+
+    restarts: none | ipop | bipop (see `Restarts`)
+
+    The `num_generations` of the config are shared by all the restarts, and
+        `population_size` is the population of the first one.
+    """
+
+    _dm_group = "cmaes"
+
+    def __init__(self, *args, restarts: str = "ipop", **kwargs):
+        if restarts not in restart_strategies:
+            raise RuntimeError(
+                f"Restart strategy `{restarts}` is invalid, possible values are `{restart_strategies}`"
+            )
+
+        # The state of pygad is not used, there is nothing to checkpoint
+        kwargs["checkpoint_every"] = 0
+        super().__init__(*args, **kwargs)
+        self._restarts = restarts
+        self.sim_data["restarts"] = restarts
+
+        config = self.sim_data["config"]
+        self._low = config.init_range_low
+        self._high = config.init_range_high
+        self._sigma0 = 0.3 * (self._high - self._low)
+        self._popsize0 = config.population_size
+
+    def _new_strategy(self, popsize: int, sigma: float):
+        mean = np.random.uniform(
+            self._low, self._high, self._controller.num_genes
+        )
+        gene_space = self.sim_data["config"].gene_space or {}
+        bounds = (gene_space.get("low", -1), gene_space.get("high", 1))
+        return SepCMAES(mean, sigma, popsize, bounds)
+
+    def train(self):
+        strategy = self._new_strategy(self._popsize0, self._sigma0)
+        restarts = Restarts(self._restarts, strategy.popsize, self._sigma0)
+
+        best_solution, best_fitness = None, -math.inf
+        self.ga.generations_completed = 0
+        self._pool = self._new_pool()
+        try:
+            for _ in range(self.ga.num_generations):
+                solutions = strategy.ask()
+                fitness = np.array(
+                    self.population_fitness(
+                        solutions, list(range(len(solutions)))
+                    )
+                )
+                strategy.tell(fitness)
+                restarts.record(len(solutions))
+
+                best = int(np.argmax(fitness))
+                if fitness[best] > best_fitness:
+                    best_solution = solutions[best].copy()
+                    best_fitness = fitness[best]
+
+                self.ga.generations_completed += 1
+                self.ga.population = solutions
+                self.ga.last_generation_fitness = fitness
+                self._on_generation(self.ga)
+
+                if self._restarts != "none" and strategy.should_stop():
+                    strategy = self._new_strategy(
+                        *restarts.next(strategy.popsize)
+                    )
+                    logger.info(
+                        "Restart {} with a population of {}".format(
+                            restarts.count, strategy.popsize
+                        )
+                    )
+                    self._dm.save_log_file(
+                        "restarts.csv",
+                        [
+                            "generation",
+                            "restart",
+                            "regime",
+                            "popsize",
+                            "sigma",
+                        ],
+                        {
+                            "generation": self.ga.generations_completed,
+                            "restart": restarts.count,
+                            "regime": restarts.regime,
+                            "popsize": strategy.popsize,
+                            "sigma": strategy.sigma,
+                        },
+                    )
+        except BaseException:
+            self._pool.close(terminate=True)
+            raise
+        else:
+            self._pool.close()
+        finally:
+            self._pool = None
+            self._cache.close()
+        self._simulation.close()
+
+        self.sim_data["best_fitness"] = best_fitness
+        self.sim_data["best_solution"] = best_solution
+
+        logger.error("Best genome: {}".format(best_solution))
+        logger.error("Best fitness: {}".format(best_fitness))
+
+        self.progress_gens.close()
+        self.progress_sims.close()
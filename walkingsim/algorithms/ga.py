@@ -1,13 +1,201 @@
-import copy
+import math
+import random
 
 import numpy as np
 import pygad as pygad_
 import tqdm
 from loguru import logger
 
+from walkingsim.algorithms import operators
+from walkingsim.algorithms.nsga2 import (
+    ParetoArchive,
+    crowded_fitness,
+    crowding_distance,
+    non_dominated_sort,
+)
+from walkingsim.controllers import controllers
+from walkingsim.envs.chrono import ChronoPlayback
+from walkingsim.fitness import fitnesses
+from walkingsim.simulation.base import early_stopping_rules
+from walkingsim.simulation.environments import aggregations, combine_results
 from walkingsim.simulation.ga import GA_Simulation
+from walkingsim.simulation.pool import SimulationPool
 from walkingsim.utils.data_manager import DataManager
+from walkingsim.utils.fitness_cache import FitnessCache
 from walkingsim.utils.pygad_config import PygadConfig
+from walkingsim.utils.results_log import ResultsLog
+from walkingsim.utils.surrogate import RidgeSurrogate
+from walkingsim.utils.trajectory_archive import TrajectoryArchive
+
+
+class _PopulationGA(pygad_.GA):
+    """
+    pygad.GA which hands the whole population to `population_fitness` instead
+    of calling `fitness_func` once per solution, so that the individuals can
+    be evaluated in parallel.
+
+    `population_fitness(solutions, indices, desc)` must return the fitness of
+    every solution, in the same order.
+
+    With `vectorized_operators`, the crossover and the mutation are replaced
+    by the population-wide operators of `walkingsim.algorithms.operators`
+    when the settings are supported by them.
+
+    With `relative_fitness`, the fitness of an individual depends on the rest
+    of the population (e.g. its rank in NSGA-II), so the elites are evaluated
+    again with the others instead of keeping their previous fitness.
+    """
+
+    def __init__(
+        self,
+        population_fitness,
+        vectorized_operators=False,
+        relative_fitness=False,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.population_fitness = population_fitness
+        self.relative_fitness = relative_fitness
+        # Fitness of the current population when it is already known, e.g.
+        # when it was restored from a checkpoint
+        self.known_fitness = None
+        if vectorized_operators:
+            self._use_vectorized_operators()
+
+    def _use_vectorized_operators(self):
+        if (
+            self.crossover_type in operators.crossovers
+            and self.crossover_probability is None
+            and self.allow_duplicate_genes
+        ):
+            self.crossover = operators.crossovers[self.crossover_type]
+        elif self.crossover_type is not None:
+            logger.warning(
+                f"No vectorized operator for the `{self.crossover_type}` "
+                "crossover with these settings, using pygad's"
+            )
+
+        if (
+            self.mutation_type in ("random", "adaptive")
+            and not self.gene_space_nested
+            and (self.gene_space is None or isinstance(self.gene_space, dict))
+            and self.allow_duplicate_genes
+        ):
+            self.mutation = self._vectorized_mutation
+        elif self.mutation_type is not None:
+            logger.warning(
+                f"No vectorized operator for the `{self.mutation_type}` "
+                "mutation with these settings, using pygad's"
+            )
+
+    def _vectorized_mutation(self, offspring):
+        if self.mutation_probability is not None:
+            setting = self.mutation_probability
+        else:
+            setting = self.mutation_num_genes
+
+        # The adaptive mutation mutates more genes of the offspring whose
+        # fitness is below the average
+        if self.mutation_type == "adaptive":
+            (
+                average_fitness,
+                offspring_fitness,
+            ) = self.adaptive_mutation_population_fitness(offspring)
+            setting = np.where(
+                np.asarray(offspring_fitness) < average_fitness,
+                setting[0],
+                setting[1],
+            )
+        else:
+            setting = np.full(len(offspring), setting)
+
+        if self.mutation_probability is not None:
+            mask = operators.mutation_mask(
+                offspring.shape, probability=setting
+            )
+        else:
+            mask = operators.mutation_mask(offspring.shape, num_genes=setting)
+        return operators.mutate(
+            offspring,
+            mask,
+            gene_space=self.gene_space,
+            min_val=self.random_mutation_min_val,
+            max_val=self.random_mutation_max_val,
+            by_replacement=self.mutation_by_replacement,
+        )
+
+    def cal_pop_fitness(self):
+        if self.known_fitness is not None:
+            fitness, self.known_fitness = self.known_fitness, None
+            return fitness
+
+        fitness = np.empty(len(self.population))
+        pending = []
+
+        # The fitness of the elites was already computed in the previous
+        # generation, there is no need to simulate them again.
+        elites = {}
+        if (
+            self.keep_elitism > 0
+            and self.last_generation_elitism is not None
+            and not self.relative_fitness
+        ):
+            for elite, idx in zip(
+                self.last_generation_elitism,
+                self.last_generation_elitism_indices,
+            ):
+                elites[tuple(elite)] = self.previous_generation_fitness[idx]
+
+        for idx, solution in enumerate(self.population):
+            elite_fitness = elites.get(tuple(solution), None)
+            if elite_fitness is None:
+                pending.append(idx)
+            else:
+                fitness[idx] = elite_fitness
+
+        fitness[pending] = self.population_fitness(
+            self.population[pending], pending, "Fitness"
+        )
+        return fitness
+
+    def adaptive_mutation_population_fitness(self, offspring):
+        # Same as pygad's implementation, except that the offspring are
+        # evaluated all at once.
+        fitness = self.last_generation_fitness.copy()
+        temp_population = np.zeros_like(self.population)
+
+        if self.keep_elitism == 0:
+            if self.keep_parents == 0:
+                parents_to_keep = []
+            elif self.keep_parents == -1:
+                parents_to_keep = self.last_generation_parents.copy()
+                temp_population[0 : len(parents_to_keep), :] = parents_to_keep
+            elif self.keep_parents > 0:
+                parents_to_keep, _ = self.steady_state_selection(
+                    self.last_generation_fitness, num_parents=self.keep_parents
+                )
+                temp_population[0 : len(parents_to_keep), :] = parents_to_keep
+        else:
+            parents_to_keep, _ = self.steady_state_selection(
+                self.last_generation_fitness, num_parents=self.keep_elitism
+            )
+            temp_population[0 : len(parents_to_keep), :] = parents_to_keep
+
+        temp_population[len(parents_to_keep) :, :] = offspring
+
+        fitness[
+            : self.last_generation_parents.shape[0]
+        ] = self.last_generation_fitness[self.last_generation_parents_indices]
+
+        fitness[len(parents_to_keep) :] = self.population_fitness(
+            temp_population[len(parents_to_keep) :],
+            [None] * len(offspring),
+            "Mutation",
+            offspring=True,
+        )
+        average_fitness = np.mean(fitness)
+
+        return average_fitness, fitness[len(parents_to_keep) :]
 
 
 class GeneticAlgorithm:
@@ -17,6 +205,28 @@ class GeneticAlgorithm:
     """
 
     _dm_group = "ga"
+    # Arguments of the simulations which do not change the fitness
+    _fitness_neutral_kwargs = ("record_trajectory",)
+    # pygad.GA subclass evolving the population
+    _ga_cls = _PopulationGA
+    _checkpoint_filename = "checkpoint.dat"
+    # Attributes of the pygad.GA instance needed to resume the evolution
+    _checkpoint_attributes = (
+        "generations_completed",
+        "population",
+        "last_generation_fitness",
+        "previous_generation_fitness",
+        "last_generation_parents",
+        "last_generation_parents_indices",
+        "last_generation_elitism",
+        "last_generation_elitism_indices",
+        "best_solutions",
+        "best_solutions_fitness",
+        "solutions",
+        "solutions_fitness",
+        "mutation_num_genes",
+        "mutation_probability",
+    )
 
     def __init__(
         self,
@@ -29,23 +239,236 @@ class GeneticAlgorithm:
         ending_delay: int = 0,
         timestep: float = 1e-2,
         best_solution=None,
+        substeps: int = 1,
+        controller: str = "open-loop",
+        workers: int = 1,
+        cache_size: int = 10000,
+        persistent_cache: bool = False,
+        checkpoint_every: int = 1,
+        date: str = None,
+        progress: bool = True,
+        halving_rungs: int = 0,
+        halving_eta: int = 2,
+        halving_coarsening: float = 1,
+        stagnation_window: float = 0,
+        stagnation_distance: float = 0.05,
+        max_tilt: float = 0,
+        bound_rank: int = 0,
+        surrogate_keep: float = 0,
+        surrogate_kappa: float = 1,
+        vectorized_operators: bool = False,
+        snapshot_cache_size: float = 0,
+        snapshot_interval: float = 0.5,
+        save_trajectories: bool = False,
+        trajectory_retention: str = "all",
+        trajectory_top: int = 10,
+        objectives: list = None,
+        extra_fitnesses: list = None,
+        environments: list = None,
+        aggregation: str = "mean",
+        cvar_alpha: float = 0.25,
     ):
-        self._dm = DataManager(self._dm_group)
+        self._dm = DataManager(self._dm_group, date)
         self._config = config._asdict()
+        self._checkpoint_every = checkpoint_every
+        # Arguments needed to build the same model when resuming the training
+        self._checkpoint_kwargs = {
+            "config": config,
+            "env_props": env_props,
+            "creature": creature,
+            "fitness": fitness,
+            "duration": duration,
+            "ending_delay": ending_delay,
+            "timestep": timestep,
+            "substeps": substeps,
+            "controller": controller,
+            "halving_rungs": halving_rungs,
+            "halving_eta": halving_eta,
+            "halving_coarsening": halving_coarsening,
+            "stagnation_window": stagnation_window,
+            "stagnation_distance": stagnation_distance,
+            "max_tilt": max_tilt,
+            "bound_rank": bound_rank,
+            "surrogate_keep": surrogate_keep,
+            "surrogate_kappa": surrogate_kappa,
+            "vectorized_operators": vectorized_operators,
+            "snapshot_cache_size": snapshot_cache_size,
+            "snapshot_interval": snapshot_interval,
+            "save_trajectories": save_trajectories,
+            "trajectory_retention": trajectory_retention,
+            "trajectory_top": trajectory_top,
+            "objectives": objectives,
+            "extra_fitnesses": extra_fitnesses,
+            "environments": environments,
+            "aggregation": aggregation,
+            "cvar_alpha": cvar_alpha,
+        }
+
+        # Several environments: each genome is evaluated in all of them (the
+        # `(name, props)` pairs), and its fitness is the `aggregation` of its
+        # fitness in each one (see `combine_results`)
+        if aggregation not in aggregations:
+            raise RuntimeError(
+                f"Aggregation `{aggregation}` is invalid, possible values are `{aggregations}`"
+            )
+        self._environments = list(environments or [])
+        self._aggregation = aggregation
+        self._cvar_alpha = cvar_alpha
+        if self._environments and save_trajectories:
+            raise RuntimeError(
+                "The trajectories cannot be saved with several environments"
+            )
 
         self.data_log = []
         self._env_props = env_props
         self._visualize = visualize
+        self._workers = workers
+        self._pool = None
+        self._sim_kwargs = {
+            "env_props": self._env_props,
+            "creature": creature,
+            "fitness": fitness,
+            "timestep": timestep,
+            "duration": duration,
+            "substeps": substeps,
+            "stagnation_window": stagnation_window,
+            "stagnation_distance": stagnation_distance,
+            "max_tilt": max_tilt,
+            "snapshot_cache_size": snapshot_cache_size,
+            "snapshot_interval": snapshot_interval,
+            "record_trajectory": save_trajectories,
+            "extra_fitnesses": list(extra_fitnesses or []),
+        }
         self._simulation = GA_Simulation(
-            env_props=self._env_props,
-            creature=creature,
-            fitness=fitness,
+            **self._sim_kwargs,
             visualize=self._visualize,
             ending_delay=ending_delay,
-            timestep=timestep,
+        )
+        if self._visualize and self._workers > 1:
+            logger.warning(
+                "Rendering is not available with multiple workers, "
+                "the simulations will not be rendered"
+            )
+
+        controller_cls = controllers.get(controller, None)
+        if controller_cls is None:
+            raise RuntimeError(
+                f"Controller `{controller}` is invalid, possible values are `{controllers.keys()}`"
+            )
+        self._controller = controller_cls(
+            motors=self._simulation.creature_shape,
+            timesteps=config.timesteps,
+            control_timestep=timestep * substeps,
             duration=duration,
         )
 
+        # Successive halving: the genomes are first simulated at
+        # `halving_rungs` low fidelities, each one being `halving_eta` times
+        # shorter (and `halving_coarsening` times coarser) than the next one,
+        # and only the best 1/eta of them are promoted to the next fidelity.
+        self._halving_eta = max(2, halving_eta)
+        self._fidelities = []
+        self._fidelity_controllers = []
+        for rung in range(halving_rungs):
+            reduction = halving_rungs - rung
+            fidelity = (
+                ("duration", duration / self._halving_eta**reduction),
+                ("timestep", timestep * halving_coarsening**reduction),
+            )
+            self._fidelities.append(fidelity)
+            self._fidelity_controllers.append(
+                controller_cls(
+                    motors=self._simulation.creature_shape,
+                    timesteps=config.timesteps,
+                    control_timestep=dict(fidelity)["timestep"] * substeps,
+                    duration=dict(fidelity)["duration"],
+                )
+            )
+        self._fidelity_stats = {"evaluations": 0, "simulated_seconds": 0}
+
+        # Early stopping: the full simulations are stopped as soon as they
+        # can no longer beat the `bound_rank`-th best of the last generation
+        self._bound_rank = bound_rank
+        self._early_stopping = (
+            stagnation_window > 0 or max_tilt > 0 or bound_rank > 0
+        )
+        self._early_stopping_stats = self._empty_early_stopping_stats()
+
+        # Snapshots: the rollouts resume from the snapshots of the previous
+        # rollouts of their worker sharing the beginning of their actions
+        self._snapshots = snapshot_cache_size > 0
+        self._snapshot_stats = self._empty_snapshot_stats()
+
+        # Surrogate pre-screening: once the surrogate has enough samples,
+        # only the `surrogate_keep` fraction of the new genomes with the best
+        # upper confidence bound is simulated, the others get their
+        # predicted fitness
+        self._surrogate = None
+        if 0 < surrogate_keep < 1:
+            self._surrogate = RidgeSurrogate(
+                min_samples=2 * config.population_size
+            )
+        self._surrogate_keep = surrogate_keep
+        self._surrogate_kappa = surrogate_kappa
+        self._surrogate_stats = self._empty_surrogate_stats()
+
+        gene_space = config.gene_space
+        cache_context = {
+            **{
+                name: value
+                for name, value in self._sim_kwargs.items()
+                if name not in self._fitness_neutral_kwargs
+            },
+            "timesteps": config.timesteps,
+            "controller": controller,
+        }
+        if self._environments:
+            cache_context["environments"] = self._environments
+            cache_context["aggregation"] = aggregation
+            cache_context["cvar_alpha"] = cvar_alpha
+        self._cache = FitnessCache(
+            context=cache_context,
+            step=gene_space.get("step") if gene_space else None,
+            max_size=cache_size,
+            path=(
+                self._dm.get_global_path("fitness_cache")
+                if persistent_cache
+                else None
+            ),
+        )
+
+        # NSGA-II: the props of the fitness listed in `objectives` are
+        # maximized separately. The fitness seen by pygad is the crowded
+        # comparison of the individuals (front first, then crowding
+        # distance), so that its selection and elitism follow NSGA-II.
+        self._objectives = list(objectives or [])
+        self._pareto = ParetoArchive()
+        self._last_objectives = None
+        self._last_fitness = None
+        if self._objectives:
+            props = fitnesses[fitness](duration, timestep).props_range
+            for objective in self._objectives:
+                if objective not in props:
+                    raise RuntimeError(
+                        f"Objective `{objective}` is invalid, possible values are `{props.keys()}`"
+                    )
+
+        self._results = ResultsLog(self._dm)
+        self._trajectories = None
+        if save_trajectories:
+            self._trajectories = TrajectoryArchive(
+                self._dm,
+                {
+                    "fitness": fitness,
+                    "duration": duration,
+                    "timestep": timestep * substeps,
+                    "creature": creature,
+                    "env_props": env_props,
+                },
+                retention=trajectory_retention,
+                top=trajectory_top,
+            )
+
         self.sim_data = {
             "config": config,
             "best_fitness": 0,
@@ -53,14 +476,30 @@ class GeneticAlgorithm:
             "solutions": None,
             "creature": creature,
             "env": env_props,
+            "duration": duration,
+            "timestep": timestep,
+            "substeps": substeps,
+            "controller": controller,
+            "fitness": fitness,
         }
+        if self._environments:
+            self.sim_data["environments"] = [
+                name for name, _ in self._environments
+            ]
+            self.sim_data["aggregation"] = aggregation
+        if self._objectives:
+            self.sim_data["objectives"] = self._objectives
+            self.sim_data["pareto_front"] = []
 
-        self.ga = pygad_.GA(
+        self.ga = self._ga_cls(
+            population_fitness=self.population_fitness,
+            vectorized_operators=vectorized_operators,
+            relative_fitness=bool(self._objectives),
             # Population & generations settings
             initial_population=config.initial_population,
             sol_per_pop=config.population_size,
             num_generations=config.num_generations,
-            num_genes=self._simulation.creature_shape * config.timesteps,
+            num_genes=self._controller.num_genes,
             # Evolution settings
             num_parents_mating=config.num_parents_mating,
             mutation_percent_genes=config.mutation_percent_genes,
@@ -79,8 +518,6 @@ class GeneticAlgorithm:
             random_mutation_max_val=config.random_mutation_max_val,
             # Callbacks
             fitness_func=self.fitness_function,
-            on_crossover=self.on_crossover,
-            on_mutation=self.on_mutation,
             on_generation=self._on_generation,
             on_stop=self.on_stop,
         )
@@ -90,6 +527,7 @@ class GeneticAlgorithm:
             desc="Generations",
             leave=False,
             position=1,
+            disable=not progress,
         )
 
         self.progress_sims = tqdm.tqdm(
@@ -97,29 +535,57 @@ class GeneticAlgorithm:
             desc=f"({self.ga.generations_completed}) Fitness",
             leave=False,
             position=0,
+            disable=not progress,
         )
 
-    def on_crossover(self, ga_instance, offspring_crossover):
-        self.progress_sims.reset(len(offspring_crossover))
-        self.progress_sims.set_description(
-            f"({self.ga.generations_completed}) Crossover"
-        )
+    def _on_generation(self, ga_instance):
+        self.progress_gens.update(1)
+        self._results.flush()
+        if self._trajectories is not None:
+            # The best `keep_elitism` individuals of the population are the
+            # elites of the next generation. The archive compares their
+            # fitness, not their crowded fitness with objectives.
+            fitness = ga_instance.last_generation_fitness
+            elites = min(max(1, ga_instance.keep_elitism), len(fitness))
+            elites = np.argsort(fitness, kind="stable")[-elites:]
+            if self._objectives:
+                fitness = self._last_fitness
+            self._trajectories.flush(elites_fitness=np.min(fitness[elites]))
 
-    def on_mutation(self, ga_instance, offspring_mutation):
-        self.progress_sims.reset(len(offspring_mutation))
-        self.progress_sims.set_description(
-            f"({self.ga.generations_completed}) Mutation"
+        cache_stats = self._cache.pop_stats()
+        logger.info(
+            "Generation {}: {} cache hits, {} cache misses".format(
+                self.ga.generations_completed,
+                cache_stats["hits"],
+                cache_stats["misses"],
+            )
+        )
+        cache_stats["generation"] = self.ga.generations_completed
+        cache_stats["size"] = len(self._cache)
+        self._dm.save_log_file(
+            "cache.csv", ["generation", "hits", "misses", "size"], cache_stats
         )
 
-    def _on_generation(self, ga_instance):
-        self.progress_gens.update(1)
+        if self._fidelities:
+            self._log_fidelity_stats()
+        if self._early_stopping:
+            self._log_early_stopping_stats()
+        if self._snapshots:
+            self._log_snapshot_stats()
+        if self._surrogate is not None:
+            self._log_surrogate_stats()
+        if self._objectives:
+            self._log_pareto_stats()
+
+        if (
+            self._checkpoint_every > 0
+            and self.ga.generations_completed % self._checkpoint_every == 0
+        ):
+            self.save_checkpoint()
 
     def on_stop(self, ga_instance, last_population_fitness):
-        self.progress_sims.reset(
-            len(self.ga.last_generation_offspring_mutation)
-        )
         self.progress_sims.set_description(
-            f"({self.ga.generations_completed}) Fitness"
+            f"({self.ga.generations_completed}) Done"
         )
 
     def fitness_function(self, individual, solution_idx):
@@ -132,44 +598,519 @@ class GeneticAlgorithm:
             2) The solution's index within the population.
 
         """
-        self.progress_gens.refresh()
-        logger.debug("Simulation {}".format(solution_idx))
-        logger.debug("Creature genome: {}".format(individual))
-        # Simulate the movement of the quadruped based on the movement matrix
-        # and the sensor data
+        return self.population_fitness([individual], [solution_idx])[0]
 
-        forces_list = np.array(individual).reshape(
-            (
-                self.sim_data["config"].timesteps,
-                self._simulation.creature_shape,
+    def population_fitness(
+        self, individuals, solutions_idx, desc="Fitness", offspring=False
+    ):
+        """
+        Calculate the fitness of several individuals at once, spreading the
+            simulations over the workers.
+
+        The results are logged in the same order as the individuals, whatever
+            the order in which the workers finish them.
+
+        With objectives, the individuals are ranked against each other, or
+            against the last population if they are `offspring` being
+            compared to it.
+        """
+        self.progress_sims.reset(len(individuals))
+        self.progress_sims.set_description(
+            f"({self.ga.generations_completed}) {desc}"
+        )
+
+        keys = [self._cache.key(individual) for individual in individuals]
+        results = [self._cache.get(key) for key in keys]
+        self.progress_sims.update(len(results) - results.count(None))
+
+        # Each missing genome is simulated once, even if it appears several
+        # times in the population
+        missing = {}
+        for idx, (key, result) in enumerate(zip(keys, results)):
+            if result is None:
+                missing.setdefault(key, []).append(idx)
+
+        missing = list(missing.items())
+        genomes = np.array([individuals[idxs[0]] for _, idxs in missing])
+        selected, predictions = self._screen(genomes)
+
+        if len(selected) == 0:
+            simulated = []
+        elif self._fidelities:
+            simulated = self._successive_halving(genomes[selected])
+        else:
+            simulated = self._simulate(genomes[selected])
+
+        for i, (fitness, fitness_props, full) in zip(selected, simulated):
+            key, idxs = missing[i]
+            trajectory = fitness_props.pop("trajectory", None)
+            self._count_early_stopping(fitness_props)
+            self._count_snapshots(fitness_props)
+
+            # Only the results of the full simulations are reusable, and only
+            # if they do not depend on the threshold of the generation
+            stop_rule = fitness_props.get("early_stop", None)
+            if full and stop_rule != early_stopping_rules.index("bound"):
+                if self._surrogate is not None:
+                    self._surrogate.add(genomes[i], fitness)
+                if not self._resumed(fitness_props):
+                    self._cache.put(key, fitness, fitness_props)
+                    if self._trajectories is not None:
+                        self._trajectories.append(
+                            self.ga.generations_completed,
+                            solutions_idx[idxs[0]],
+                            fitness,
+                            trajectory,
+                        )
+            if predictions is not None:
+                fitness_props = {**fitness_props, "predicted": 0}
+            for idx in idxs:
+                results[idx] = (fitness, fitness_props)
+
+            self.progress_gens.refresh()
+            self.progress_sims.update(len(idxs))
+
+        if predictions is not None:
+            self._assign_predictions(missing, selected, predictions, results)
+
+        if self._objectives:
+            # The fitness of the simulation is still logged as the total
+            # fitness, next to the rank and the crowded fitness
+            ranks, scores = self._rank(individuals, results, offspring)
+            results = [
+                (
+                    score,
+                    {
+                        **props,
+                        "total_fitness": fitness,
+                        "crowded_fitness": score,
+                        "pareto_rank": rank,
+                    },
+                )
+                for rank, score, (fitness, props) in zip(
+                    ranks, scores, results
+                )
+            ]
+
+        fitnesses = []
+        for solution_idx, (fitness, fitness_props) in zip(
+            solutions_idx, results
+        ):
+            logger.debug("Simulation {}".format(solution_idx))
+            logger.debug("Creature fitness: {}".format(fitness))
+
+            # Buffer the entry, it is written at the end of the generation
+            self._results.append(
+                {
+                    "generation": self.ga.generations_completed,
+                    "specimen_id": solution_idx,
+                    "total_fitness": fitness,
+                    **fitness_props,
+                }
+            )
+
+            fitnesses.append(fitness)
+
+        return fitnesses
+
+    def _simulate(self, genomes, rung: int = None):
+        """
+        Yields the `(fitness, props, full)` of each genome, as soon as it is
+            simulated, at the fidelity of `rung` (the full one by default).
+        """
+        # The fitness threshold only makes sense for the full simulations
+        fitness_threshold = None
+        if rung is None:
+            forces_lists = self._controller.decode_population(genomes)
+            fidelity = None
+            fitness_threshold = self._fitness_threshold()
+        else:
+            controller = self._fidelity_controllers[rung]
+            forces_lists = controller.decode_population(genomes)
+            fidelity = self._fidelities[rung]
+
+        if self._environments:
+            names = [name for name, _ in self._environments]
+            simulated = (
+                combine_results(
+                    results, names, self._aggregation, self._cvar_alpha
+                )
+                for results in self._pool.imap_environments(
+                    forces_lists, fidelity, fitness_threshold
+                )
+            )
+        else:
+            simulated = self._pool.imap(
+                forces_lists, fidelity, fitness_threshold
+            )
+        for fitness, fitness_props in simulated:
+            yield fitness, fitness_props, rung is None
+
+    def _new_pool(self):
+        # Created by each training run and closed at its end. A single worker
+        # evaluates with a simulation of its own, without the ending delay of
+        # `self._simulation`, unless the training is rendered.
+        return SimulationPool(
+            self._sim_kwargs,
+            self._workers,
+            self._simulation if self._visualize else None,
+            [props for _, props in self._environments],
+        )
+
+    def _screen(self, genomes):
+        """
+        Returns the indices of the genomes to simulate and, if the surrogate
+            screened them, the predicted fitness of every genome with its
+            standard deviation.
+        """
+        everything = np.arange(len(genomes))
+        if (
+            self._surrogate is None
+            or not self._surrogate.ready
+            or len(genomes) < 2
+        ):
+            return everything, None
+
+        mean, std = self._surrogate.predict(genomes)
+        keep = max(1, math.ceil(self._surrogate_keep * len(genomes)))
+        # The most promising, or the most uncertain, ones are simulated
+        ucb = mean + self._surrogate_kappa * std
+        selected = np.sort(np.argsort(ucb)[::-1][:keep])
+        return selected, (mean, std)
+
+    def _assign_predictions(self, missing, selected, predictions, results):
+        """
+        Gives their predicted fitness to the genomes which were not
+            simulated, and measures the accuracy of the surrogate on the
+            ones which were.
+        """
+        mean, std = predictions
+        simulated_fitness = np.array(
+            [results[missing[i][1][0]][0] for i in selected]
+        )
+
+        # The screened out genomes are ranked below all the simulated ones,
+        # like the surrogate judged them, so that an unverified prediction
+        # never becomes an elite
+        floor = simulated_fitness.min()
+        for i in np.setdiff1d(np.arange(len(missing)), selected):
+            fitness = min(mean[i], floor)
+            fitness_props = {"predicted": 1, "predicted_std": std[i]}
+            for idx in missing[i][1]:
+                results[idx] = (fitness, fitness_props)
+            self.progress_sims.update(len(missing[i][1]))
+
+        stats = self._surrogate_stats
+        stats["simulated"] += len(selected)
+        stats["avoided"] += len(missing) - len(selected)
+        stats["predictions"].extend(mean[selected])
+        stats["fitness"].extend(simulated_fitness)
+
+    @staticmethod
+    def _empty_surrogate_stats():
+        return {"simulated": 0, "avoided": 0, "predictions": [], "fitness": []}
+
+    def _log_surrogate_stats(self):
+        stats = self._surrogate_stats
+        predictions = np.array(stats.pop("predictions"))
+        fitness = np.array(stats.pop("fitness"))
+        stats["generation"] = self.ga.generations_completed
+        stats["samples"] = len(self._surrogate)
+        stats["mae"] = stats["correlation"] = ""
+        if len(fitness) > 0:
+            stats["mae"] = np.mean(np.abs(predictions - fitness))
+        if len(fitness) > 1 and np.std(predictions) * np.std(fitness) > 0:
+            stats["correlation"] = np.corrcoef(predictions, fitness)[0, 1]
+
+        logger.info(
+            "Generation {}: {} simulations avoided by the surrogate, "
+            "{} simulated".format(
+                stats["generation"], stats["avoided"], stats["simulated"]
             )
         )
+        self._dm.save_log_file(
+            "surrogate.csv",
+            [
+                "generation",
+                "samples",
+                "simulated",
+                "avoided",
+                "mae",
+                "correlation",
+            ],
+            stats,
+        )
+        self._surrogate_stats = self._empty_surrogate_stats()
 
-        self._simulation.reset()
-        while not self._simulation.is_over():
-            for forces in forces_list:
-                if self._simulation.is_over():
-                    break
-                self._simulation.step(forces)
+    def _fitness_threshold(self):
+        """Fitness of the `bound_rank`-th best of the last generation"""
+        last_fitness = self.ga.last_generation_fitness
+        if self._bound_rank <= 0 or last_fitness is None:
+            return None
+        # The bound of a rollout in one environment says nothing about the
+        # fitness combined over all of them
+        if self._environments:
+            return None
+        if len(last_fitness) == 0:
+            return None
 
-        fitness = self._simulation.reward
-        fitness_props = self._simulation.reward_props
+        rank = min(self._bound_rank, len(last_fitness))
+        return float(np.sort(last_fitness)[-rank])
 
-        logger.debug("Creature fitness: {}".format(fitness))
-        self.progress_gens.refresh()
-        self.progress_sims.update(1)
+    def _simulation_seconds(self, rung: int = None):
+        """
+        Simulated seconds of a simulation at the fidelity of `rung`, at the
+            resolution of the full simulation
+        """
+        if rung is None:
+            return self._sim_kwargs["duration"]
 
-        # Add entry in csv log
-        headers = ["generation", "specimen_id", "total_fitness"] + list(
-            fitness_props.keys()
+        fidelity = dict(self._fidelities[rung])
+        return fidelity["duration"] * (
+            self._sim_kwargs["timestep"] / fidelity["timestep"]
         )
-        data = copy.copy(fitness_props)
-        data["generation"] = self.ga.generations_completed
-        data["specimen_id"] = solution_idx
-        data["total_fitness"] = fitness
-        self._dm.save_log_file("results.csv", headers, data)
 
-        return fitness
+    def _successive_halving(self, genomes):
+        """
+        Scores the genomes at each low fidelity and promotes the best 1/eta
+            of them to the next one. Only the promoted genomes are simulated
+            at full fidelity, which gives their fitness.
+
+        The fitness of the other genomes is only used to rank them: they are
+            placed below the genomes that went further, in the order of
+            their last score.
+        """
+        self._fidelity_stats["evaluations"] += len(genomes)
+
+        candidates = np.arange(len(genomes))
+        eliminated = []
+        for rung in range(len(self._fidelities)):
+            if len(candidates) <= 1:
+                break
+
+            scores = list(self._simulate(genomes[candidates], rung))
+            self._fidelity_stats["simulated_seconds"] += len(
+                candidates
+            ) * self._simulation_seconds(rung)
+            order = np.argsort([fitness for fitness, _, _ in scores])
+            promoted = max(1, len(candidates) // self._halving_eta)
+            eliminated.append(
+                (
+                    rung,
+                    [(candidates[i], scores[i][1]) for i in order[:-promoted]],
+                )
+            )
+            candidates = candidates[order[-promoted:]]
+
+        self._fidelity_stats["simulated_seconds"] += (
+            len(candidates) * self._simulation_seconds()
+        )
+        results = [None] * len(genomes)
+        for idx, result in zip(
+            candidates, self._simulate(genomes[candidates])
+        ):
+            results[idx] = result
+
+        # The fitness of the eliminated genomes depends on the full
+        # fitnesses, the results are thus yielded once all of them are known
+        floor = min(fitness for fitness, _, _ in filter(None, results))
+        for rung, genomes_props in eliminated:
+            for position, (idx, props) in enumerate(genomes_props):
+                fitness = (
+                    floor
+                    - (len(self._fidelities) - rung)
+                    + position / len(genomes_props)
+                )
+                results[idx] = (fitness, {**props, "fidelity": rung}, False)
+
+        yield from results
+
+    def _log_fidelity_stats(self):
+        stats = self._fidelity_stats
+        full_seconds = stats["evaluations"] * self._sim_kwargs["duration"]
+        stats["generation"] = self.ga.generations_completed
+        stats["saved_seconds"] = full_seconds - stats["simulated_seconds"]
+        logger.info(
+            "Generation {}: {:.1f} simulation seconds saved by the successive "
+            "halving".format(stats["generation"], stats["saved_seconds"])
+        )
+        self._dm.save_log_file(
+            "fidelity.csv",
+            [
+                "generation",
+                "evaluations",
+                "simulated_seconds",
+                "saved_seconds",
+            ],
+            stats,
+        )
+        self._fidelity_stats = {"evaluations": 0, "simulated_seconds": 0}
+
+    @staticmethod
+    def _empty_early_stopping_stats():
+        stats = {"simulations": 0, "stopped": 0, "time_cut": 0}
+        stats.update(dict.fromkeys(early_stopping_rules, 0))
+        return stats
+
+    def _count_early_stopping(self, fitness_props: dict):
+        stats = self._early_stopping_stats
+        stats["simulations"] += 1
+        stop_rule = fitness_props.get("early_stop", None)
+        if stop_rule is not None:
+            stats["stopped"] += 1
+            stats["time_cut"] += fitness_props["time_cut"]
+            stats[early_stopping_rules[stop_rule]] += fitness_props["time_cut"]
+
+    def _log_early_stopping_stats(self):
+        stats = self._early_stopping_stats
+        stats["generation"] = self.ga.generations_completed
+        logger.info(
+            "Generation {}: {} of {} simulations stopped early, "
+            "{:.1f} simulated seconds cut".format(
+                stats["generation"],
+                stats["stopped"],
+                stats["simulations"],
+                stats["time_cut"],
+            )
+        )
+        self._dm.save_log_file(
+            "early_stopping.csv",
+            ["generation", "simulations", "stopped", "time_cut"]
+            + early_stopping_rules,
+            stats,
+        )
+        self._early_stopping_stats = self._empty_early_stopping_stats()
+
+    @staticmethod
+    def _resumed(fitness_props: dict):
+        """
+        Whether the rollout resumed from a snapshot: its contacts were
+        detected again, so that its fitness can slightly differ from that of
+        a full rollout, and it is neither cached nor archived
+        """
+        return fitness_props.get("snapshot_steps", 0) > 0
+
+    @staticmethod
+    def _empty_snapshot_stats():
+        return {"simulations": 0, "hits": 0, "saved_steps": 0}
+
+    def _count_snapshots(self, fitness_props: dict):
+        stats = self._snapshot_stats
+        steps = fitness_props.get("snapshot_steps", 0)
+        stats["simulations"] += 1
+        stats["hits"] += steps > 0
+        stats["saved_steps"] += steps
+
+    def _log_snapshot_stats(self):
+        stats = self._snapshot_stats
+        stats["generation"] = self.ga.generations_completed
+        stats["hit_rate"] = stats["hits"] / max(1, stats["simulations"])
+        stats["saved_seconds"] = stats["saved_steps"] * (
+            self._sim_kwargs["timestep"] * self._sim_kwargs["substeps"]
+        )
+        logger.info(
+            "Generation {}: {} of {} simulations resumed from a snapshot, "
+            "{} steps saved".format(
+                stats["generation"],
+                stats["hits"],
+                stats["simulations"],
+                stats["saved_steps"],
+            )
+        )
+        self._dm.save_log_file(
+            "snapshots.csv",
+            [
+                "generation",
+                "simulations",
+                "hits",
+                "hit_rate",
+                "saved_steps",
+                "saved_seconds",
+            ],
+            stats,
+        )
+        self._snapshot_stats = self._empty_snapshot_stats()
+
+    def _rank(self, individuals, results, offspring: bool):
+        """
+        Returns the front and the crowded fitness of each individual, from
+            the objectives in the props of their `results`. Every individual
+            is added to the Pareto archive.
+        """
+        objectives = np.array(
+            [
+                [props[name] for name in self._objectives]
+                for _, props in results
+            ],
+            dtype=float,
+        ).reshape(len(results), len(self._objectives))
+
+        ranked = objectives
+        if offspring and self._last_objectives is not None:
+            ranked = np.concatenate([objectives, self._last_objectives])
+        ranks = non_dominated_sort(ranked)
+        scores = crowded_fitness(ranks, crowding_distance(ranked, ranks))
+
+        if not offspring:
+            self._last_objectives = objectives
+            self._last_fitness = np.array([fitness for fitness, _ in results])
+        self._pareto.update(
+            np.asarray(individuals, dtype=float),
+            objectives,
+            [fitness for fitness, _ in results],
+        )
+        return ranks[: len(results)], scores[: len(results)]
+
+    def _log_pareto_stats(self):
+        front = 0
+        if self._last_objectives is not None:
+            front = np.sum(non_dominated_sort(self._last_objectives) == 0)
+        logger.info(
+            "Generation {}: {} individuals on the front, {} in the archive".format(
+                self.ga.generations_completed, front, len(self._pareto)
+            )
+        )
+        self._dm.save_log_file(
+            "pareto.csv",
+            ["generation", "front", "archive"],
+            {
+                "generation": self.ga.generations_completed,
+                "front": front,
+                "archive": len(self._pareto),
+            },
+        )
+
+    def _save_pareto_front(self):
+        """
+        Keeps the Pareto archive in the sim data and in the logs. The best
+            solution is the member of the front with the best fitness, the
+            fitness of pygad being only a rank within a population.
+        """
+        if not len(self._pareto):
+            return
+
+        best = int(np.argmax(self._pareto.fitness))
+        self.sim_data["best_solution"] = self._pareto.genomes[best]
+        self.sim_data["best_fitness"] = self._pareto.fitness[best]
+
+        front = []
+        for member, (solution, objectives, fitness) in enumerate(
+            zip(*self._pareto.entries())
+        ):
+            objectives = dict(zip(self._objectives, objectives))
+            front.append(
+                {
+                    "solution": solution,
+                    "objectives": objectives,
+                    "fitness": fitness,
+                }
+            )
+            self._dm.save_log_file(
+                "pareto_front.csv",
+                ["member", "fitness", *self._objectives],
+                {"member": member, "fitness": fitness, **objectives},
+            )
+        self.sim_data["pareto_front"] = front
 
     # save & load
     def save(self):
@@ -186,13 +1127,84 @@ class GeneticAlgorithm:
         try:
             best_sim_date = self._dm.load_global_dat_file("best_sim.dat")
             best_sim_data = DataManager(
-                self._dm_group, best_sim_date, False
+                self._dm_group, best_sim_date
             ).load_local_dat_file("sim_data.dat")
             if best_sim_data["best_fitness"] < self.sim_data["best_fitness"]:
                 self._dm.save_global_dat_file("best_sim.dat", self._dm.date)
         except (EOFError, FileNotFoundError):
             self._dm.save_global_dat_file("best_sim.dat", self._dm.date)
 
+    def save_checkpoint(self):
+        """
+        Saves everything needed to resume the training from the current
+            generation: the state of the GA, of the random generators and the
+            content of the fitness cache.
+        """
+        checkpoint = {
+            "kwargs": self._checkpoint_kwargs,
+            "ga": {
+                name: getattr(self.ga, name)
+                for name in self._checkpoint_attributes
+            },
+            "numpy_random_state": np.random.get_state(),
+            "random_state": random.getstate(),
+            "cache": self._cache.entries(),
+            "surrogate": (
+                self._surrogate.entries() if self._surrogate else None
+            ),
+            "pareto": self._pareto.entries(),
+            "last_objectives": self._last_objectives,
+        }
+        self._dm.save_checkpoint(self._checkpoint_filename, checkpoint)
+
+    def _restore_checkpoint(self, checkpoint: dict):
+        for name, value in checkpoint["ga"].items():
+            setattr(self.ga, name, value)
+        self.ga.known_fitness = self.ga.last_generation_fitness
+
+        # pygad runs `num_generations` more generations when resuming
+        generations_completed = self.ga.generations_completed
+        self.ga.num_generations = max(
+            0, self._config["num_generations"] - generations_completed
+        )
+        self.progress_gens.update(generations_completed)
+
+        np.random.set_state(checkpoint["numpy_random_state"])
+        random.setstate(checkpoint["random_state"])
+        self._cache.restore(checkpoint["cache"])
+        if self._surrogate is not None:
+            self._surrogate.restore(checkpoint.get("surrogate") or [])
+        self._pareto.restore(checkpoint.get("pareto"))
+        self._last_objectives = checkpoint.get("last_objectives")
+
+        logger.info(f"Resuming from generation {generations_completed}")
+
+    @classmethod
+    def resume(
+        cls,
+        date: str,
+        visualize: bool = False,
+        workers: int = 1,
+        cache_size: int = 10000,
+        persistent_cache: bool = False,
+        checkpoint_every: int = 1,
+    ):
+        """Loads the last checkpoint of a training to continue it"""
+        dm = DataManager(cls._dm_group, date)
+        checkpoint = dm.load_checkpoint(cls._checkpoint_filename)
+
+        model = cls(
+            **checkpoint["kwargs"],
+            visualize=visualize,
+            workers=workers,
+            cache_size=cache_size,
+            persistent_cache=persistent_cache,
+            checkpoint_every=checkpoint_every,
+            date=date,
+        )
+        model._restore_checkpoint(checkpoint)
+        return model
+
     @classmethod
     def load(
         cls,
@@ -200,35 +1212,76 @@ class GeneticAlgorithm:
         visualize: bool = False,
         timestep: float = 1e-2,
         ending_delay: int = 0,
+        front_member: int = None,
     ):
-        dm = DataManager(cls._dm_group, date, False)
+        """
+        Loads the best solution of a training, or the `front_member`-th
+            member of its Pareto front when it had objectives.
+
+        The solution is simulated with the duration and the timestep of its
+            training, `timestep` is only used for the trainings which did not
+            save theirs.
+        """
+        dm = DataManager(cls._dm_group, date)
         if date is None:
             best_sim_date = dm.load_global_dat_file("last_sim.dat")
-            dm = DataManager(cls._dm_group, best_sim_date, False)
+            dm = DataManager(cls._dm_group, best_sim_date)
 
         sim_data = dm.load_local_dat_file("sim_data.dat")
+        solution = sim_data["best_solution"]
+        if front_member is not None:
+            front = sim_data.get("pareto_front") or []
+            if not 0 <= front_member < len(front):
+                raise RuntimeError(
+                    f"Front member `{front_member}` is invalid, the Pareto front has {len(front)} members"
+                )
+            solution = front[front_member]["solution"]
+            logger.info(
+                "Objectives of the front member: {}".format(
+                    front[front_member]["objectives"]
+                )
+            )
+
         return GeneticAlgorithm(
             config=sim_data["config"],
             env_props=sim_data["env"],
             creature=sim_data["creature"],
+            fitness=sim_data.get("fitness", "walking-v0"),
             visualize=visualize,
+            duration=sim_data.get("duration", 5),
             ending_delay=ending_delay,
-            timestep=timestep,
-            best_solution=sim_data["best_solution"],
+            timestep=sim_data.get("timestep", timestep),
+            best_solution=solution,
+            substeps=sim_data.get("substeps", 1),
+            controller=sim_data.get("controller", "open-loop"),
         )
 
     # train & visualize
     def train(self):
-        self.ga.run()
+        self._pool = self._new_pool()
+        try:
+            self.ga.run()
+        except BaseException:
+            self._pool.close(terminate=True)
+            raise
+        else:
+            self._pool.close()
+        finally:
+            self._pool = None
+            self._cache.close()
         self._simulation.close()
 
-        best_solution, best_fitness, _ = self.ga.best_solution()
+        best_solution, best_fitness, _ = self.ga.best_solution(
+            pop_fitness=self.ga.last_generation_fitness
+        )
         self.sim_data["best_fitness"] = best_fitness
         self.sim_data["best_solution"] = best_solution
         self.sim_data["solutions"] = self.ga.solutions
+        if self._objectives:
+            self._save_pareto_front()
 
-        logger.error("Best genome: {}".format(best_solution))
-        logger.error("Best fitness: {}".format(best_fitness))
+        logger.error("Best genome: {}".format(self.sim_data["best_solution"]))
+        logger.error("Best fitness: {}".format(self.sim_data["best_fitness"]))
 
         self.progress_gens.close()
         if self.progress_sims is not None:
@@ -237,19 +1290,35 @@ class GeneticAlgorithm:
     def visualize(self):
         logger.info("Visualizing solution")
 
-        forces_list = np.array(self.sim_data["best_solution"]).reshape(
-            (
-                self.sim_data["config"].timesteps,
-                self._simulation.creature_shape,
-            )
-        )
+        forces_list = self._controller.decode(self.sim_data["best_solution"])
 
-        self._simulation.reset()
         while not self._simulation.is_closed():
-            for forces in forces_list:
-                if self._simulation.is_over():
-                    break
-                self._simulation.step(forces)
+            self._simulation.rollout(forces_list)
+
+    def playback(self, speed: float = 1, loop: bool = False, delay: float = 0):
+        """
+        Simulates the best solution once without rendering, then plays its
+        trajectory back (see `ChronoPlayback`)
+        """
+        logger.info("Playing solution back")
+
+        forces_list = self._controller.decode(self.sim_data["best_solution"])
+        simulation = GA_Simulation(
+            **{
+                **self._sim_kwargs,
+                "snapshot_cache_size": 0,
+                "record_trajectory": True,
+            }
+        )
+        fitness, props = simulation.evaluate(forces_list)
+        simulation.close()
+        logger.info(f"Fitness of the solution: {fitness}")
 
-            if self._simulation.is_over():
-                self._simulation.reset()
+        ChronoPlayback(
+            self._env_props,
+            self._sim_kwargs["creature"],
+            props["trajectory"],
+            speed=speed,
+            loop=loop,
+            delay=delay,
+        ).run()
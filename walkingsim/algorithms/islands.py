@@ -0,0 +1,322 @@
+import multiprocessing as mp
+import os
+import queue
+import random
+
+import numpy as np
+import tqdm
+from loguru import logger
+
+from walkingsim.algorithms.ga import GeneticAlgorithm
+from walkingsim.utils.data_manager import DataManager
+from walkingsim.utils.pygad_config import PygadConfig
+
+topologies = ["ring", "random"]
+
+
+def _destinations(topology: str, islands: int, epoch: int, seed: int):
+    """
+    Returns the island to which each island sends its migrants.
+
+    With the random topology, a new ring is drawn at each migration, from a
+    seed shared by all the islands so that they agree on it.
+    """
+    if topology == "ring":
+        order = np.arange(islands)
+    else:
+        order = np.random.default_rng((seed, epoch)).permutation(islands)
+
+    destinations = np.empty(islands, dtype=int)
+    destinations[order] = np.roll(order, -1)
+    return destinations
+
+
+class _Island(GeneticAlgorithm):
+    """
+    Genetic algorithm evolving one of the sub-populations of an island
+    model, in its own process.
+    """
+
+    def __init__(
+        self,
+        island: int,
+        inboxes: list,
+        events,
+        migration_interval: int,
+        migrants: int,
+        topology: str,
+        seed: int,
+        **kwargs,
+    ):
+        super().__init__(**kwargs, checkpoint_every=0, progress=False)
+        self._island = island
+        self._inboxes = inboxes
+        self._events = events
+        self._migration_interval = migration_interval
+        self._migrants = migrants
+        self._topology = topology
+        self._seed = seed
+
+    def _on_generation(self, ga_instance):
+        super()._on_generation(ga_instance)
+
+        generation = self.ga.generations_completed
+        fitness = self.ga.last_generation_fitness
+        self._events.put(
+            (
+                "generation",
+                self._island,
+                generation,
+                float(np.max(fitness)),
+                float(np.mean(fitness)),
+            )
+        )
+
+        if (
+            self._migration_interval > 0
+            and self._migrants > 0
+            and generation % self._migration_interval == 0
+            and generation < self.ga.num_generations
+        ):
+            self._migrate(generation)
+
+    def _migrate(self, generation: int):
+        population = self.ga.population
+        fitness = self.ga.last_generation_fitness
+        destination = _destinations(
+            self._topology,
+            len(self._inboxes),
+            generation // self._migration_interval,
+            self._seed,
+        )[self._island]
+
+        best = np.argsort(fitness)[::-1][: self._migrants]
+        self._inboxes[destination].put(
+            (self._island, population[best].copy(), fitness[best].copy())
+        )
+
+        # Every island sends and receives exactly one group of migrants per
+        # migration, which keeps the islands in step.
+        source, migrants, migrants_fitness = self._inboxes[self._island].get()
+
+        # The migrants replace the worst individuals, along with their
+        # fitness which is already known
+        worst = np.argsort(fitness)[: len(migrants)]
+        population[worst] = migrants
+        fitness[worst] = migrants_fitness
+
+        self._events.put(
+            (
+                "migration",
+                generation,
+                source,
+                self._island,
+                len(migrants),
+                float(np.max(migrants_fitness)),
+            )
+        )
+
+
+def _run_island(
+    island: int,
+    seed: int,
+    inboxes: list,
+    events,
+    island_kwargs: dict,
+):
+    np.random.seed((seed + island) % 2**32)
+    random.seed(seed + island)
+
+    model = _Island(
+        island=island,
+        inboxes=inboxes,
+        events=events,
+        seed=seed,
+        **island_kwargs,
+    )
+    model.train()
+    events.put(
+        (
+            "done",
+            island,
+            model.sim_data["best_solution"],
+            model.sim_data["best_fitness"],
+        )
+    )
+
+
+class IslandModel(GeneticAlgorithm):
+    """
+    Island model: `islands` sub-populations of `config.population_size`
+        individuals evolve in separate processes, each with its own
+        simulation, and send their `migrants` best individuals to another
+        island every `migration_interval` generations.
+
+    topology: ring | random
+
+    The other keyword arguments are passed to the `GeneticAlgorithm` of each
+        island, which is trained with the same options as a single
+        population. The logs of each island are stored in the `island-<n>`
+        sub-directories of the run, and the best individual of all the
+        islands is saved in `sim_data`, so that it can be visualized like any
+        GA model.
+    """
+
+    def __init__(
+        self,
+        config: PygadConfig,
+        env_props: dict,
+        creature: str = "quadrupede",
+        fitness: str = "walking-v0",
+        duration: int = 5,
+        timestep: float = 1e-2,
+        substeps: int = 1,
+        controller: str = "open-loop",
+        islands: int = 4,
+        migration_interval: int = 5,
+        migrants: int = 2,
+        topology: str = "ring",
+        date: str = None,
+        **kwargs,
+    ):
+        if topology not in topologies:
+            raise RuntimeError(
+                f"Topology `{topology}` is invalid, possible values are `{topologies}`"
+            )
+
+        self._dm = DataManager(self._dm_group, date)
+        self._config = config._asdict()
+        self._islands = islands
+        self._island_kwargs = {
+            "config": config,
+            "env_props": env_props,
+            "creature": creature,
+            "fitness": fitness,
+            "duration": duration,
+            "timestep": timestep,
+            "substeps": substeps,
+            "controller": controller,
+            **kwargs,
+            "migration_interval": migration_interval,
+            "migrants": migrants,
+            "topology": topology,
+        }
+
+        self.sim_data = {
+            "config": config,
+            "best_fitness": 0,
+            "best_solution": None,
+            "solutions": None,
+            "creature": creature,
+            "env": env_props,
+            "duration": duration,
+            "timestep": timestep,
+            "substeps": substeps,
+            "controller": controller,
+            "fitness": fitness,
+            "islands": islands,
+            "topology": topology,
+            "islands_best_fitness": None,
+        }
+
+    def _handle_event(self, event, progress, results: dict):
+        kind = event[0]
+        if kind == "generation":
+            _, island, generation, best_fitness, mean_fitness = event
+            self._dm.save_log_file(
+                "islands.csv",
+                ["generation", "island", "best_fitness", "mean_fitness"],
+                {
+                    "generation": generation,
+                    "island": island,
+                    "best_fitness": best_fitness,
+                    "mean_fitness": mean_fitness,
+                },
+            )
+            progress.update(1)
+        elif kind == "migration":
+            _, generation, source, destination, migrants, best = event
+            logger.info(
+                f"Generation {generation}: {migrants} migrants "
+                f"from island {source} to island {destination}"
+            )
+            self._dm.save_log_file(
+                "migrations.csv",
+                [
+                    "generation",
+                    "source",
+                    "destination",
+                    "migrants",
+                    "best_migrant_fitness",
+                ],
+                {
+                    "generation": generation,
+                    "source": source,
+                    "destination": destination,
+                    "migrants": migrants,
+                    "best_migrant_fitness": best,
+                },
+            )
+        elif kind == "done":
+            _, island, best_solution, best_fitness = event
+            results[island] = (best_solution, best_fitness)
+
+    def train(self):
+        context = mp.get_context("spawn")
+        inboxes = [context.Queue() for _ in range(self._islands)]
+        events = context.Queue()
+        seed = random.randrange(2**32)
+
+        processes = []
+        for island in range(self._islands):
+            island_kwargs = {
+                **self._island_kwargs,
+                "date": os.path.join(self._dm.date, f"island-{island}"),
+            }
+            processes.append(
+                context.Process(
+                    target=_run_island,
+                    args=(island, seed, inboxes, events, island_kwargs),
+                )
+            )
+
+        progress = tqdm.tqdm(
+            total=self._islands * self._config["num_generations"],
+            desc="Generations (all islands)",
+            leave=False,
+        )
+
+        results = {}
+        try:
+            for process in processes:
+                process.start()
+
+            while len(results) < self._islands:
+                try:
+                    event = events.get(timeout=1)
+                except queue.Empty:
+                    if any(p.exitcode not in (None, 0) for p in processes):
+                        raise RuntimeError("An island stopped unexpectedly")
+                    continue
+
+                self._handle_event(event, progress, results)
+        except BaseException:
+            for process in processes:
+                process.terminate()
+            raise
+        finally:
+            for process in processes:
+                if process.pid is not None:
+                    process.join()
+            progress.close()
+
+        islands_best_fitness = [results[i][1] for i in range(self._islands)]
+        best_island = int(np.argmax(islands_best_fitness))
+        best_solution, best_fitness = results[best_island]
+        self.sim_data["best_fitness"] = best_fitness
+        self.sim_data["best_solution"] = best_solution
+        self.sim_data["islands_best_fitness"] = islands_best_fitness
+
+        logger.error("Best island: {}".format(best_island))
+        logger.error("Best genome: {}".format(best_solution))
+        logger.error("Best fitness: {}".format(best_fitness))
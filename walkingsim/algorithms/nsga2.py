@@ -0,0 +1,160 @@
+"""
+Non-dominated sorting and crowding distance of NSGA-II, computed with
+operations on the whole population at once.
+
+All the objectives are maximized.
+"""
+import numpy as np
+
+
+def dominance_matrix(objectives):
+    """
+    Returns the matrix whose element (i, j) tells if individual i dominates
+        individual j: at least as good on every objective, and better on one
+    """
+    objectives = np.asarray(objectives, dtype=float)
+    better_or_equal = np.all(
+        objectives[:, np.newaxis] >= objectives[np.newaxis], axis=2
+    )
+    better = np.any(objectives[:, np.newaxis] > objectives[np.newaxis], axis=2)
+    return better_or_equal & better
+
+
+def non_dominated_sort(objectives):
+    """
+    Returns the rank of the front of each individual, 0 being the Pareto
+        front of the population
+    """
+    dominates = dominance_matrix(objectives)
+    dominated_by = dominates.sum(axis=0)
+    ranks = np.full(len(dominates), -1)
+    rank = 0
+    front = dominated_by == 0
+    while front.any():
+        ranks[front] = rank
+        # The individuals of the front no longer dominate the others
+        dominated_by -= dominates[front].sum(axis=0)
+        dominated_by[ranks >= 0] = -1
+        front = dominated_by == 0
+        rank += 1
+    return ranks
+
+
+def crowding_distance(objectives, ranks):
+    """
+    Returns the crowding distance of each individual within its front: the
+        sum over the objectives of the normalized distance between its two
+        neighbours. The extremes of each front have an infinite distance.
+    """
+    objectives = np.asarray(objectives, dtype=float)
+    ranks = np.asarray(ranks)
+    n, m = objectives.shape
+    distance = np.zeros(n)
+    if n == 0:
+        return distance
+
+    for k in range(m):
+        # Sorted by front, then by objective within each front
+        order = np.lexsort((objectives[:, k], ranks))
+        values = objectives[order, k]
+        fronts = ranks[order]
+
+        starts = np.flatnonzero(np.r_[True, fronts[1:] != fronts[:-1]])
+        ends = np.r_[starts[1:], n] - 1
+        group = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, n]))
+        span = values[ends[group]] - values[starts[group]]
+
+        contribution = np.zeros(n)
+        interior = np.ones(n, dtype=bool)
+        interior[starts] = interior[ends] = False
+        gaps = np.zeros(n)
+        gaps[1:-1] = values[2:] - values[:-2]
+        valid = interior & (span > 0)
+        contribution[valid] = gaps[valid] / span[valid]
+        contribution[~interior] = np.inf
+        distance[order] += contribution
+    return distance
+
+
+def crowded_fitness(ranks, crowding):
+    """
+    Returns a scalar fitness which sorts the individuals like the crowded
+        comparison of NSGA-II: by front first, then by crowding distance
+    """
+    crowding = np.asarray(crowding, dtype=float)
+    # c / (1 + c) is in [0, 1], halved so that the fronts never overlap
+    share = 1 - 1 / (1 + crowding)
+    return -np.asarray(ranks, dtype=float) + 0.5 * share
+
+
+class ParetoArchive:
+    """
+    Non-dominated individuals among all those evaluated so far.
+
+    When it holds more than `max_size` individuals, the most crowded ones
+    are dropped first, keeping the extremes of the front.
+    """
+
+    def __init__(self, max_size: int = 100) -> None:
+        self._max_size = max_size
+        self._genomes = None
+        self._objectives = None
+        self._fitness = None
+
+    def __len__(self):
+        return 0 if self._genomes is None else len(self._genomes)
+
+    @property
+    def genomes(self):
+        return self._genomes
+
+    @property
+    def objectives(self):
+        return self._objectives
+
+    @property
+    def fitness(self):
+        return self._fitness
+
+    def update(self, genomes, objectives, fitness):
+        """Adds the non-dominated individuals among `genomes`"""
+        genomes = np.asarray(genomes, dtype=float)
+        objectives = np.asarray(objectives, dtype=float)
+        fitness = np.asarray(fitness, dtype=float)
+        if self._genomes is not None:
+            genomes = np.concatenate([self._genomes, genomes])
+            objectives = np.concatenate([self._objectives, objectives])
+            fitness = np.concatenate([self._fitness, fitness])
+
+        # The same genome can be evaluated several times
+        _, unique = np.unique(genomes, axis=0, return_index=True)
+        genomes = genomes[unique]
+        objectives = objectives[unique]
+        fitness = fitness[unique]
+
+        front = non_dominated_sort(objectives) == 0
+        genomes = genomes[front]
+        objectives = objectives[front]
+        fitness = fitness[front]
+
+        if len(genomes) > self._max_size:
+            crowding = crowding_distance(objectives, np.zeros(len(genomes)))
+            kept = np.sort(
+                np.argsort(-crowding, kind="stable")[: self._max_size]
+            )
+            genomes = genomes[kept]
+            objectives = objectives[kept]
+            fitness = fitness[kept]
+
+        self._genomes = genomes
+        self._objectives = objectives
+        self._fitness = fitness
+
+    def entries(self):
+        if self._genomes is None:
+            return None
+        return self._genomes, self._objectives, self._fitness
+
+    def restore(self, entries):
+        if entries is not None:
+            self._genomes, self._objectives, self._fitness = entries
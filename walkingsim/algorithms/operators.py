@@ -0,0 +1,125 @@
+"""
+Crossover and mutation operators working on the whole offspring at once.
+
+They follow the semantics of pygad's operators (pairing of the parents,
+position of the crossover points, number of mutated genes, values drawn
+from the gene space), but replace its loops over the offspring and the
+genes by operations on 2-D arrays. The mutated values are drawn directly
+on the grid of the gene space, for all the mutated genes in one pass.
+
+The random numbers come from numpy's global generator, like pygad's, so
+that the checkpoints restore them.
+"""
+import math
+
+import numpy as np
+
+
+def _pairs(parents, offspring_size):
+    """Returns the two parents of each offspring, as pygad pairs them"""
+    k = np.arange(offspring_size[0])
+    return parents[k % len(parents)], parents[(k + 1) % len(parents)]
+
+
+def uniform_crossover(parents, offspring_size):
+    """Each gene comes from either parent, with the same probability"""
+    first, second = _pairs(parents, offspring_size)
+    from_second = np.random.randint(0, 2, size=offspring_size).astype(bool)
+    return np.where(from_second, second, first)
+
+
+def single_point_crossover(parents, offspring_size):
+    """The genes after a random point come from the second parent"""
+    first, second = _pairs(parents, offspring_size)
+    point = np.random.randint(0, offspring_size[1], size=offspring_size[0])
+    from_second = np.arange(offspring_size[1]) >= point[:, np.newaxis]
+    return np.where(from_second, second, first)
+
+
+def two_points_crossover(parents, offspring_size):
+    """
+    The genes between two points, half of the genome apart, come from the
+    second parent
+    """
+    first, second = _pairs(parents, offspring_size)
+    genes = offspring_size[1]
+    if genes == 1:
+        start = np.zeros(offspring_size[0], dtype=int)
+    else:
+        start = np.random.randint(
+            0, math.ceil(genes / 2 + 1), size=offspring_size[0]
+        )
+    end = start + int(genes / 2)
+    genes_idx = np.arange(genes)
+    from_second = (genes_idx >= start[:, np.newaxis]) & (
+        genes_idx < end[:, np.newaxis]
+    )
+    return np.where(from_second, second, first)
+
+
+crossovers = {
+    "uniform": uniform_crossover,
+    "single_point": single_point_crossover,
+    "two_points": two_points_crossover,
+}
+
+
+def mutation_mask(shape, num_genes=None, probability=None):
+    """
+    Returns the mask of the genes to mutate: either `num_genes` distinct
+        genes, or each gene with `probability`, both being given per row.
+    """
+    rows, genes = shape
+    keys = np.random.random(shape)
+    if probability is not None:
+        return keys <= np.asarray(probability)[:, np.newaxis]
+
+    # The `num_genes` smallest keys of each row, the rows being grouped by
+    # number of mutated genes (there are at most two with the adaptive
+    # mutation)
+    num_genes = np.minimum(np.asarray(num_genes, dtype=int), genes)
+    mask = np.zeros(shape, dtype=bool)
+    for count in np.unique(num_genes):
+        if count == 0:
+            continue
+        group = np.flatnonzero(num_genes == count)
+        if count == genes:
+            mask[group] = True
+            continue
+        selected = np.argpartition(keys[group], count - 1, axis=1)[:, :count]
+        mask[group[:, np.newaxis], selected] = True
+    return mask
+
+
+def mutate(
+    offspring,
+    mask,
+    gene_space: dict = None,
+    min_val: float = -1,
+    max_val: float = 1,
+    by_replacement: bool = False,
+):
+    """
+    Gives a random value to the genes of `mask`, in place.
+
+    With a gene space, the values are drawn from it (on its grid when it has
+        a step). Otherwise a random value in [min_val, max_val] is added to
+        the genes, or replaces them if `by_replacement`.
+    """
+    count = np.count_nonzero(mask)
+    if gene_space is None:
+        values = np.random.uniform(min_val, max_val, size=count)
+        if not by_replacement:
+            values += offspring[mask]
+    elif "step" in gene_space:
+        grid = np.arange(
+            gene_space["low"], gene_space["high"], gene_space["step"]
+        )
+        values = grid[np.random.randint(0, len(grid), size=count)]
+    else:
+        values = np.random.uniform(
+            gene_space["low"], gene_space["high"], size=count
+        )
+
+    offspring[mask] = values
+    return offspring
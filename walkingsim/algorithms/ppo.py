@@ -1,13 +1,13 @@
 import gymnasium as gym
 import numpy
 from gymnasium.envs.registration import EnvSpec
+from loguru import logger
 from stable_baselines3 import PPO
 
+from walkingsim.envs.chrono import ChronoPlayback
 from walkingsim.utils.baselines_config import BaselinesConfig
 from walkingsim.utils.data_manager import DataManager
 
-# logger
-from loguru import logger
 
 class PPO_Algo:
     logger.info("PPO Algorithm")
@@ -23,12 +23,15 @@ class PPO_Algo:
         timestep: float = 1e-2,
         duration: int = 5,
         model: PPO = None,
+        substeps: int = 1,
+        record_poses: bool = False,
     ) -> None:
         logger.debug("PPO_Algo.__init__")
         self._dm = DataManager(self._dm_group)
         self._config = config
         self._env_props = env_props
         self._creature = creature
+        self._substeps = substeps
 
         self._spec = EnvSpec(
             "gym_simulation-v0",
@@ -44,6 +47,8 @@ class PPO_Algo:
             fitness=fitness,
             timestep=timestep,
             duration=duration,
+            substeps=substeps,
+            record_poses=record_poses,
         )
         if model is None:
             self._model = PPO("MultiInputPolicy", self._env, verbose=1)
@@ -59,13 +64,20 @@ class PPO_Algo:
                 "config": self._config,
                 "props": self._env_props,
                 "creature": self._creature,
+                "substeps": self._substeps,
             },
         )
         self._model.save(self._dm.get_local_path("model"))
 
     @classmethod
-    def load(cls, date: str, visualize: bool = False, timestep: float = 1e-2):
-        dm = DataManager(cls._dm_group, date, fail_if_exists=False)
+    def load(
+        cls,
+        date: str,
+        visualize: bool = False,
+        timestep: float = 1e-2,
+        record_poses: bool = False,
+    ):
+        dm = DataManager(cls._dm_group, date)
         params = dm.load_local_dat_file("params.dat")
         model = PPO.load(dm.get_local_path("model"))
         return PPO_Algo(
@@ -75,6 +87,8 @@ class PPO_Algo:
             visualize=visualize,
             timestep=timestep,
             model=model,
+            substeps=params.get("substeps", 1),
+            record_poses=record_poses,
         )
 
     # train & visualize
@@ -90,3 +104,27 @@ class PPO_Algo:
             action, _state = self._model.predict(obs, deterministic=True)
             action = numpy.clip(action, -1, 1)
             obs, reward, done, info = vec_env.step(action)
+
+    def playback(self, speed: float = 1, loop: bool = False, delay: float = 0):
+        """
+        Runs the policy for one episode without rendering, then plays its
+        trajectory back (see `ChronoPlayback`). The model must be loaded
+        with `record_poses`.
+        """
+        obs, _ = self._env.reset()
+        done = False
+        while not done:
+            action, _state = self._model.predict(obs, deterministic=True)
+            action = numpy.clip(action, -1, 1)
+            obs, reward, terminated, truncated, info = self._env.step(action)
+            done = terminated or truncated
+        logger.info(f"Reward of the episode: {reward}")
+
+        ChronoPlayback(
+            self._env_props,
+            self._creature,
+            self._env.unwrapped.trajectory.as_dict(),
+            speed=speed,
+            loop=loop,
+            delay=delay,
+        ).run()
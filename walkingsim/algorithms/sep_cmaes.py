@@ -0,0 +1,172 @@
+import math
+
+import numpy as np
+
+restart_strategies = ["none", "ipop", "bipop"]
+
+
+class SepCMAES:
+    """
+    Separable CMA-ES (Ros & Hansen, 2008): the covariance matrix is kept
+    diagonal, so that sampling and updating cost O(n) per individual and the
+    strategy stays tractable for genomes with thousands of genes.
+
+    The fitness is maximized, and the samples are kept within `bounds` by
+    clipping them before they are evaluated.
+    """
+
+    def __init__(
+        self,
+        mean,
+        sigma: float,
+        popsize: int = None,
+        bounds: tuple = (-1, 1),
+    ) -> None:
+        n = len(mean)
+        self.n = n
+        self.popsize = popsize or 4 + int(3 * math.log(n))
+        if self.popsize < 2:
+            # The mean is recombined from the best half of the population
+            raise RuntimeError(
+                f"Population size `{self.popsize}` is invalid, CMA-ES needs at least 2 individuals"
+            )
+        self.bounds = bounds
+
+        # Selection and recombination
+        mu = self.popsize // 2
+        weights = math.log((self.popsize + 1) / 2) - np.log(
+            np.arange(1, mu + 1)
+        )
+        self.weights = weights / weights.sum()
+        self.mueff = 1 / np.sum(self.weights**2)
+
+        # Step-size control
+        self.cs = (self.mueff + 2) / (n + self.mueff + 5)
+        self.ds = (
+            1 + 2 * max(0, math.sqrt((self.mueff - 1) / (n + 1)) - 1) + self.cs
+        )
+        self.chin = math.sqrt(n) * (1 - 1 / (4 * n) + 1 / (21 * n**2))
+
+        # Covariance adaptation, with the learning rates of the separable
+        # variant which are (n + 2) / 3 times larger
+        self.cc = (4 + self.mueff / n) / (n + 4 + 2 * self.mueff / n)
+        c1 = 2 / ((n + 1.3) ** 2 + self.mueff)
+        cmu = (
+            2 * (self.mueff - 2 + 1 / self.mueff) / ((n + 2) ** 2 + self.mueff)
+        )
+        self.c1 = min(1, c1 * (n + 2) / 3)
+        self.cmu = min(1 - self.c1, cmu * (n + 2) / 3)
+
+        self.mean = np.array(mean, dtype=float)
+        self.sigma = sigma
+        self.C = np.ones(n)
+        self.ps = np.zeros(n)
+        self.pc = np.zeros(n)
+        self.generation = 0
+        self._best_history = []
+        self._samples = None
+
+    def ask(self):
+        """Returns `popsize` new solutions, as an array of shape (popsize, n)"""
+        z = np.random.standard_normal((self.popsize, self.n))
+        samples = self.mean + self.sigma * z * np.sqrt(self.C)
+        self._samples = np.clip(samples, *self.bounds)
+        return self._samples.copy()
+
+    def tell(self, fitness):
+        """Updates the distribution with the fitness of the last solutions"""
+        fitness = np.asarray(fitness, dtype=float)
+        order = np.argsort(fitness)[::-1][: len(self.weights)]
+        self.generation += 1
+        self._best_history.append(fitness[order[0]])
+
+        # Steps of the selected (clipped) solutions
+        y = (self._samples[order] - self.mean) / self.sigma
+        y_w = self.weights @ y
+        self.mean = self.mean + self.sigma * y_w
+
+        self.ps = (1 - self.cs) * self.ps + math.sqrt(
+            self.cs * (2 - self.cs) * self.mueff
+        ) * y_w / np.sqrt(self.C)
+        ps_norm = np.linalg.norm(self.ps)
+        hs = (
+            ps_norm / math.sqrt(1 - (1 - self.cs) ** (2 * self.generation))
+            < (1.4 + 2 / (self.n + 1)) * self.chin
+        )
+
+        self.pc = (1 - self.cc) * self.pc + hs * math.sqrt(
+            self.cc * (2 - self.cc) * self.mueff
+        ) * y_w
+        self.C = (
+            (1 - self.c1 - self.cmu) * self.C
+            + self.c1
+            * (self.pc**2 + (1 - hs) * self.cc * (2 - self.cc) * self.C)
+            + self.cmu * (self.weights @ y**2)
+        )
+        self.sigma *= math.exp(
+            min(1, (self.cs / self.ds) * (ps_norm / self.chin - 1))
+        )
+
+    def should_stop(self, tolx: float = 1e-8, tolfun: float = 1e-9):
+        """
+        Whether the strategy converged or got stuck and should be restarted
+        """
+        history = 10 + math.ceil(30 * self.n / self.popsize)
+        recent = self._best_history[-history:]
+        return (
+            self.sigma * np.sqrt(self.C.max()) < tolx
+            or self.C.max() > 1e14 * self.C.min()
+            or (len(recent) >= history and max(recent) - min(recent) < tolfun)
+        )
+
+
+class Restarts:
+    """
+    Restarts of CMA-ES, with a first strategy of `popsize` individuals and a
+        step-size of `sigma`.
+
+    strategy: none | ipop | bipop
+        - ipop: the strategy is restarted with a population twice as large
+            each time it converges
+        - bipop: alternates between the restarts with large populations and
+            restarts with small populations and small step-sizes, giving
+            both regimes the same budget of evaluations
+    """
+
+    def __init__(self, strategy: str, popsize: int, sigma: float) -> None:
+        self.strategy = strategy
+        self.popsize0 = popsize
+        self.sigma0 = sigma
+        self.large_popsize = popsize
+        self.regime = "large"
+        self.evaluations = {"large": 0, "small": 0}
+        self.count = 0
+
+    def record(self, evaluations: int):
+        """Counts the evaluations of the current strategy"""
+        self.evaluations[self.regime] += evaluations
+
+    def next(self, popsize: int):
+        """
+        Returns the population size and the step-size of the strategy which
+            replaces a converged strategy of `popsize` individuals
+        """
+        self.count += 1
+        if self.strategy == "ipop":
+            self.regime = "large"
+            return 2 * popsize, self.sigma0
+
+        # BIPOP: the regime which used the less evaluations goes next
+        if self.evaluations["large"] <= self.evaluations["small"]:
+            self.regime = "large"
+            self.large_popsize *= 2
+            return self.large_popsize, self.sigma0
+
+        self.regime = "small"
+        u = np.random.uniform()
+        popsize = int(
+            self.popsize0
+            * (0.5 * self.large_popsize / self.popsize0) ** (u**2)
+        )
+        sigma = self.sigma0 * 10 ** (-2 * np.random.uniform())
+        return max(2, popsize), sigma
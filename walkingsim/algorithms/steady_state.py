@@ -0,0 +1,209 @@
+import queue
+
+import numpy as np
+from loguru import logger
+
+from walkingsim.algorithms.ga import GeneticAlgorithm, _PopulationGA
+from walkingsim.simulation.base import early_stopping_rules
+
+
+class _SteadyStateOperators(_PopulationGA):
+    """
+    pygad.GA only used for its selection, crossover and mutation operators.
+
+    The adaptive mutation needs the fitness of the offspring before they are
+    mutated: instead of simulating them, the mean fitness of their parents
+    is used.
+    """
+
+    offspring_fitness = None
+
+    def adaptive_mutation_population_fitness(self, offspring):
+        average_fitness = np.mean(self.last_generation_fitness)
+        return average_fitness, np.full(len(offspring), self.offspring_fitness)
+
+
+class SteadyStateGA(GeneticAlgorithm):
+    """
+    Asynchronous steady-state genetic algorithm: there is no generation
+        barrier, the workers are kept busy at all times.
+
+    Each result is inserted in the population as soon as it arrives, in place
+        of the worst individual if it is better, and a new individual is bred
+        right away from the population with the selection, crossover and
+        mutation settings of the config.
+
+    The initial population is evaluated first, then `num_generations`
+        times `population_size` new individuals, each block of
+        `population_size` evaluations being logged as a generation.
+    """
+
+    _ga_cls = _SteadyStateOperators
+
+    def __init__(self, *args, **kwargs):
+        # There is no generational state to checkpoint
+        kwargs["checkpoint_every"] = 0
+        super().__init__(*args, **kwargs)
+        size = self.ga.sol_per_pop
+        self._population = np.empty((size, self._controller.num_genes))
+        self._fitness = np.empty(size)
+        self._size = 0
+        self._evaluations = 0
+
+    def _breed(self):
+        """Returns a new individual bred from the current population"""
+        ga = self.ga
+        ga.population = self._population[: self._size]
+        ga.last_generation_fitness = self._fitness[: self._size]
+
+        if callable(ga.parent_selection_type):
+            parents, parents_idx = ga.select_parents(
+                ga.last_generation_fitness, 2, ga
+            )
+        else:
+            parents, parents_idx = ga.select_parents(
+                ga.last_generation_fitness, num_parents=2
+            )
+
+        offspring_size = (1, self._controller.num_genes)
+        if ga.crossover_type is None:
+            offspring = parents[:1].copy()
+        elif callable(ga.crossover_type):
+            offspring = ga.crossover(parents, offspring_size, ga)
+        else:
+            offspring = ga.crossover(parents, offspring_size=offspring_size)
+
+        ga.offspring_fitness = np.mean(ga.last_generation_fitness[parents_idx])
+        if ga.mutation_type is None:
+            pass
+        elif callable(ga.mutation_type):
+            offspring = ga.mutation(offspring, ga)
+        else:
+            offspring = ga.mutation(offspring)
+
+        return offspring[0]
+
+    def _insert(self, individual, fitness: float):
+        if self._size < len(self._population):
+            idx = self._size
+            self._size += 1
+        else:
+            idx = np.argmin(self._fitness)
+            if fitness < self._fitness[idx]:
+                return
+
+        self._population[idx] = individual
+        self._fitness[idx] = fitness
+
+    def _on_result(self, individual, fitness: float, fitness_props: dict):
+        population_size = len(self._population)
+        generation = self._evaluations // population_size
+        self._insert(individual, fitness)
+        self._results.append(
+            {
+                "generation": generation,
+                "specimen_id": self._evaluations,
+                "total_fitness": fitness,
+                **fitness_props,
+            }
+        )
+        self._evaluations += 1
+        self.progress_sims.update(1)
+
+        # Every `population_size` evaluations make a generation, the first
+        # ones being the evaluation of the initial population
+        if self._evaluations % population_size == 0 and generation > 0:
+            self.ga.generations_completed = generation
+            self.ga.population = self._population[: self._size]
+            self.ga.last_generation_fitness = self._fitness[: self._size]
+            self._on_generation(self.ga)
+            self.progress_sims.reset(population_size)
+            self.progress_sims.set_description(
+                f"({self.ga.generations_completed}) Steady-state"
+            )
+
+    def train(self):
+        population_size = len(self._population)
+        budget = population_size * (self.ga.num_generations + 1)
+        initial_population = list(self.ga.population)
+        self.ga.generations_completed = 0
+        self.progress_sims.reset(population_size)
+
+        results = queue.Queue()
+        self._pool = self._new_pool()
+        submitted = 0
+        in_flight = 0
+        try:
+            while self._evaluations < budget:
+                # Keep every worker busy
+                while in_flight < self._pool.workers and submitted < budget:
+                    if initial_population:
+                        individual = initial_population.pop()
+                    elif self._size > 0:
+                        individual = self._breed()
+                    else:
+                        break
+
+                    key = self._cache.key(individual)
+                    cached = self._cache.get(key)
+                    if cached is not None:
+                        results.put((individual, None, cached, None))
+                    else:
+                        self._pool.submit(
+                            self._controller.decode(individual),
+                            lambda r, i=individual, k=key: results.put(
+                                (i, k, r, None)
+                            ),
+                            lambda e: results.put((None, None, None, e)),
+                            fitness_threshold=self._fitness_threshold(),
+                        )
+                    submitted += 1
+                    in_flight += 1
+
+                individual, key, result, error = results.get()
+                in_flight -= 1
+                if error is not None:
+                    raise error
+
+                fitness, fitness_props = result
+                trajectory = fitness_props.pop("trajectory", None)
+                self._count_early_stopping(fitness_props)
+                self._count_snapshots(fitness_props)
+                # The results in the cache have a key of None
+                stop_rule = fitness_props.get("early_stop", None)
+                bound_rule = early_stopping_rules.index("bound")
+                if (
+                    key is not None
+                    and stop_rule != bound_rule
+                    and not self._resumed(fitness_props)
+                ):
+                    self._cache.put(key, fitness, fitness_props)
+                    if self._trajectories is not None:
+                        self._trajectories.append(
+                            self._evaluations // len(self._population),
+                            self._evaluations,
+                            fitness,
+                            trajectory,
+                        )
+                self._on_result(individual, fitness, fitness_props)
+        except BaseException:
+            self._pool.close(terminate=True)
+            raise
+        else:
+            self._pool.close()
+        finally:
+            self._pool = None
+            self._cache.close()
+        self._simulation.close()
+
+        best_idx = int(np.argmax(self._fitness[: self._size]))
+        best_solution = self._population[best_idx].copy()
+        best_fitness = self._fitness[best_idx]
+        self.sim_data["best_fitness"] = best_fitness
+        self.sim_data["best_solution"] = best_solution
+
+        logger.error("Best genome: {}".format(best_solution))
+        logger.error("Best fitness: {}".format(best_fitness))
+
+        self.progress_gens.close()
+        self.progress_sims.close()
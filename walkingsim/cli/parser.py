@@ -1,9 +1,13 @@
 from argparse import ArgumentDefaultsHelpFormatter, ArgumentParser, Namespace
 
-from walkingsim.cli.train import train_ga, train_ppo
-from walkingsim.cli.vis import visualize_ga, visualize_ppo
+from walkingsim.cli.results import rescore_results, show_results
+from walkingsim.cli.train import resume_ga, train_cmaes, train_ga, train_ppo
+from walkingsim.cli.vis import visualize_cmaes, visualize_ga, visualize_ppo
+from walkingsim.controllers import controllers
 from walkingsim.fitness import fitnesses
 from walkingsim.loader import EnvironmentProps
+from walkingsim.simulation.environments import aggregations
+from walkingsim.utils.trajectory_archive import retention_policies
 
 
 class WalkingSimArgumentParser:
@@ -12,8 +16,11 @@ class WalkingSimArgumentParser:
             prog="walkingsim", formatter_class=ArgumentDefaultsHelpFormatter
         )
         self.ns = Namespace()
-        self.available_algorithms = ["ga", "ppo"]
+        self.available_algorithms = ["ga", "cmaes", "ppo"]
+        self.available_restarts = ["none", "ipop", "bipop"]
         self.available_fitnesses = list(fitnesses.keys())
+        self.available_controllers = list(controllers.keys())
+        self.available_topologies = ["ring", "random"]
         self.env_loader = EnvironmentProps("./environments")
 
         self.commands = self.parser.add_subparsers(
@@ -21,6 +28,8 @@ class WalkingSimArgumentParser:
         )
         self.setup_train_parser()
         self.setup_vis_parser()
+        self.setup_results_parser()
+        self.setup_rescore_parser()
         self.setup_env_parser()
 
     # Setup Parser
@@ -50,6 +59,16 @@ class WalkingSimArgumentParser:
             choices=self.available_fitnesses,
             help="The fitness function to use",
         )
+        general_options.add_argument(
+            "--extra-targets",
+            dest="extra_targets",
+            nargs="+",
+            default=None,
+            choices=self.available_fitnesses,
+            metavar="TARGET",
+            help="Other fitness functions scored on the same simulations and "
+            "logged in the results (GA and CMA-ES only)",
+        )
         general_options.add_argument(
             "--environment",
             "-e",
@@ -72,6 +91,13 @@ class WalkingSimArgumentParser:
             type=float,
             help="The duration of a timestep",
         )
+        general_options.add_argument(
+            "--substeps",
+            dest="substeps",
+            default=1,
+            type=int,
+            help="Number of timesteps during which each action is held",
+        )
         general_options.add_argument(
             "--duration",
             "-d",
@@ -117,6 +143,285 @@ class WalkingSimArgumentParser:
             default=500,
             help="Number of timesteps per cycle",
         )
+        ga_algo_options.add_argument(
+            "--controller",
+            dest="controller",
+            default="open-loop",
+            choices=self.available_controllers,
+            help="How the genomes are decoded into the actions of the motors",
+        )
+        ga_algo_options.add_argument(
+            "--workers",
+            "-w",
+            dest="workers",
+            type=int,
+            default=1,
+            help="Number of processes evaluating the population in parallel",
+        )
+        ga_algo_options.add_argument(
+            "--cache-size",
+            dest="cache_size",
+            type=int,
+            default=10000,
+            help="Number of fitnesses kept in memory to avoid simulating "
+            "the same individual twice (0 to disable)",
+        )
+        ga_algo_options.add_argument(
+            "--persistent-cache",
+            action="store_true",
+            dest="persistent_cache",
+            help="Share the fitness cache between runs by storing it on disk",
+        )
+        ga_algo_options.add_argument(
+            "--checkpoint-every",
+            dest="checkpoint_every",
+            type=int,
+            default=1,
+            help="Number of generations between two checkpoints "
+            "(0 to disable)",
+        )
+        ga_algo_options.add_argument(
+            "--resume",
+            dest="resume",
+            metavar="DATE",
+            help="Resume the training of DATE from its last checkpoint",
+        )
+        ga_algo_options.add_argument(
+            "--steady-state",
+            action="store_true",
+            dest="steady_state",
+            help="Replace the individuals one at a time as soon as they are "
+            "evaluated, instead of generation by generation",
+        )
+        ga_algo_options.add_argument(
+            "--vectorized-operators",
+            action="store_true",
+            dest="vectorized_operators",
+            help="Apply the crossover and the mutation to the whole offspring "
+            "at once, instead of with pygad's operators",
+        )
+        ga_algo_options.add_argument(
+            "--islands",
+            dest="islands",
+            type=int,
+            default=1,
+            help="Number of sub-populations evolving in separate processes",
+        )
+        ga_algo_options.add_argument(
+            "--migration-interval",
+            dest="migration_interval",
+            type=int,
+            default=5,
+            help="Number of generations between two migrations",
+        )
+        ga_algo_options.add_argument(
+            "--migrants",
+            dest="migrants",
+            type=int,
+            default=2,
+            help="Number of individuals sent by each island at a migration",
+        )
+        ga_algo_options.add_argument(
+            "--topology",
+            dest="topology",
+            default="ring",
+            choices=self.available_topologies,
+            help="To which island the migrants are sent",
+        )
+        ga_algo_options.add_argument(
+            "--halving-rungs",
+            dest="halving_rungs",
+            type=int,
+            default=0,
+            help="Number of shorter simulations used to select the "
+            "individuals simulated over the whole duration (0 to disable)",
+        )
+        ga_algo_options.add_argument(
+            "--halving-eta",
+            dest="halving_eta",
+            type=int,
+            default=2,
+            help="Only 1/eta of the individuals are promoted to the next "
+            "rung, which is eta times longer",
+        )
+        ga_algo_options.add_argument(
+            "--halving-coarsening",
+            dest="halving_coarsening",
+            type=float,
+            default=1,
+            help="Factor by which the timestep grows at each lower rung",
+        )
+        ga_algo_options.add_argument(
+            "--stagnation-window",
+            dest="stagnation_window",
+            type=float,
+            default=0,
+            help="Stop a simulation when the creature did not move forward "
+            "during this many seconds (0 to disable)",
+        )
+        ga_algo_options.add_argument(
+            "--stagnation-distance",
+            dest="stagnation_distance",
+            type=float,
+            default=0.05,
+            help="Distance under which the creature is considered as not "
+            "moving forward",
+        )
+        ga_algo_options.add_argument(
+            "--max-tilt",
+            dest="max_tilt",
+            type=float,
+            default=0,
+            help="Stop a simulation when the trunk is tilted by more than "
+            "this many degrees (0 to disable)",
+        )
+        ga_algo_options.add_argument(
+            "--bound-rank",
+            dest="bound_rank",
+            type=int,
+            default=0,
+            help="Stop a simulation when it can no longer beat the k-th best "
+            "individual of the last generation (0 to disable)",
+        )
+        ga_algo_options.add_argument(
+            "--surrogate-keep",
+            dest="surrogate_keep",
+            type=float,
+            default=0,
+            help="Fraction of the new individuals simulated once the "
+            "surrogate model is trained, the others get a predicted fitness "
+            "(0 to disable)",
+        )
+        ga_algo_options.add_argument(
+            "--surrogate-kappa",
+            dest="surrogate_kappa",
+            type=float,
+            default=1,
+            help="Weight of the uncertainty of the surrogate when choosing "
+            "the individuals to simulate",
+        )
+        ga_algo_options.add_argument(
+            "--snapshot-cache",
+            dest="snapshot_cache_size",
+            type=float,
+            default=0,
+            help="Memory (in MB) of each worker for the snapshots of the "
+            "rollouts, from which the rollouts starting with the same actions "
+            "are resumed (0 to disable)",
+        )
+        ga_algo_options.add_argument(
+            "--save-trajectories",
+            action="store_true",
+            dest="save_trajectories",
+            help="Archive the trajectories of the evaluated individuals, to "
+            "score them again with the rescore command",
+        )
+        ga_algo_options.add_argument(
+            "--trajectory-retention",
+            dest="trajectory_retention",
+            default="all",
+            choices=retention_policies,
+            help="Trajectories archived at each generation: all of them, the "
+            "--trajectory-top best ones, or those of the elites",
+        )
+        ga_algo_options.add_argument(
+            "--trajectory-top",
+            dest="trajectory_top",
+            type=int,
+            default=10,
+            help="Number of trajectories archived at each generation with "
+            "the top retention",
+        )
+        ga_algo_options.add_argument(
+            "--snapshot-interval",
+            dest="snapshot_interval",
+            type=float,
+            default=0.5,
+            help="Simulated seconds between two snapshots of a rollout",
+        )
+        ga_algo_options.add_argument(
+            "--objectives",
+            dest="objectives",
+            nargs="+",
+            default=None,
+            metavar="PROP",
+            help="Props of the fitness maximized as separate objectives with "
+            "NSGA-II, e.g. speed forces (GA only)",
+        )
+
+        # CMA-ES Options
+        cmaes_algo_options = train_parser.add_argument_group("CMA-ES Options")
+        cmaes_algo_options.add_argument(
+            "--restarts",
+            dest="restarts",
+            default="ipop",
+            choices=self.available_restarts,
+            help="How CMA-ES is restarted once it converged",
+        )
+
+        # Environments Options
+        env_options = train_parser.add_argument_group("Environments Options")
+        env_options.add_argument(
+            "--environments",
+            dest="environments",
+            nargs="+",
+            default=None,
+            metavar="ENVIRONMENT",
+            help="Evaluate each genome in all these environments instead of "
+            "--environment (GA and CMA-ES only)",
+        )
+        env_options.add_argument(
+            "--aggregation",
+            dest="aggregation",
+            default="mean",
+            choices=aggregations,
+            help="How the fitness in each environment is combined: mean, "
+            "worst, or mean of the worst --cvar-alpha fraction",
+        )
+        env_options.add_argument(
+            "--cvar-alpha",
+            dest="cvar_alpha",
+            type=float,
+            default=0.25,
+            help="Fraction of the worst environments averaged by the cvar "
+            "aggregation",
+        )
+        env_options.add_argument(
+            "--env-samples",
+            dest="env_samples",
+            type=int,
+            default=0,
+            help="Number of randomly perturbed variants of each environment "
+            "(0 to use the environments as is)",
+        )
+        env_options.add_argument(
+            "--friction-noise",
+            dest="friction_noise",
+            type=float,
+            default=0,
+            help="Relative perturbation of the friction of the ground",
+        )
+        env_options.add_argument(
+            "--gravity-noise",
+            dest="gravity_noise",
+            type=float,
+            default=0,
+            help="Relative perturbation of the gravity",
+        )
+        env_options.add_argument(
+            "--mass-noise",
+            dest="mass_noise",
+            type=float,
+            default=0,
+            help="Relative perturbation of the masses of the creature",
+        )
+        env_options.add_argument(
+            "--env-seed",
+            dest="env_seed",
+            type=int,
+            default=0,
+            help="Seed of the perturbations, drawn once for the whole training",
+        )
 
         # RL Algorithm Options
         rl_algo_options = train_parser.add_argument_group(
@@ -157,7 +462,8 @@ class WalkingSimArgumentParser:
             dest="timestep",
             default=1e-2,
             type=float,
-            help="The duration of a timestep",
+            help="The duration of a timestep, for the PPO models and the "
+            "GA and CMA-ES models which did not save the one of their training",
         )
         general_options.add_argument(
             "--delay",
@@ -168,6 +474,109 @@ class WalkingSimArgumentParser:
             help=" Amount of seconds to wait when simulation is done",
         )
 
+        # Playback Options
+        playback_options = vis_parser.add_argument_group("Playback Options")
+        playback_options.add_argument(
+            "--playback",
+            "-p",
+            action="store_true",
+            dest="playback",
+            help="Simulate the solution once, then play its recorded "
+            "trajectory back without simulating it",
+        )
+        playback_options.add_argument(
+            "--trajectory",
+            dest="trajectory",
+            type=int,
+            default=None,
+            help="Play back this trajectory of the archive of the run (see "
+            "the rescore command) instead of the solution",
+        )
+        playback_options.add_argument(
+            "--speed",
+            dest="speed",
+            type=float,
+            default=1,
+            help="Speed of the playback",
+        )
+        playback_options.add_argument(
+            "--loop",
+            action="store_true",
+            dest="loop",
+            help="Play the trajectory back in a loop",
+        )
+        playback_options.add_argument(
+            "--front-member",
+            dest="front_member",
+            type=int,
+            default=None,
+            help="Visualize this member of the Pareto front of a training "
+            "with objectives instead of the best solution",
+        )
+
+    def setup_results_parser(self):
+        results_parser = self.commands.add_parser(
+            "results",
+            help="Show the statistics of each generation of a trained model",
+            aliases=["r"],
+            formatter_class=ArgumentDefaultsHelpFormatter,
+        )
+        results_parser.set_defaults(command="results")
+
+        results_parser.add_argument(
+            "date", nargs="?", help="The date of when the model was trained"
+        )
+        results_parser.add_argument(
+            "--algorithm",
+            "-a",
+            dest="algorithm",
+            default="ga",
+            choices=["ga", "cmaes"],
+            help="The algorithm used to train the model",
+        )
+        results_parser.add_argument(
+            "--csv",
+            action="store_true",
+            dest="csv",
+            help="Export all the results in the results.csv log file",
+        )
+
+    def setup_rescore_parser(self):
+        rescore_parser = self.commands.add_parser(
+            "rescore",
+            help="Rank the archived trajectories of a trained model with "
+            "another fitness function, without simulating them",
+            formatter_class=ArgumentDefaultsHelpFormatter,
+        )
+        rescore_parser.set_defaults(command="rescore")
+
+        rescore_parser.add_argument(
+            "date", nargs="?", help="The date of when the model was trained"
+        )
+        rescore_parser.add_argument(
+            "--target",
+            "-t",
+            dest="target",
+            required=True,
+            choices=self.available_fitnesses,
+            help="The fitness function used to score the trajectories",
+        )
+        rescore_parser.add_argument(
+            "--algorithm",
+            "-a",
+            dest="algorithm",
+            default="ga",
+            choices=["ga", "cmaes"],
+            help="The algorithm used to train the model",
+        )
+        rescore_parser.add_argument(
+            "--top",
+            dest="top",
+            type=int,
+            default=10,
+            help="Number of trajectories shown",
+        )
+
     def setup_env_parser(self):
         env_parser = self.commands.add_parser(
             "env",
@@ -186,7 +595,27 @@ class WalkingSimArgumentParser:
 
     # Handle Commands
     def handle_train(self):
-        if self.ns.algorithm == "ga":
+        if self.ns.resume is not None and (
+            self.ns.algorithm != "ga"
+            or self.ns.islands > 1
+            or self.ns.steady_state
+        ):
+            # They save no checkpoint
+            self.parser.error(
+                "--resume is only available with the GA algorithm, without "
+                "--islands and --steady-state"
+            )
+
+        if self.ns.algorithm == "ga" and self.ns.resume is not None:
+            resume_ga(
+                date=self.ns.resume,
+                visualize=self.ns.render,
+                workers=self.ns.workers,
+                cache_size=self.ns.cache_size,
+                persistent_cache=self.ns.persistent_cache,
+                checkpoint_every=self.ns.checkpoint_every,
+            )
+        elif self.ns.algorithm == "ga":
             if self.ns.generations is None or self.ns.population is None:
                 self.parser.error(
                     "When using GA algorithm, you must pass --generations and --population"
@@ -195,12 +624,96 @@ class WalkingSimArgumentParser:
             train_ga(
                 creature=self.ns.creature,
                 env=self.ns.env,
+                fitness=self.ns.target,
+                extra_fitnesses=self.ns.extra_targets,
                 visualize=self.ns.render,
                 timestep=self.ns.timestep,
+                substeps=self.ns.substeps,
                 duration=self.ns.duration,
                 timesteps=self.ns.cycle_timesteps,
+                controller=self.ns.controller,
                 population_size=self.ns.population,
                 num_generations=self.ns.generations,
+                workers=self.ns.workers,
+                cache_size=self.ns.cache_size,
+                persistent_cache=self.ns.persistent_cache,
+                checkpoint_every=self.ns.checkpoint_every,
+                islands=self.ns.islands,
+                migration_interval=self.ns.migration_interval,
+                migrants=self.ns.migrants,
+                topology=self.ns.topology,
+                halving_rungs=self.ns.halving_rungs,
+                halving_eta=self.ns.halving_eta,
+                halving_coarsening=self.ns.halving_coarsening,
+                stagnation_window=self.ns.stagnation_window,
+                stagnation_distance=self.ns.stagnation_distance,
+                max_tilt=self.ns.max_tilt,
+                bound_rank=self.ns.bound_rank,
+                surrogate_keep=self.ns.surrogate_keep,
+                surrogate_kappa=self.ns.surrogate_kappa,
+                snapshot_cache_size=self.ns.snapshot_cache_size,
+                snapshot_interval=self.ns.snapshot_interval,
+                save_trajectories=self.ns.save_trajectories,
+                trajectory_retention=self.ns.trajectory_retention,
+                trajectory_top=self.ns.trajectory_top,
+                steady_state=self.ns.steady_state,
+                vectorized_operators=self.ns.vectorized_operators,
+                objectives=self.ns.objectives,
+                environments=self.ns.environments,
+                aggregation=self.ns.aggregation,
+                cvar_alpha=self.ns.cvar_alpha,
+                env_samples=self.ns.env_samples,
+                friction_noise=self.ns.friction_noise,
+                gravity_noise=self.ns.gravity_noise,
+                mass_noise=self.ns.mass_noise,
+                env_seed=self.ns.env_seed,
+            )
+        elif self.ns.algorithm == "cmaes":
+            if self.ns.generations is None or self.ns.population is None:
+                self.parser.error(
+                    "When using CMA-ES algorithm, you must pass --generations and --population"
+                )
+
+            train_cmaes(
+                creature=self.ns.creature,
+                env=self.ns.env,
+                fitness=self.ns.target,
+                extra_fitnesses=self.ns.extra_targets,
+                visualize=self.ns.render,
+                timestep=self.ns.timestep,
+                substeps=self.ns.substeps,
+                duration=self.ns.duration,
+                timesteps=self.ns.cycle_timesteps,
+                controller=self.ns.controller,
+                population_size=self.ns.population,
+                num_generations=self.ns.generations,
+                restarts=self.ns.restarts,
+                workers=self.ns.workers,
+                cache_size=self.ns.cache_size,
+                persistent_cache=self.ns.persistent_cache,
+                halving_rungs=self.ns.halving_rungs,
+                halving_eta=self.ns.halving_eta,
+                halving_coarsening=self.ns.halving_coarsening,
+                stagnation_window=self.ns.stagnation_window,
+                stagnation_distance=self.ns.stagnation_distance,
+                max_tilt=self.ns.max_tilt,
+                bound_rank=self.ns.bound_rank,
+                surrogate_keep=self.ns.surrogate_keep,
+                surrogate_kappa=self.ns.surrogate_kappa,
+                snapshot_cache_size=self.ns.snapshot_cache_size,
+                snapshot_interval=self.ns.snapshot_interval,
+                save_trajectories=self.ns.save_trajectories,
+                trajectory_retention=self.ns.trajectory_retention,
+                trajectory_top=self.ns.trajectory_top,
+                objectives=self.ns.objectives,
+                environments=self.ns.environments,
+                aggregation=self.ns.aggregation,
+                cvar_alpha=self.ns.cvar_alpha,
+                env_samples=self.ns.env_samples,
+                friction_noise=self.ns.friction_noise,
+                gravity_noise=self.ns.gravity_noise,
+                mass_noise=self.ns.mass_noise,
+                env_seed=self.ns.env_seed,
             )
         elif self.ns.algorithm == "ppo":
             if self.ns.timesteps is None:
@@ -211,9 +724,11 @@ class WalkingSimArgumentParser:
             train_ppo(
                 creature=self.ns.creature,
                 env=self.ns.env,
+                fitness=self.ns.target,
                 visualize=self.ns.render,
                 duration=self.ns.duration,
                 timestep=self.ns.timestep,
+                substeps=self.ns.substeps,
                 timesteps=self.ns.timesteps,
             )
 
@@ -223,14 +738,45 @@ class WalkingSimArgumentParser:
                 date=self.ns.date,
                 timestep=self.ns.timestep,
                 delay=self.ns.delay,
+                playback=self.ns.playback,
+                speed=self.ns.speed,
+                loop=self.ns.loop,
+                trajectory=self.ns.trajectory,
+                front_member=self.ns.front_member,
+            )
+        elif self.ns.algorithm == "cmaes":
+            visualize_cmaes(
+                date=self.ns.date,
+                timestep=self.ns.timestep,
+                delay=self.ns.delay,
+                playback=self.ns.playback,
+                speed=self.ns.speed,
+                loop=self.ns.loop,
+                trajectory=self.ns.trajectory,
             )
         elif self.ns.algorithm == "ppo":
             visualize_ppo(
                 date=self.ns.date,
                 timestep=self.ns.timestep,
                 delay=self.ns.delay,
+                playback=self.ns.playback,
+                speed=self.ns.speed,
+                loop=self.ns.loop,
             )
 
+    def handle_results(self):
+        show_results(
+            date=self.ns.date, algorithm=self.ns.algorithm, csv=self.ns.csv
+        )
+
+    def handle_rescore(self):
+        rescore_results(
+            date=self.ns.date,
+            algorithm=self.ns.algorithm,
+            target=self.ns.target,
+            top=self.ns.top,
+        )
+
     def handle_env(self):
         if self.ns.env_command == "list":
             envs = self.env_loader.list()
@@ -241,15 +787,25 @@ class WalkingSimArgumentParser:
     def run(self):
         self.parser.parse_args(namespace=self.ns)
         if self.ns.command == "train":
+            # The perturbed variants are drawn from --environment when no
+            # environments are given
+            names = self.ns.environments or []
+            if not names and self.ns.env_samples > 0:
+                names = [self.ns.environment]
             try:
                 self.ns.env = self.env_loader.load(self.ns.environment)
-            except FileNotFoundError:
-                self.parser.error(
-                    f"Invalid environment '{self.ns.environment}'"
-                )
+                self.ns.environments = [
+                    (name, self.env_loader.load(name)) for name in names
+                ]
+            except FileNotFoundError as e:
+                self.parser.error(f"Invalid environment: {e.filename}")
 
             self.handle_train()
         elif self.ns.command == "visualize":
             self.handle_visualize()
+        elif self.ns.command == "results":
+            self.handle_results()
+        elif self.ns.command == "rescore":
+            self.handle_rescore()
         elif self.ns.command == "env":
             self.handle_env()
@@ -0,0 +1,63 @@
+def show_results(
+    *, date: str = None, algorithm: str = "ga", csv: bool = False
+):
+    from walkingsim.utils.data_manager import DataManager
+    from walkingsim.utils.results_log import (
+        export_csv,
+        generation_stats,
+        load_results,
+    )
+
+    # The runs are stored in a directory named after their algorithm
+    dm = DataManager(algorithm, date)
+    if date is None:
+        last_sim_date = dm.load_global_dat_file("last_sim.dat")
+        dm = DataManager(algorithm, last_sim_date)
+
+    stats = generation_stats(load_results(dm))
+    print(
+        f"{'generation':>10} {'count':>6} {'min':>10} {'max':>10} "
+        f"{'mean':>10} {'std':>10}"
+    )
+    for generation, count, min_, max_, mean, std in zip(*stats.values()):
+        print(
+            f"{generation:>10} {count:>6} {min_:>10.4f} {max_:>10.4f} "
+            f"{mean:>10.4f} {std:>10.4f}"
+        )
+
+    if csv:
+        print(f"Results exported to {export_csv(dm)}")
+
+
+def rescore_results(
+    *, date: str = None, algorithm: str = "ga", target: str, top: int = 10
+):
+    import csv
+
+    from walkingsim.utils.data_manager import DataManager
+    from walkingsim.utils.trajectory_archive import rescore
+
+    dm = DataManager(algorithm, date)
+    if date is None:
+        last_sim_date = dm.load_global_dat_file("last_sim.dat")
+        dm = DataManager(algorithm, last_sim_date)
+
+    scores = rescore(dm, target)
+    print(
+        f"{'rank':>5} {'trajectory':>10} {'generation':>10} {'specimen':>8} "
+        f"{'fitness':>12} {target:>12}"
+    )
+    rows = list(zip(*scores.values()))
+    for rank, row in enumerate(rows[:top], 1):
+        trajectory, generation, specimen_id, fitness, new_fitness = row
+        print(
+            f"{rank:>5} {trajectory:>10} {generation:>10} {specimen_id:>8} "
+            f"{fitness:>12.4f} {new_fitness:>12.4f}"
+        )
+
+    path = dm.get_log_path(f"rescore-{target}.csv")
+    with open(path, "w", newline="") as fp:
+        writer = csv.writer(fp)
+        writer.writerow(scores.keys())
+        writer.writerows(rows)
+    print(f"{len(rows)} trajectories scored again, exported to {path}")
@@ -1,15 +1,78 @@
+import math
+
+from loguru import logger
+
+
+def _bound_rank(bound_rank: int, fitness: str, duration, timestep):
+    """
+    Returns `bound_rank`, or 0 when the fitness function has no upper bound
+    to stop the simulations with
+    """
+    from walkingsim.fitness import fitnesses
+
+    fitness_cls = fitnesses.get(fitness, None)
+    if bound_rank > 0 and fitness_cls is not None:
+        if math.isinf(fitness_cls(duration, timestep).upper_bound(0)):
+            logger.warning(
+                f"The bound early stopping is not available with `{fitness}`, "
+                "which has no upper bound, it will not be used"
+            )
+            return 0
+    return bound_rank
+
+
 def train_ga(
     *,
     creature: str,
     env: dict,
+    fitness: str = "walking-v0",
+    extra_fitnesses: list = None,
     visualize: bool = False,
     duration: int = 5,
     timestep: float = 1e-2,
+    substeps: int = 1,
     timesteps: int = 500,
+    controller: str = "open-loop",
     population_size: int,
     num_generations: int,
+    workers: int = 1,
+    cache_size: int = 10000,
+    persistent_cache: bool = False,
+    checkpoint_every: int = 1,
+    islands: int = 1,
+    migration_interval: int = 5,
+    migrants: int = 2,
+    topology: str = "ring",
+    halving_rungs: int = 0,
+    halving_eta: int = 2,
+    halving_coarsening: float = 1,
+    stagnation_window: float = 0,
+    stagnation_distance: float = 0.05,
+    max_tilt: float = 0,
+    bound_rank: int = 0,
+    surrogate_keep: float = 0,
+    surrogate_kappa: float = 1,
+    snapshot_cache_size: float = 0,
+    snapshot_interval: float = 0.5,
+    save_trajectories: bool = False,
+    trajectory_retention: str = "all",
+    trajectory_top: int = 10,
+    steady_state: bool = False,
+    vectorized_operators: bool = False,
+    objectives: list = None,
+    environments: list = None,
+    aggregation: str = "mean",
+    cvar_alpha: float = 0.25,
+    env_samples: int = 0,
+    friction_noise: float = 0,
+    gravity_noise: float = 0,
+    mass_noise: float = 0,
+    env_seed: int = 0,
 ):
     from walkingsim.algorithms.ga import GeneticAlgorithm
+    from walkingsim.algorithms.islands import IslandModel
+    from walkingsim.algorithms.steady_state import SteadyStateGA
+    from walkingsim.simulation.environments import perturb_environments
     from walkingsim.utils.pygad_config import PygadConfig
 
     config = PygadConfig(
@@ -32,13 +95,264 @@ def train_ga(
         random_mutation_max_val=1,
         timesteps=timesteps,
     )
-    model = GeneticAlgorithm(
+    bound_rank = _bound_rank(bound_rank, fitness, duration, timestep)
+    environments = perturb_environments(
+        environments or [],
+        env_samples,
+        friction_noise,
+        gravity_noise,
+        mass_noise,
+        env_seed,
+    )
+    if environments and (islands > 1 or steady_state):
+        logger.warning(
+            "The environments are not available with islands and the "
+            "steady-state engine, they will not be used"
+        )
+        environments = []
+    if environments and (save_trajectories or bound_rank > 0):
+        # A trajectory and a bound are those of a single environment
+        logger.warning(
+            "The trajectories and the bound early stopping are not "
+            "available with several environments, they will not be used"
+        )
+        save_trajectories = False
+        bound_rank = 0
+    if objectives and (islands > 1 or steady_state):
+        logger.warning(
+            "The objectives are not available with islands and the "
+            "steady-state engine, they will not be used"
+        )
+        objectives = None
+    if objectives and (halving_rungs > 0 or surrogate_keep > 0):
+        # Both compare the individuals on their fitness only
+        logger.warning(
+            "The successive halving and the surrogate are not available "
+            "with objectives, they will not be used"
+        )
+        halving_rungs = 0
+        surrogate_keep = 0
+    if objectives and bound_rank > 0:
+        logger.warning(
+            "The bound early stopping is not available with objectives, "
+            "it will not be used"
+        )
+        bound_rank = 0
+    if islands > 1 and (visualize or persistent_cache):
+        logger.warning(
+            "Rendering and the persistent cache are not available "
+            "with islands, they will not be used"
+        )
+        visualize = False
+        persistent_cache = False
+    if steady_state and (halving_rungs > 0 or surrogate_keep > 0):
+        logger.warning(
+            "The successive halving and the surrogate are not available "
+            "with the steady-state engine, they will not be used"
+        )
+        halving_rungs = 0
+        surrogate_keep = 0
+
+    # Options of the genetic algorithm, which the islands and the
+    # steady-state engine are trained with
+    ga_kwargs = {
+        "config": config,
+        "env_props": env,
+        "creature": creature,
+        "fitness": fitness,
+        "extra_fitnesses": extra_fitnesses,
+        "duration": duration,
+        "timestep": timestep,
+        "substeps": substeps,
+        "controller": controller,
+        "workers": workers,
+        "cache_size": cache_size,
+        "persistent_cache": persistent_cache,
+        "halving_rungs": halving_rungs,
+        "halving_eta": halving_eta,
+        "halving_coarsening": halving_coarsening,
+        "stagnation_window": stagnation_window,
+        "stagnation_distance": stagnation_distance,
+        "max_tilt": max_tilt,
+        "bound_rank": bound_rank,
+        "surrogate_keep": surrogate_keep,
+        "surrogate_kappa": surrogate_kappa,
+        "vectorized_operators": vectorized_operators,
+        "snapshot_cache_size": snapshot_cache_size,
+        "snapshot_interval": snapshot_interval,
+        "save_trajectories": save_trajectories,
+        "trajectory_retention": trajectory_retention,
+        "trajectory_top": trajectory_top,
+    }
+    if islands > 1:
+        model = IslandModel(
+            **ga_kwargs,
+            islands=islands,
+            migration_interval=migration_interval,
+            migrants=migrants,
+            topology=topology,
+        )
+    elif steady_state:
+        model = SteadyStateGA(**ga_kwargs, visualize=visualize)
+    else:
+        model = GeneticAlgorithm(
+            **ga_kwargs,
+            visualize=visualize,
+            checkpoint_every=checkpoint_every,
+            objectives=objectives,
+            environments=environments,
+            aggregation=aggregation,
+            cvar_alpha=cvar_alpha,
+        )
+    model.train()
+    model.save()
+
+
+def resume_ga(
+    *,
+    date: str,
+    visualize: bool = False,
+    workers: int = 1,
+    cache_size: int = 10000,
+    persistent_cache: bool = False,
+    checkpoint_every: int = 1,
+):
+    from walkingsim.algorithms.ga import GeneticAlgorithm
+
+    model = GeneticAlgorithm.resume(
+        date=date,
+        visualize=visualize,
+        workers=workers,
+        cache_size=cache_size,
+        persistent_cache=persistent_cache,
+        checkpoint_every=checkpoint_every,
+    )
+    model.train()
+    model.save()
+
+
+def train_cmaes(
+    *,
+    creature: str,
+    env: dict,
+    fitness: str = "walking-v0",
+    extra_fitnesses: list = None,
+    visualize: bool = False,
+    duration: int = 5,
+    timestep: float = 1e-2,
+    substeps: int = 1,
+    timesteps: int = 500,
+    controller: str = "open-loop",
+    population_size: int,
+    num_generations: int,
+    restarts: str = "ipop",
+    workers: int = 1,
+    cache_size: int = 10000,
+    persistent_cache: bool = False,
+    halving_rungs: int = 0,
+    halving_eta: int = 2,
+    halving_coarsening: float = 1,
+    stagnation_window: float = 0,
+    stagnation_distance: float = 0.05,
+    max_tilt: float = 0,
+    bound_rank: int = 0,
+    surrogate_keep: float = 0,
+    surrogate_kappa: float = 1,
+    snapshot_cache_size: float = 0,
+    snapshot_interval: float = 0.5,
+    save_trajectories: bool = False,
+    trajectory_retention: str = "all",
+    trajectory_top: int = 10,
+    objectives: list = None,
+    environments: list = None,
+    aggregation: str = "mean",
+    cvar_alpha: float = 0.25,
+    env_samples: int = 0,
+    friction_noise: float = 0,
+    gravity_noise: float = 0,
+    mass_noise: float = 0,
+    env_seed: int = 0,
+):
+    from walkingsim.algorithms.cmaes import CMAES
+    from walkingsim.simulation.environments import perturb_environments
+    from walkingsim.utils.pygad_config import PygadConfig
+
+    # Only the population, the generations and the search space are used by
+    # CMA-ES. The genes are continuous, there is no step.
+    config = PygadConfig(
+        num_generations=num_generations,
+        num_parents_mating=2,
+        mutation_percent_genes=10,
+        parallel_processing=None,
+        parent_selection_type="sss",
+        keep_elitism=0,
+        crossover_type=None,
+        mutation_type=None,
+        initial_population=None,
+        population_size=population_size,
+        num_joints=8,  # FIXME: Load this from the creature
+        save_solutions=False,
+        gene_space={"low": -1, "high": 1},
+        init_range_low=-1,
+        init_range_high=1,
+        random_mutation_min_val=-1,
+        random_mutation_max_val=1,
+        timesteps=timesteps,
+    )
+    if objectives:
+        logger.warning(
+            "The objectives are not available with CMA-ES, "
+            "they will not be used"
+        )
+    bound_rank = _bound_rank(bound_rank, fitness, duration, timestep)
+    environments = perturb_environments(
+        environments or [],
+        env_samples,
+        friction_noise,
+        gravity_noise,
+        mass_noise,
+        env_seed,
+    )
+    if environments and (save_trajectories or bound_rank > 0):
+        # A trajectory and a bound are those of a single environment
+        logger.warning(
+            "The trajectories and the bound early stopping are not "
+            "available with several environments, they will not be used"
+        )
+        save_trajectories = False
+        bound_rank = 0
+    model = CMAES(
         config=config,
         env_props=env,
         creature=creature,
+        fitness=fitness,
+        extra_fitnesses=extra_fitnesses,
         visualize=visualize,
         duration=duration,
         timestep=timestep,
+        substeps=substeps,
+        controller=controller,
+        workers=workers,
+        cache_size=cache_size,
+        persistent_cache=persistent_cache,
+        halving_rungs=halving_rungs,
+        halving_eta=halving_eta,
+        halving_coarsening=halving_coarsening,
+        stagnation_window=stagnation_window,
+        stagnation_distance=stagnation_distance,
+        max_tilt=max_tilt,
+        bound_rank=bound_rank,
+        surrogate_keep=surrogate_keep,
+        surrogate_kappa=surrogate_kappa,
+        snapshot_cache_size=snapshot_cache_size,
+        snapshot_interval=snapshot_interval,
+        save_trajectories=save_trajectories,
+        trajectory_retention=trajectory_retention,
+        trajectory_top=trajectory_top,
+        restarts=restarts,
+        environments=environments,
+        aggregation=aggregation,
+        cvar_alpha=cvar_alpha,
     )
     model.train()
     model.save()
@@ -48,9 +362,11 @@ def train_ppo(
     *,
     creature: str,
     env: dict,
+    fitness: str = "walking-v0",
     visualize: bool = False,
     duration: int = 5,
     timestep: float = 1e-2,
+    substeps: int = 1,
     timesteps: int,
 ):
     from walkingsim.algorithms.ppo import PPO_Algo
@@ -61,9 +377,11 @@ def train_ppo(
         config=config,
         env_props=env,
         creature=creature,
+        fitness=fitness,
         visualize=visualize,
         duration=duration,
         timestep=timestep,
+        substeps=substeps,
     )
     model.train()
     model.save()
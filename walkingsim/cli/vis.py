@@ -1,25 +1,138 @@
 from loguru import logger
 
-def visualize_ga(*
-                 , date: str = None
-                 , timestep: float = 1e-2
-                 , delay: int = 0):
+
+def visualize_ga(
+    *,
+    date: str = None,
+    timestep: float = 1e-2,
+    delay: int = 0,
+    playback: bool = False,
+    speed: float = 1,
+    loop: bool = False,
+    trajectory: int = None,
+    front_member: int = None,
+):
     logger.info("Visualizing GA")
     logger.debug(f"date: {date}")
     logger.debug(f"timestep: {timestep}")
     logger.debug(f"delay: {delay}")
+    if trajectory is not None:
+        playback_trajectory(
+            date=date,
+            algorithm="ga",
+            trajectory=trajectory,
+            speed=speed,
+            loop=loop,
+            delay=delay,
+        )
+        return
+
     from walkingsim.algorithms.ga import GeneticAlgorithm
 
     model = GeneticAlgorithm.load(
-        date=date, visualize=True, timestep=timestep, ending_delay=delay
+        date=date,
+        visualize=not playback,
+        timestep=timestep,
+        ending_delay=delay,
+        front_member=front_member,
+    )
+    if playback:
+        model.playback(speed=speed, loop=loop, delay=delay)
+    else:
+        model.visualize()
+
+
+def visualize_cmaes(
+    *,
+    date: str = None,
+    timestep: float = 1e-2,
+    delay: int = 0,
+    playback: bool = False,
+    speed: float = 1,
+    loop: bool = False,
+    trajectory: int = None,
+):
+    if trajectory is not None:
+        playback_trajectory(
+            date=date,
+            algorithm="cmaes",
+            trajectory=trajectory,
+            speed=speed,
+            loop=loop,
+            delay=delay,
+        )
+        return
+
+    from walkingsim.algorithms.cmaes import CMAES
+
+    model = CMAES.load(
+        date=date,
+        visualize=not playback,
+        timestep=timestep,
+        ending_delay=delay,
     )
-    model.visualize()
+    if playback:
+        model.playback(speed=speed, loop=loop, delay=delay)
+    else:
+        model.visualize()
 
 
-def visualize_ppo(*, date: str, timestep: float = 1e-2, delay: int = 0):
+def visualize_ppo(
+    *,
+    date: str,
+    timestep: float = 1e-2,
+    delay: int = 0,
+    playback: bool = False,
+    speed: float = 1,
+    loop: bool = False,
+):
     from walkingsim.algorithms.ppo import PPO_Algo
 
-    model = PPO_Algo.load(date=date, visualize=True, timestep=timestep)
-    model.visualize()
+    model = PPO_Algo.load(
+        date=date,
+        visualize=not playback,
+        timestep=timestep,
+        record_poses=playback,
+    )
+    if playback:
+        model.playback(speed=speed, loop=loop, delay=delay)
+    else:
+        model.visualize()
+
+
+def playback_trajectory(
+    *,
+    date: str = None,
+    algorithm: str = "ga",
+    trajectory: int,
+    speed: float = 1,
+    loop: bool = False,
+    delay: int = 0,
+):
+    """Plays back a trajectory archived with `--save-trajectories`"""
+    from walkingsim.envs.chrono import ChronoPlayback
+    from walkingsim.utils.data_manager import DataManager
+    from walkingsim.utils.trajectory_archive import TrajectoryReader
+
+    dm = DataManager(algorithm, date)
+    if date is None:
+        last_sim_date = dm.load_global_dat_file("last_sim.dat")
+        dm = DataManager(algorithm, last_sim_date)
+
+    reader = TrajectoryReader(dm)
+    generation, specimen_id, fitness, columns = reader[trajectory]
+    logger.info(
+        f"Trajectory {trajectory}: specimen {specimen_id} of generation "
+        f"{generation}, fitness {fitness}"
+    )
+    ChronoPlayback(
+        reader.metadata["env_props"],
+        reader.metadata["creature"],
+        columns,
+        speed=speed,
+        loop=loop,
+        delay=delay,
+    ).run()
+
 
 # def main():
@@ -0,0 +1,187 @@
+import math
+import typing as t
+
+import numpy as np
+
+
+class Controller:
+    """
+    Decodes a genome, whose genes are in [-1, 1], into the open-loop matrix
+    of actions applied to the motors, with one row per control step.
+
+    The rollout loops over the rows of the actions matrix until the end of
+    the simulation.
+    """
+
+    def __init__(
+        self,
+        motors: int,
+        timesteps: int,
+        control_timestep: float,
+        duration: float,
+    ) -> None:
+        self._motors = motors
+        self._timesteps = timesteps
+        self._control_timestep = control_timestep
+        self._duration = duration
+
+    @property
+    def num_genes(self):
+        raise NotImplementedError
+
+    def decode(self, genome):
+        """Returns the actions matrix of a single genome"""
+        return self.decode_population(np.asarray(genome)[np.newaxis])[0]
+
+    def decode_population(self, population):
+        """
+        Returns the actions matrices of all the genomes of `population`, as
+        an array of shape (genomes, steps, motors)
+        """
+        raise NotImplementedError
+
+
+class OpenLoopController(Controller):
+    """Each gene is the action of one motor during one of the `timesteps`"""
+
+    @property
+    def num_genes(self):
+        return self._timesteps * self._motors
+
+    def decode_population(self, population):
+        population = np.asarray(population, dtype=float)
+        return population.reshape(
+            (len(population), self._timesteps, self._motors)
+        )
+
+
+class _PeriodicController(Controller):
+    """Controllers generating actions over the whole simulation"""
+
+    @property
+    def _time(self):
+        steps = math.ceil(self._duration / self._control_timestep) + 1
+        return np.arange(steps) * self._control_timestep
+
+
+class CPGController(_PeriodicController):
+    """
+    Central pattern generator: each motor follows an oscillator defined by
+    its amplitude, frequency, phase and offset.
+    """
+
+    _MIN_FREQUENCY = 0.25
+    _MAX_FREQUENCY = 3
+
+    @property
+    def num_genes(self):
+        return 4 * self._motors
+
+    def decode_population(self, population):
+        genes = np.asarray(population, dtype=float).reshape(
+            (-1, 4, 1, self._motors)
+        )
+        amplitude = (genes[:, 0] + 1) / 2
+        frequency = self._MIN_FREQUENCY + (genes[:, 1] + 1) / 2 * (
+            self._MAX_FREQUENCY - self._MIN_FREQUENCY
+        )
+        phase = genes[:, 2] * math.pi
+        offset = genes[:, 3]
+
+        time = self._time[np.newaxis, :, np.newaxis]
+        actions = offset + amplitude * np.sin(
+            2 * math.pi * frequency * time + phase
+        )
+        return np.clip(actions, -1, 1)
+
+
+class FourierController(_PeriodicController):
+    """
+    Truncated Fourier series sharing a single base frequency: each motor has
+    an offset and a sine and cosine coefficient per harmonic.
+    """
+
+    _HARMONICS = 3
+    _MIN_FREQUENCY = 0.25
+    _MAX_FREQUENCY = 2
+
+    @property
+    def num_genes(self):
+        return 1 + self._motors * (1 + 2 * self._HARMONICS)
+
+    def decode_population(self, population):
+        population = np.asarray(population, dtype=float)
+        frequency = self._MIN_FREQUENCY + (population[:, 0] + 1) / 2 * (
+            self._MAX_FREQUENCY - self._MIN_FREQUENCY
+        )
+        genes = population[:, 1:].reshape(
+            (-1, 1 + 2 * self._HARMONICS, self._motors)
+        )
+        offset = genes[:, 0]
+        sines = genes[:, 1 : 1 + self._HARMONICS]
+        cosines = genes[:, 1 + self._HARMONICS :]
+
+        # angles[genome, step, harmonic]
+        harmonics = np.arange(1, self._HARMONICS + 1)
+        angles = (
+            2
+            * math.pi
+            * frequency[:, np.newaxis, np.newaxis]
+            * self._time[np.newaxis, :, np.newaxis]
+            * harmonics
+        )
+        actions = (
+            offset[:, np.newaxis]
+            + (
+                np.einsum("nsh,nhm->nsm", np.sin(angles), sines)
+                + np.einsum("nsh,nhm->nsm", np.cos(angles), cosines)
+            )
+            / self._HARMONICS
+        )
+        return np.clip(actions, -1, 1)
+
+
+class SplineController(Controller):
+    """
+    Keyframes evenly spaced over a cycle of `timesteps`, interpolated with a
+    periodic Catmull-Rom spline so that the cycle loops smoothly.
+    """
+
+    _KEYFRAMES = 8
+
+    @property
+    def num_genes(self):
+        return self._KEYFRAMES * self._motors
+
+    def decode_population(self, population):
+        keyframes = np.asarray(population, dtype=float).reshape(
+            (-1, self._KEYFRAMES, self._motors)
+        )
+
+        # Position of each step between the keyframes
+        position = np.arange(self._timesteps) * (
+            self._KEYFRAMES / self._timesteps
+        )
+        index = position.astype(int)
+        u = (position - index)[np.newaxis, :, np.newaxis]
+
+        p0 = keyframes[:, (index - 1) % self._KEYFRAMES]
+        p1 = keyframes[:, index % self._KEYFRAMES]
+        p2 = keyframes[:, (index + 1) % self._KEYFRAMES]
+        p3 = keyframes[:, (index + 2) % self._KEYFRAMES]
+
+        actions = 0.5 * (
+            2 * p1
+            + (p2 - p0) * u
+            + (2 * p0 - 5 * p1 + 4 * p2 - p3) * u**2
+            + (3 * p1 - p0 - 3 * p2 + p3) * u**3
+        )
+        return np.clip(actions, -1, 1)
+
+
+controllers: t.Mapping[str, Controller] = {
+    "open-loop": OpenLoopController,
+    "cpg": CPGController,
+    "fourier": FourierController,
+    "spline": SplineController,
+}
@@ -12,6 +12,8 @@ Description:
 
 import typing as t
 
+import numpy as np
+
 
 class _CreatureBody:
     def __init__(
@@ -25,6 +27,7 @@ class _CreatureBody:
         self._childs = []
         self._motor = None
         self._link = None
+        self._constraints_z = None
         self._create_body()
 
     def _create_body(self):
@@ -63,6 +66,10 @@ class _CreatureBody:
     def motor(self):
         return self._motor
 
+    @property
+    def constraints_z(self):
+        return self._constraints_z
+
     # Methods
     def collision(
         self,
@@ -95,6 +102,10 @@ class Creature:
         bodies: retrieve a list of all the bodies in the creature
         links: retrieve a list of all the links in the creature
         motors: retrieve a list of all the motors in the creature
+
+    Once created, the tree of bodies is compiled into flat lists, so that
+    retrieving the bodies, links or motors of the whole creature does not
+    walk the tree again.
     """
 
     _CREATURE_HEIGHT = -1
@@ -110,43 +121,84 @@ class Creature:
             root_size, family=1, position=root_pos, parent=None
         )
         self.create()
+        self._compile()
 
     def create(self):
         raise NotImplementedError
 
+    def _compile(self):
+        self.__bodies = self._walk_bodies(self.root)
+        self.__links = self._walk_links(self.root)
+        self.__motors = self._walk_motors(self.root)
+
+        # Limits of the links constrained around z, in the same order as the
+        # `limited_links`
+        limited = self._walk_limited(self.root)
+        self.__limited_links = [link for link, _ in limited]
+        self.__link_limits = np.array(
+            [constraints for _, constraints in limited], dtype=float
+        ).reshape((-1, 2))
+
     @property
     def root(self):
         return self.__root
 
+    @property
+    def limited_links(self):
+        return self.__limited_links
+
+    @property
+    def link_limits(self):
+        """Array of the `(min, max)` angles of each of the `limited_links`"""
+        return self.__link_limits
+
     def bodies(self, root=None):
         if root is None:
-            root = self.root
+            return self.__bodies
 
-        _bodies = [root.body]
-        for child in root.childs:
-            _bodies.extend(self.bodies(root=child))
-        return _bodies
+        return self._walk_bodies(root)
 
     def links(self, root=None):
         if root is None:
-            root = self.root
+            return self.__links
+
+        return self._walk_links(root)
+
+    def motors(self, root=None):
+        if root is None:
+            return self.__motors
+
+        return self._walk_motors(root)
+
+    def _walk_bodies(self, root):
+        _bodies = [root.body]
+        for child in root.childs:
+            _bodies.extend(self._walk_bodies(child))
+        return _bodies
 
+    def _walk_links(self, root):
         _links = []
         if root.link is not None:
             _links.append(root.link)
 
         for child in root.childs:
-            _links.extend(self.links(root=child))
+            _links.extend(self._walk_links(child))
         return _links
 
-    def motors(self, root=None):
-        if root is None:
-            root = self.root
-
+    def _walk_motors(self, root):
         _motors = []
         if root.motor is not None:
             _motors.append(root.motor)
 
         for child in root.childs:
-            _motors.extend(self.motors(root=child))
+            _motors.extend(self._walk_motors(child))
         return _motors
+
+    def _walk_limited(self, root):
+        _limited = []
+        if root.link is not None and root.constraints_z is not None:
+            _limited.append((root.link, tuple(root.constraints_z)))
+
+        for child in root.childs:
+            _limited.extend(self._walk_limited(child))
+        return _limited
@@ -1 +1,2 @@
 from .env import ChronoEnvironment
+from .playback import ChronoPlayback
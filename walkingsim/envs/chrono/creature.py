@@ -125,6 +125,7 @@ class ChronoCreatureBody(_CreatureBody):
                 self._body,
                 chrono.ChCoordsysD(joint_pos, chrono.QUNIT),
             )
+            self._constraints_z = constraints_z
 
         # If no link was set yet, use a fix link
         if self._link is None and self._motor is None:
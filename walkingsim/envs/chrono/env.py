@@ -1,5 +1,6 @@
 import math
 
+import numpy as np
 import pychrono as chrono
 
 from walkingsim.creature.bipede import Bipede
@@ -7,26 +8,29 @@ from walkingsim.creature.quadrupede import Quadrupede
 from walkingsim.envs.chrono.creature import ChronoCreatureBody
 from walkingsim.envs.chrono.utils import _tuple_to_chrono_vector
 from walkingsim.envs.chrono.visualizer import ChronoVisualizer
-
-
-class ChCustomTorqueFunction(chrono.ChFunction_SetpointCallback):
-    def __init__(self, value: float):
-        super().__init__()
-        self.__value = value
-
-    def SetpointCallback(self, t: float):
-        return self.__value
+from walkingsim.loader import default_gravity
+from walkingsim.trajectory import Trajectory
 
 
 class ChronoEnvironment:
-    def __init__(self, visualize: bool = False, creature: str = "quadrupede"):
+    def __init__(
+        self,
+        visualize: bool = False,
+        creature: str = "quadrupede",
+        max_steps: int = 1000,
+        record_poses: bool = False,
+    ):
         self.__environment = chrono.ChSystemNSC()
-        if creature == "quadrupede":
+        if isinstance(creature, type):
+            self.__creature_cls = creature
+        elif creature == "quadrupede":
             self.__creature_cls = Quadrupede
         else:
             self.__creature_cls = Bipede
 
         self.__creature = None
+        self.__ground = None
+        self.__motor_functions = []
 
         self.__visualize = visualize
         self.__visualizer = None
@@ -36,8 +40,16 @@ class ChronoEnvironment:
         self.__ground_material = chrono.ChMaterialSurfaceNSC()
         self.__ground_color = chrono.ChColor(0.5, 0.7, 0.3)
 
-        # Observations
-        self.__observations = []
+        # Observations, the poses of the bodies are only recorded to play
+        # the trajectories back
+        self.__max_steps = max_steps
+        self.__record_poses = record_poses
+        self.__observations = Trajectory(
+            max_steps + 1, self.__creature_cls._CREATURE_MOTORS
+        )
+
+        # Initial state of the world, restored on each reset
+        self.__snapshot = None
 
     @property
     def observations(self):
@@ -58,16 +70,170 @@ class ChronoEnvironment:
 
         return False
 
-    def reset(self, properties: dict):
+    def reset(self, properties: dict, rebuild: bool = False):
+        """
+        Puts the world back in its initial state.
+
+        The world is only built on the first reset, or when the properties
+        change, its initial state is then restored from a snapshot.
+        """
+        self.__observations.clear()
+        if (
+            rebuild
+            or self.__snapshot is None
+            or properties != self.__properties
+        ):
+            self._build(properties)
+            self._take_snapshot()
+            if self.__visualizer:
+                self.__visualizer.refresh()
+        else:
+            self._restore_snapshot()
+
+        self._gather_observations()
+
+    def step(self, action, timestep: float, substeps: int = 1):
+        """Applies `action` for `substeps` physics steps of `timestep`"""
+        self._apply_forces(action.tolist())
+        for _ in range(substeps):
+            self.__environment.DoStepDynamics(timestep)
+        self._gather_observations()
+        self.__observations.actions[-1] = action
+
+    def rollout(
+        self,
+        actions,
+        timestep: float,
+        duration: float,
+        callback=None,
+        substeps: int = 1,
+        start: int = 0,
+    ):
+        """
+        Runs the open-loop sequence of `actions`, looping over its rows, until
+        `duration` is reached or `callback` returns True. Each row is held
+        for `substeps` physics steps of `timestep`.
+
+        `callback(trajectory, action, time)` is called after each step, with
+        the row of `actions` that was applied. Returns the trajectory.
+
+        `start` is the number of steps already done, when the world was put
+        in the middle of the rollout with `load_state`.
+        """
+        actions = np.asarray(actions, dtype=float)
+        if actions.shape[1] < len(self.__motor_functions):
+            raise RuntimeError("Forces for joints are not enough")
+
+        # Everything used in the loop is bound once, to keep the python
+        # overhead of each step as low as possible
+        rows = actions.tolist()
+        functions = self.__motor_functions
+        system = self.__environment
+        gather_observations = self._gather_observations
+        trajectory = self.__observations
+
+        i = start
+        while system.GetChTime() <= duration:
+            row = i % len(rows)
+            for function, value in zip(functions, rows[row]):
+                function.Set_yconst(value)
+            for _ in range(substeps):
+                system.DoStepDynamics(timestep)
+            gather_observations()
+            trajectory.actions[-1] = actions[row]
+
+            if callback is not None and callback(
+                trajectory, actions[row], system.GetChTime()
+            ):
+                break
+            i += 1
+
+        return trajectory
+
+    def save_state(self):
+        """
+        Returns the state of the creature (position, orientation and
+        velocities of its bodies) and the time, as an array
+        """
+        state = [self.time]
+        for body in self.__creature.bodies():
+            pos, rot = body.GetPos(), body.GetRot()
+            vel, wvel = body.GetPos_dt(), body.GetWvel_par()
+            state.extend(
+                (pos.x, pos.y, pos.z, rot.e0, rot.e1, rot.e2, rot.e3)
+                + (vel.x, vel.y, vel.z, wvel.x, wvel.y, wvel.z)
+            )
+        return np.array(state)
+
+    def load_state(self, state):
+        """
+        Puts the world in a state returned by `save_state`.
+
+        The contacts are detected again from the restored positions, so the
+        simulation can slightly differ from the one which saved the state.
+        """
+        self.__environment.SetChTime(state[0])
+
+        zero = chrono.ChVectorD(0, 0, 0)
+        bodies = np.reshape(state[1:], (-1, 13)).tolist()
+        for body, values in zip(self.__creature.bodies(), bodies):
+            body.SetPos(chrono.ChVectorD(*values[0:3]))
+            body.SetRot(chrono.ChQuaternionD(*values[3:7]))
+            body.SetPos_dt(chrono.ChVectorD(*values[7:10]))
+            body.SetWvel_par(chrono.ChVectorD(*values[10:13]))
+            body.SetPos_dtdt(zero)
+            body.SetWacc_par(zero)
+            body.Empty_forces_accumulators()
+
+        self.__environment.GetContactContainer().RemoveAllContacts()
+        self.__environment.Update()
+
+    def set_poses(self, time: float, poses):
+        """
+        Puts the bodies of the creature in `poses` (position and orientation
+        quaternion of each body, as recorded in the trajectory), without
+        simulating anything
+        """
+        self.__environment.SetChTime(time)
+        for body, pose in zip(self.__creature.bodies(), poses.tolist()):
+            body.SetPos(chrono.ChVectorD(*pose[0:3]))
+            body.SetRot(chrono.ChQuaternionD(*pose[3:7]))
+        self.__environment.Update()
+
+    def add_event_receiver(self, receiver):
+        """Sends the events of the window (e.g. the keys) to `receiver`"""
+        if self.__visualizer is not None:
+            self.__visualizer.add_event_receiver(receiver)
+
+    def render(self):
+        if self.__visualize and self.__visualizer is None:
+            self.__visualizer = ChronoVisualizer(
+                self.__environment, self.__properties
+            )
+            self.__visualizer.setup()
+
+        if self.__visualizer is not None:
+            self.__visualizer.render()
+            self.__visualizer.check()
+
+    def close(self):
+        if self.__visualizer is not None:
+            self.__visualizer.close()
+
+    # private methods
+    def _build(self, properties: dict):
         self.__properties = properties
 
         self.__environment.Clear()
         self.__environment.SetChTime(0)  # NOTE: Is this necessary ?
-        self.__observations.clear()
 
         # Set environment properties
-        gravity = properties.get("gravity", (0, -9.81, 0))
+        gravity = properties.get("gravity", default_gravity)
         self.__environment.Set_G_acc(_tuple_to_chrono_vector(gravity))
+        # A new material, so that the friction of a previous world is not kept
+        self.__ground_material = chrono.ChMaterialSurfaceNSC()
+        if "friction" in properties:
+            self.__ground_material.SetFriction(properties["friction"])
         chrono.ChCollisionModel.SetDefaultSuggestedEnvelope(0.001)
         chrono.ChCollisionModel.SetDefaultSuggestedMargin(0.001)
 
@@ -93,74 +259,107 @@ class ChronoEnvironment:
                 scale_y=100,
             )
         self.__environment.Add(ground)
+        self.__ground = ground
 
         # Add creature
         self.__creature = self.__creature_cls(
             ChronoCreatureBody, (0, self.__creature_cls._CREATURE_HEIGHT, 0)
         )
+        mass_scale = properties.get("mass_scale", 1)
         for body in self.__creature.bodies():
+            if mass_scale != 1:
+                body.SetMass(body.GetMass() * mass_scale)
+                body.SetInertiaXX(body.GetInertiaXX() * mass_scale)
             self.__environment.Add(body)
         for joint in self.__creature.motors():
             self.__environment.Add(joint)
         for link in self.__creature.links():
             self.__environment.AddLink(link)
-
-        self._gather_observations()
-        if self.__visualizer:
-            self.__visualizer.refresh()
-
-    def step(self, action, timestep: float):
-        self._apply_forces(action.tolist())
-        self.__environment.DoStepDynamics(timestep)
-        self._gather_observations()
-
-    def render(self):
-        if self.__visualize and self.__visualizer is None:
-            self.__visualizer = ChronoVisualizer(
-                self.__environment, self.__properties
+        if self.__record_poses:
+            self.__observations = Trajectory(
+                self.__max_steps + 1,
+                self.__creature_cls._CREATURE_MOTORS,
+                len(self.__creature.bodies()),
             )
-            self.__visualizer.setup()
 
-        if self.__visualizer is not None:
-            self.__visualizer.render()
-            self.__visualizer.check()
+        # Each motor is driven by a constant function, created once and
+        # updated in place on each step, so that chrono never has to call
+        # back into python while solving.
+        # NOTE: Important to store the functions otherwise they are destroyed
+        # when this method returns, so chrono cannot access them anymore
+        self.__motor_functions = []
+        self.__motors = self.__creature.motors()
+        for joint in self.__motors:
+            function = chrono.ChFunction_Const(0)
+            if isinstance(joint, chrono.ChLinkMotorRotationTorque):
+                joint.SetTorqueFunction(function)
+            elif isinstance(joint, chrono.ChLinkMotorRotationAngle):
+                joint.SetAngleFunction(function)
+            self.__motor_functions.append(function)
 
-    def close(self):
-        if self.__visualizer is not None:
-            self.__visualizer.close()
+        # Flat indexes used on each step, so that the creature tree is not
+        # walked again during the simulation
+        self.__limited_links = self.__creature.limited_links
+        self.__link_limits = 0.99 * self.__creature.link_limits
+        # FIXME target only the thighs of the quadrupede here, to check
+        # if they touch the ground
+        self.__legs = [
+            self.__creature.root.childs[i].body
+            for i in range(len(self.__motors) // 2)
+        ]
+
+    def _take_snapshot(self):
+        """Saves the state of the world right after it was built"""
+        bodies = [self.__ground] + self.__creature.bodies()
+        self.__snapshot = {
+            "bodies": [
+                (
+                    body,
+                    chrono.ChVectorD(body.GetPos()),
+                    chrono.ChQuaternionD(body.GetRot()),
+                )
+                for body in bodies
+            ]
+        }
+
+    def _restore_snapshot(self):
+        """Puts the world back in the state saved by `_take_snapshot`"""
+        self.__environment.SetChTime(0)
+
+        for body, pos, rot in self.__snapshot["bodies"]:
+            body.SetPos(pos)
+            body.SetRot(rot)
+            body.SetNoSpeedNoAcceleration()
+            body.Empty_forces_accumulators()
+
+        for function in self.__motor_functions:
+            function.Set_yconst(0)
+
+        # Contacts of the previous run must not leak into the new one, and
+        # the links must be updated for the restored positions
+        self.__environment.GetContactContainer().RemoveAllContacts()
+        self.__environment.Update()
 
-    # private methods
     def _apply_forces(self, action: list):
-        if len(action) < len(self.__creature.motors()):
+        if len(action) < len(self.__motor_functions):
             raise RuntimeError("Forces for joints are not enough")
 
-        # NOTE: Important to store the function otherwise they are destroyed
-        # when function is terminated, so chrono cannot access them anymore
-        self.__joints_funcs = []
-
-        for i, joint in enumerate(self.__creature.motors()):
-            self.__joints_funcs.append(ChCustomTorqueFunction(action[i]))
-            if isinstance(joint, chrono.ChLinkMotorRotationTorque):
-                joint.SetTorqueFunction(self.__joints_funcs[i])
-            elif isinstance(joint, chrono.ChLinkMotorRotationAngle):
-                joint.SetAngleFunction(self.__joints_funcs[i])
+        for function, value in zip(self.__motor_functions, action):
+            function.Set_yconst(value)
 
     def _get_nb_joints_at_limit(self):
         """
         Returns the nb of joints that are closer to their limit angles
         """
-        nb_joints_at_limit = 0
-        for link in self.__creature.links():
-            max_angle = link.GetLimit_Rz().GetMax()
-            min_angle = link.GetLimit_Rz().GetMin()
-            current_angle = link.GetRelAngle()
-            treshold = 0.99
-            if current_angle >= (treshold * max_angle) or current_angle <= (
-                treshold * min_angle
-            ):
-                nb_joints_at_limit += 1
-
-        return nb_joints_at_limit
+        angles = np.fromiter(
+            (link.GetRelAngle() for link in self.__limited_links),
+            dtype=float,
+            count=len(self.__limited_links),
+        )
+        at_limit = (angles >= self.__link_limits[:, 1]) | (
+            angles <= self.__link_limits[:, 0]
+        )
+        return int(np.count_nonzero(at_limit))
 
     def _gather_observations(self):
         nb_joints_at_limit = self._get_nb_joints_at_limit()
@@ -170,43 +369,34 @@ class ChronoEnvironment:
         trunk_hit_ground = (
             self.__creature.root.body.GetContactForce().Length() != 0
         )
-        legs_hit_ground = False
-        # FIXME target only the thighs of the quadrupede here, to check
-        # if they touch the ground
-        for i in range(0, len(self.__creature.motors()) // 2):
-            if (
-                self.__creature.root.childs[i].body.GetContactForce().Length()
-                != 0
-            ):
-                legs_hit_ground = True
-
-        # Get position and rotation of trunk
-        trunk_pos = self.__creature.root.body.GetPos()
-        self.__observations.append(
-            {
-                "position": (trunk_pos.x, trunk_pos.y, trunk_pos.z),
-                "link_rotations": {},
-            }
+        legs_hit_ground = any(
+            leg.GetContactForce().Length() != 0 for leg in self.__legs
         )
-        for i, motor in enumerate(self.__creature.motors()):
-            rot = motor.GetMotorRot()
-            self.__observations[-1]["link_rotations"].update({str(i): rot})
-
-        # Distance calculation
-        step_distance = 0
-        if len(self.__observations) > 1:
 
-            step_distance = (
-                self.__observations[-1]["position"][0]
-                - self.__observations[0]["position"][0]
-            )
-
-        # We update the last sensor data added with those additional information
-        self.__observations[-1].update(
-            {
-                "distance": step_distance,
-                "joints_at_limits": nb_joints_at_limit,
-                "trunk_hit_ground": trunk_hit_ground,
-                "legs_hit_ground": legs_hit_ground,
-            }
+        # Get position and orientation of trunk and rotations of the motors
+        trunk = self.__creature.root.body
+        trunk_pos = trunk.GetPos()
+        # Vertical component of the Y axis of the trunk, rotated by its
+        # orientation quaternion
+        trunk_rot = trunk.GetRot()
+        upright = 1 - 2 * (trunk_rot.e1**2 + trunk_rot.e3**2)
+        poses = None
+        if self.__record_poses:
+            poses = [
+                (pos.x, pos.y, pos.z, rot.e0, rot.e1, rot.e2, rot.e3)
+                for pos, rot in (
+                    (body.GetPos(), body.GetRot())
+                    for body in self.__creature.bodies()
+                )
+            ]
+        self.__observations.append(
+            self.time,
+            (trunk_pos.x, trunk_pos.y, trunk_pos.z),
+            [motor.GetMotorRot() for motor in self.__motors],
+            nb_joints_at_limit,
+            trunk_hit_ground,
+            legs_hit_ground,
+            upright,
+            (trunk_rot.e0, trunk_rot.e1, trunk_rot.e2, trunk_rot.e3),
+            poses,
         )
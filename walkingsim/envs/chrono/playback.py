@@ -0,0 +1,146 @@
+import time
+
+import numpy as np
+import pychrono.irrlicht as chronoirr
+
+from walkingsim.envs.chrono.env import ChronoEnvironment
+
+
+class _PlaybackControls(chronoirr.IEventReceiver):
+    """Keyboard controls of a playback"""
+
+    def __init__(self, playback: "ChronoPlayback") -> None:
+        chronoirr.IEventReceiver.__init__(self)
+        self._playback = playback
+
+    def OnEvent(self, event):
+        if (
+            event.EventType != chronoirr.EET_KEY_INPUT_EVENT
+            or not event.KeyInput.PressedDown
+        ):
+            return False
+
+        playback = self._playback
+        key = event.KeyInput.Key
+        if key == chronoirr.KEY_SPACE:
+            playback.paused = not playback.paused
+        elif key == chronoirr.KEY_LEFT:
+            playback.seek(playback.time - playback.seek_step)
+        elif key == chronoirr.KEY_RIGHT:
+            playback.seek(playback.time + playback.seek_step)
+        elif key == chronoirr.KEY_UP:
+            playback.speed *= 2
+        elif key == chronoirr.KEY_DOWN:
+            playback.speed /= 2
+        elif key == chronoirr.KEY_HOME:
+            playback.seek(0)
+        elif key == chronoirr.KEY_KEY_L:
+            playback.loop = not playback.loop
+        else:
+            return False
+        return True
+
+
+class ChronoPlayback:
+    """
+    Kinematic playback of a recorded trajectory: the bodies of the creature
+    are put in their recorded poses frame by frame, nothing is simulated.
+
+    The playback follows the recorded time at `speed`, from the first frame
+    to the last one, and starts again when `loop`. Otherwise the window is
+    closed `delay` seconds after the end.
+
+    Controls:
+        - space: pause / resume
+        - left / right: seek `seek_step` seconds backward / forward
+        - up / down: double / halve the speed
+        - home: go back to the start
+        - L: loop / do not loop
+    """
+
+    def __init__(
+        self,
+        env_props: dict,
+        creature: str,
+        trajectory: dict,
+        speed: float = 1,
+        loop: bool = False,
+        delay: float = 0,
+        seek_step: float = 1,
+    ) -> None:
+        if "poses" not in trajectory:
+            raise RuntimeError(
+                "The trajectory has no recorded poses, it cannot be played back"
+            )
+
+        self._env_props = env_props
+        self._creature = creature
+        self._times = np.asarray(trajectory["time"])
+        self._poses = np.asarray(trajectory["poses"])
+        self._delay = delay
+        self.speed = speed
+        self.loop = loop
+        self.paused = False
+        self.seek_step = seek_step
+        self.time = 0
+        # Real time spent at the end of the playback, None before the end
+        self._ended = None
+        # Irrlicht only keeps a raw pointer to the event receiver, it must
+        # live as long as the window
+        self._controls = None
+
+    @property
+    def duration(self):
+        return self._times[-1] - self._times[0]
+
+    def seek(self, time: float):
+        self.time = min(max(0, time), self.duration)
+
+    def frame(self):
+        """Index of the last frame recorded before the current time"""
+        time = self._times[0] + self.time
+        return max(0, np.searchsorted(self._times, time, side="right") - 1)
+
+    def advance(self, elapsed: float):
+        """
+        Moves the playback forward by `elapsed` seconds of real time. Returns
+        True once it is over: its end was reached `delay` seconds ago.
+        """
+        if not self.paused:
+            self.time += elapsed * self.speed
+
+        if self.time > self.duration:
+            if self.loop and self.duration > 0:
+                self.time %= self.duration
+            else:
+                self.time = self.duration
+                self._ended = (
+                    0 if self._ended is None else self._ended + elapsed
+                )
+                return self._ended >= self._delay
+
+        self._ended = None
+        return False
+
+    def run(self):
+        environment = ChronoEnvironment(
+            visualize=True, creature=self._creature, max_steps=1
+        )
+        environment.reset(self._env_props)
+        environment.render()
+        self._controls = _PlaybackControls(self)
+        environment.add_event_receiver(self._controls)
+
+        last = time.perf_counter()
+        while not environment.closed:
+            now = time.perf_counter()
+            if self.advance(now - last):
+                break
+            last = now
+
+            frame = self.frame()
+            environment.set_poses(self._times[frame], self._poses[frame])
+            environment.render()
+
+        environment.close()
+        self._controls = None
@@ -32,6 +32,9 @@ class ChronoVisualizer:
         #  self.__visualizer.ShowInfoPanel(True)
         self.__visualizer.EndScene()
 
+    def add_event_receiver(self, receiver):
+        self.__visualizer.AddUserEventReceiver(receiver)
+
     def refresh(self):
         self.__visualizer.BindAll()
 
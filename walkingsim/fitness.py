@@ -1,5 +1,18 @@
+import math
 import typing as t
 
+import numpy as np
+
+from walkingsim.trajectory import Trajectory
+
+
+def _running_sum(values):
+    """
+    Sum of `values` added one after the other, like the props updated at
+    each step (np.sum adds them in another order)
+    """
+    return np.cumsum(values)[-1] if len(values) else 0.0
+
 
 class Fitness:
     def __init__(self, sim_duration: float, timestep: float) -> None:
@@ -32,13 +45,47 @@ class Fitness:
 
     def compute(
         self,
-        last_observation: dict,
-        observations: list,
+        observations: Trajectory,
         forces: list,
         time: float,
     ):
         raise NotImplementedError
 
+    def upper_bound(self, time: float):
+        """
+        Upper bound of the fitness that can still be reached at the end of
+        the simulation, knowing the props computed until `time`
+        """
+        return math.inf
+
+    def score(self, trajectory: dict):
+        """
+        Computes the fitness and the props of a whole recorded trajectory at
+        once, given as a dict of columns (see `Trajectory.as_dict`). The
+        result is the same as calling `compute` after each step.
+        """
+        raise NotImplementedError
+
+    def _scored_steps(self, trajectory: dict):
+        """
+        Returns the steps scored in `trajectory`: the rollout stops at the
+        first step where the trunk or the legs touch the ground
+        """
+        hit = trajectory["trunk_hit_ground"] | trajectory["legs_hit_ground"]
+        steps = np.arange(1, len(hit))
+        done = np.flatnonzero(hit[1:])
+        if len(done):
+            steps = steps[: done[0] + 1]
+        return steps
+
+    def state(self):
+        """Returns what was computed so far, to be restored with `restore`"""
+        return dict(self._props), self._fitness, self._done
+
+    def restore(self, state: tuple):
+        props, self._fitness, self._done = state
+        self._props = dict(props)
+
 
 class WalkingFitnessV0(Fitness):
     @property
@@ -53,15 +100,14 @@ class WalkingFitnessV0(Fitness):
 
     def compute(
         self,
-        last_observation: dict,
-        observations: list,
+        observations: Trajectory,
         forces: list,
         time: float,
     ):
         # If the trunk touches the ground, alive_bonus is negative and stops sim
         if (
-            not last_observation["trunk_hit_ground"]
-            and not last_observation["legs_hit_ground"]
+            not observations.trunk_hit_ground[-1]
+            and not observations.legs_hit_ground[-1]
         ):
             self._props["alive_bonus"] += 0.5
         else:
@@ -69,26 +115,44 @@ class WalkingFitnessV0(Fitness):
             self._done = True
 
         # Penalties for discouraging the joints to be stuck at their limit
-        #  self._props["joints_at_limits"] += (-0.01 * last_observation["joints_at_limits"])
+        #  self._props["joints_at_limits"] += (-0.01 * observations.joints_at_limits[-1])
 
         # Values like the distance and speed will simply replace the one from
         # the previous observations instead of being added. The reward is then
         # calculated by adding all the values from the _props attribute.
         # Other value like the height diff and walk_straight also follow the same
         # logic.
-        #  self._props["distance"] += last_observation["distance"]
-        self._props["speed"] += last_observation["distance"] / time
-        self._props["height_diff"] += 0.1 * (
-            (last_observation["position"][1] - observations[0]["position"][1])
-        )
-        self._props["distance"] += last_observation["distance"] // 2
-        #  self._props["walk_straight"] = -3 * (
-        #      last_observation["position"][2] ** 2
-        #  )
+        #  self._props["distance"] += observations.distance[-1]
+        position = observations.position
+        distance = observations.distance[-1]
+        self._props["speed"] += distance / time
+        self._props["height_diff"] += 0.1 * (position[-1, 1] - position[0, 1])
+        self._props["distance"] += distance // 2
+        #  self._props["walk_straight"] = -3 * (position[-1, 2] ** 2)
 
         self._props["forces"] = -0.2 * abs((sum(forces)))
         self._fitness = sum(self._props.values())
 
+    def score(self, trajectory: dict):
+        props = dict.fromkeys(self.props_range.keys(), 0.0)
+        steps = self._scored_steps(trajectory)
+        if len(steps) == 0:
+            return sum(props.values()), props
+
+        hit = trajectory["trunk_hit_ground"] | trajectory["legs_hit_ground"]
+        distance = trajectory["distance"][steps]
+        height = trajectory["position"][steps, 1]
+        props["alive_bonus"] = _running_sum(np.where(hit[steps], -0.5, 0.5))
+        props["speed"] = _running_sum(distance / trajectory["time"][steps])
+        props["height_diff"] = _running_sum(
+            0.1 * (height - trajectory["position"][0, 1])
+        )
+        props["distance"] = _running_sum(distance // 2)
+        props["forces"] = -0.2 * abs(
+            _running_sum(trajectory["actions"][steps[-1]])
+        )
+        return sum(props.values()), props
+
 
 class WalkingFitnessV1(Fitness):
     @property
@@ -104,16 +168,13 @@ class WalkingFitnessV1(Fitness):
 
     def compute(
         self,
-        last_observation: dict,
-        observations: list,
+        observations: Trajectory,
         forces: list,
         time: float,
     ):
+        position = observations.position
         if len(observations) >= 2:
-            if (
-                last_observation["position"][0]
-                > observations[-2]["position"][0]
-            ):
+            if position[-1, 0] > position[-2, 0]:
                 self._props["forward_bonus"] += 0.02
             else:
                 self._props["forward_bonus"] -= 0.05 * (
@@ -122,21 +183,59 @@ class WalkingFitnessV1(Fitness):
 
         self._props["alive_bonus"] += self._timestep / 5
         if (
-            last_observation["trunk_hit_ground"]
-            or last_observation["legs_hit_ground"]
+            observations.trunk_hit_ground[-1]
+            or observations.legs_hit_ground[-1]
         ):
             self._done = True
 
         target = 0.8333  # 3km/h
-        distance = last_observation["distance"]
+        distance = observations.distance[-1]
         self._props["speed"] = distance / time
         self._props["speed_gap"] = 3 * -abs(target - (distance / time))
         self._props["height_diff"] = -10 * abs(
-            last_observation["position"][1] - observations[0]["position"][1]
+            position[-1, 1] - position[0, 1]
         )
-        self._props["walk_straight"] = -abs(last_observation["position"][2])
+        self._props["walk_straight"] = -abs(position[-1, 2])
         self._fitness = sum(self._props.values())
 
+    def score(self, trajectory: dict):
+        props = dict.fromkeys(self.props_range.keys(), 0.0)
+        steps = self._scored_steps(trajectory)
+        if len(steps) == 0:
+            return sum(props.values()), props
+
+        position = trajectory["position"]
+        time = trajectory["time"][steps]
+        forward = position[steps, 0] > position[steps - 1, 0]
+        props["forward_bonus"] = _running_sum(
+            np.where(forward, 0.02, -(0.05 * (1 - (time / self._duration))))
+        )
+        props["alive_bonus"] = _running_sum(
+            np.full(len(steps), self._timestep / 5)
+        )
+
+        last = steps[-1]
+        target = 0.8333  # 3km/h
+        speed = trajectory["distance"][last] / trajectory["time"][last]
+        props["speed"] = speed
+        props["speed_gap"] = 3 * -abs(target - speed)
+        props["height_diff"] = -10 * abs(position[last, 1] - position[0, 1])
+        props["walk_straight"] = -abs(position[last, 2])
+        return sum(props.values()), props
+
+    def upper_bound(self, time: float):
+        # Bonuses can at most grow by their increment at each remaining step,
+        # the speed is assumed to stay in its range and the other props are
+        # never positive.
+        remaining_steps = math.ceil((self._duration - time) / self._timestep)
+        remaining_steps = max(0, remaining_steps) + 1
+        return (
+            self._props["forward_bonus"]
+            + self._props["alive_bonus"]
+            + remaining_steps * (0.02 + self._timestep / 5)
+            + self.props_range["speed"][1]
+        )
+
 
 fitnesses: t.Mapping[str, Fitness] = {
     "walking-v0": WalkingFitnessV0,
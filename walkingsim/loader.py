@@ -15,6 +15,13 @@ import os
 
 from loguru import logger
 
+# Physical properties of an environment when its file does not set them. The
+# friction is the one of the ground, the friction of a contact being the
+# lowest of its two materials (0.5 for the creature), and is left to the
+# default of Chrono's materials.
+default_gravity = (0, -9.81, 0)
+default_friction = 0.6
+
 
 class EnvironmentProps:
     """
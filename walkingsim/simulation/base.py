@@ -1,5 +1,13 @@
+import math
+
+import numpy as np
+
 from walkingsim.envs.chrono import ChronoEnvironment
 from walkingsim.fitness import fitnesses
+from walkingsim.simulation.snapshots import SnapshotCache
+
+# Rules that can end a rollout before the end of its duration
+early_stopping_rules = ["stagnation", "tilt", "bound"]
 
 
 class BaseSimulation:
@@ -13,28 +21,81 @@ class BaseSimulation:
         timestep: float = 1e-2,
         duration: float = 5,
         ending_delay: float = 0,
+        substeps: int = 1,
+        stagnation_window: float = 0,
+        stagnation_distance: float = 0.05,
+        max_tilt: float = 0,
+        snapshot_cache_size: float = 0,
+        snapshot_interval: float = 0.5,
+        record_poses: bool = False,
+        extra_fitnesses: list = None,
     ) -> None:
         self._env_props = env_props
-        self._environment = ChronoEnvironment(
-            visualize=visualize, creature=creature
-        )
         self._render_in_step = visualize
         self._gain = gain
         self._timestep = timestep
         self._duration = duration
         self._ending_delay = ending_delay
 
+        # Each action is held for `substeps` physics timesteps, observations
+        # and rewards are thus computed once per control period
+        self._substeps = max(1, substeps)
+        self._control_timestep = self._timestep * self._substeps
+
+        # Early stopping of the rollouts, see `_early_stopping_rule`
+        self._stagnation_steps = 0
+        if stagnation_window > 0:
+            self._stagnation_steps = math.ceil(
+                stagnation_window / self._control_timestep
+            )
+        self._stagnation_distance = stagnation_distance
+        self._min_upright = -math.inf
+        if max_tilt > 0:
+            self._min_upright = math.cos(math.radians(max_tilt))
+        self._fitness_threshold = None
+        self._stop_rule = None
+
+        # Snapshots of the previous rollouts (`snapshot_cache_size` MB), to
+        # resume the rollouts sharing the beginning of their actions
+        self._snapshots = None
+        if snapshot_cache_size > 0 and not visualize and ending_delay <= 0:
+            self._snapshots = SnapshotCache(
+                int(snapshot_cache_size * 2**20),
+                math.ceil(snapshot_interval / self._control_timestep),
+            )
+        self._rollout_snapshots = []
+        self._resumed_step = 0
+
+        self._environment = ChronoEnvironment(
+            visualize=visualize,
+            creature=creature,
+            max_steps=math.ceil(duration / self._control_timestep) + 1,
+            record_poses=record_poses,
+        )
+
+        # The fitness drives the rollouts (end, early stopping), the extra
+        # fitnesses are only scored on their trajectory once they are over
+        self._fitness = self._new_fitness(fitness)
+        self._extra_fitnesses = {
+            name: self._new_fitness(name) for name in extra_fitnesses or []
+        }
+
+    def _new_fitness(self, fitness: str):
         fitness_cls = fitnesses.get(fitness, None)
         if fitness_cls is None:
             raise RuntimeError(
                 f"Fitness `{fitness}` is invalid, possible values are `{fitnesses.keys()}`"
             )
-        self._fitness = fitness_cls(self._duration, self._timestep)
+        return fitness_cls(self._duration, self._control_timestep)
 
     @property
     def creature_shape(self):
         return self._environment.creature_shape
 
+    @property
+    def trajectory(self):
+        return self._environment.observations
+
     @property
     def reward_props(self):
         return self._fitness.props
@@ -43,6 +104,48 @@ class BaseSimulation:
     def reward(self):
         return self._fitness.fitness
 
+    @property
+    def extra_fitnesses(self):
+        return list(self._extra_fitnesses)
+
+    def extra_rewards(self, trajectory: dict = None):
+        """
+        Returns the reward and the props of the last rollout for each extra
+        fitness, scored at once on its `trajectory` (the one recorded by
+        default): one pass of physics gives all of them.
+        """
+        if not self._extra_fitnesses:
+            return {}
+        if trajectory is None:
+            trajectory = self.trajectory.as_dict()
+        return {
+            name: fitness.score(trajectory)
+            for name, fitness in self._extra_fitnesses.items()
+        }
+
+    @property
+    def stop_rule(self):
+        """Early stopping rule which ended the last rollout, if any"""
+        return self._stop_rule
+
+    @property
+    def time_cut(self):
+        """Simulated time saved by the early stopping of the last rollout"""
+        if self._stop_rule is None:
+            return 0
+
+        return max(0, self._duration - self._environment.time)
+
+    @property
+    def snapshots(self):
+        """Cache of snapshots of the rollouts, if enabled"""
+        return self._snapshots
+
+    @property
+    def resumed_step(self):
+        """Number of steps of the last rollout restored from a snapshot"""
+        return self._resumed_step
+
     def is_closed(self):
         return self._environment.closed
 
@@ -60,7 +163,9 @@ class BaseSimulation:
         return self._get_observations(), self._get_info()
 
     def step(self, action):
-        self._environment.step(action * self._gain, self._timestep)
+        self._environment.step(
+            action * self._gain, self._timestep, self._substeps
+        )
         self._compute_step_reward(action * self._gain)
 
         if self._render_in_step:
@@ -74,6 +179,51 @@ class BaseSimulation:
             self._get_info(),
         )
 
+    def rollout(self, actions, fitness_threshold: float = None):
+        """
+        Runs a whole simulation driven by the open-loop `actions`, looping
+        over its rows, and stops as soon as the simulation is over (or the
+        window closed when rendering).
+
+        The rollout is also stopped early when the creature stops moving
+        forward, tilts too much, or when its fitness can no longer reach
+        `fitness_threshold`.
+
+        When the snapshots are enabled, the rollout starts from the latest
+        snapshot of a previous rollout whose actions were the same until
+        then.
+
+        Returns the trajectory and the final reward.
+        """
+        self._fitness_threshold = fitness_threshold
+        self._stop_rule = None
+        self._rollout_snapshots = []
+        self._resumed_step = 0
+        self.reset()
+        if self._snapshots is not None:
+            snapshot = self._snapshots.lookup(np.asarray(actions))
+            if snapshot is not None:
+                self._resume(*snapshot)
+
+        if not self.is_over():
+            self._environment.rollout(
+                np.asarray(actions) * self._gain,
+                self._timestep,
+                self._duration + max(self._ending_delay, 0),
+                self._on_rollout_step,
+                self._substeps,
+                self._resumed_step,
+            )
+
+        if self._snapshots is not None:
+            self._snapshots.add(
+                actions,
+                self._rollout_snapshots,
+                self.trajectory.as_dict(),
+                self.reward,
+            )
+        return self.trajectory, self.reward
+
     def render(self):
         self._environment.render()
 
@@ -81,14 +231,69 @@ class BaseSimulation:
         self._environment.close()
 
     # Common private methods
+    def _resume(self, step, environment_state, fitness_state, trajectory):
+        self._environment.load_state(environment_state)
+        self.trajectory.restore(trajectory, step + 1)
+        self._fitness.restore(fitness_state)
+        self._resumed_step = step
+
+    def _on_rollout_step(self, trajectory, forces, time):
+        self._fitness.compute(trajectory, forces, time)
+        if self._render_in_step:
+            self.render()
+            if self.is_closed():
+                return True
+
+        self._stop_rule = self._early_stopping_rule(trajectory, time)
+        if self._stop_rule is not None:
+            return True
+
+        if self.is_over():
+            return True
+
+        step = len(trajectory) - 1
+        if (
+            self._snapshots is not None
+            and step % self._snapshots.interval == 0
+        ):
+            self._rollout_snapshots.append(
+                (step, self._environment.save_state(), self._fitness.state())
+            )
+        return False
+
+    def _early_stopping_rule(self, trajectory, time):
+        """
+        Returns the early stopping rule met at the last step of `trajectory`,
+        if any:
+            - stagnation: the creature moved forward by less than
+                `stagnation_distance` during the last `stagnation_window`
+            - tilt: the trunk is tilted by more than `max_tilt` degrees
+            - bound: the upper bound of the fitness is below the threshold
+        """
+        steps = self._stagnation_steps
+        if steps and len(trajectory) > steps:
+            distance = trajectory.distance
+            progress = distance[-1] - distance[-1 - steps]
+            if progress < self._stagnation_distance:
+                return "stagnation"
+
+        if trajectory.upright[-1] < self._min_upright:
+            return "tilt"
+
+        if (
+            self._fitness_threshold is not None
+            and self._fitness.upper_bound(time) < self._fitness_threshold
+        ):
+            return "bound"
+
+        return None
+
     def _compute_step_reward(self, forces):
         observations = self._environment.observations
         if len(observations) == 0:
             return 0
 
-        last_observations = observations[-1]
         self._fitness.compute(
-            last_observations,
             observations,
             forces,
             self._environment.time,
@@ -106,7 +311,7 @@ class BaseSimulation:
 
         # Add additional delay at end of sim
         if self._ending_delay > 0:
-            self._ending_delay -= self._timestep
+            self._ending_delay -= self._control_timestep
             is_over = False
 
         return is_over
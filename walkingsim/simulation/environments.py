@@ -0,0 +1,111 @@
+"""
+Sets of environments in which each genome is evaluated, and combination of
+its results in all of them into one fitness.
+"""
+import math
+
+import numpy as np
+
+from walkingsim.loader import default_friction, default_gravity
+
+aggregations = ["mean", "min", "cvar"]
+
+# Props summed over the environments instead of being averaged: they count
+# the simulated time and steps saved
+_summed_props = ("time_cut", "snapshot_steps")
+
+
+def perturb_environments(
+    environments: list,
+    samples: int = 0,
+    friction: float = 0,
+    gravity: float = 0,
+    mass: float = 0,
+    seed: int = 0,
+):
+    """
+    Returns `samples` variants of each of the `(name, props)` environments,
+        whose friction of the ground, gravity and masses of the creature are
+        scaled by a random factor within `1 ± friction`, `1 ± gravity` and
+        `1 ± mass`.
+
+    The variants are drawn once from `seed`, so that a genome is evaluated
+        in the same worlds during the whole training: they are built only once
+        and its fitness can be cached. Without samples, the environments are
+        returned as is.
+    """
+    if samples <= 0:
+        return list(environments)
+
+    rng = np.random.default_rng(seed)
+    variants = []
+    for name, props in environments:
+        for sample in range(samples):
+            scales = 1 + rng.uniform(-1, 1, 3) * (friction, gravity, mass)
+            variant = dict(props)
+            variant["friction"] = float(
+                props.get("friction", default_friction) * scales[0]
+            )
+            variant["gravity"] = [
+                float(g * scales[1])
+                for g in props.get("gravity", default_gravity)
+            ]
+            variant["mass_scale"] = float(
+                props.get("mass_scale", 1) * scales[2]
+            )
+            variants.append((f"{name}-{sample}", variant))
+    return variants
+
+
+def aggregate(fitnesses, aggregation: str = "mean", cvar_alpha: float = 0.25):
+    """
+    Combines the fitness of a genome in each environment into one.
+
+    aggregation: mean | min | cvar
+        - mean: mean fitness over the environments
+        - min: fitness in the worst environment
+        - cvar: mean fitness over the worst `cvar_alpha` fraction of the
+            environments (conditional value at risk)
+    """
+    fitnesses = np.sort(np.asarray(fitnesses, dtype=float))
+    if aggregation == "min":
+        return float(fitnesses[0])
+    if aggregation == "cvar":
+        worst = max(1, math.ceil(cvar_alpha * len(fitnesses)))
+        return float(np.mean(fitnesses[:worst]))
+    return float(np.mean(fitnesses))
+
+
+def combine_results(
+    results: list,
+    names: list,
+    aggregation: str = "mean",
+    cvar_alpha: float = 0.25,
+):
+    """
+    Combines the `(fitness, props)` of a genome in each of the `names`
+        environments into one, see `aggregate`.
+
+    The props are averaged over the environments, except the time and the
+        steps saved which are summed, and the early stopping rule which is
+        the first one met. The fitness in each environment is kept as
+        `fitness.<name>`.
+    """
+    fitness = aggregate([f for f, _ in results], aggregation, cvar_alpha)
+
+    values = {}
+    for _, props in results:
+        for prop, value in props.items():
+            values.setdefault(prop, []).append(value)
+
+    combined = {}
+    for prop, prop_values in values.items():
+        if prop == "early_stop":
+            combined[prop] = prop_values[0]
+        elif prop in _summed_props:
+            combined[prop] = sum(prop_values)
+        else:
+            combined[prop] = float(np.mean(prop_values))
+    for name, (env_fitness, _) in zip(names, results):
+        combined[f"fitness.{name}"] = env_fitness
+    return fitness, combined
@@ -1,4 +1,4 @@
-from walkingsim.simulation.base import BaseSimulation
+from walkingsim.simulation.base import BaseSimulation, early_stopping_rules
 
 
 class GA_Simulation(BaseSimulation):
@@ -11,6 +11,14 @@ class GA_Simulation(BaseSimulation):
         timestep: float = 5e-3,
         duration: float = 10,
         ending_delay: float = 0,
+        substeps: int = 1,
+        stagnation_window: float = 0,
+        stagnation_distance: float = 0.05,
+        max_tilt: float = 0,
+        snapshot_cache_size: float = 0,
+        snapshot_interval: float = 0.5,
+        record_trajectory: bool = False,
+        extra_fitnesses: list = None,
     ) -> None:
         super().__init__(
             env_props,
@@ -21,9 +29,57 @@ class GA_Simulation(BaseSimulation):
             timestep,
             duration,
             ending_delay,
+            substeps,
+            stagnation_window,
+            stagnation_distance,
+            max_tilt,
+            snapshot_cache_size,
+            snapshot_interval,
+            record_poses=record_trajectory,
+            extra_fitnesses=extra_fitnesses,
         )
+        self._record_trajectory = record_trajectory
 
     @property
     def genome_discrete_intervals(self):
-        _timesteps_to_second = 1 / self._timestep
+        _timesteps_to_second = 1 / self._control_timestep
         return int(_timesteps_to_second * self._duration)
+
+    def evaluate(self, actions, fitness_threshold: float = None):
+        """
+        Runs a whole simulation, looping over the rows of `actions` until the
+        simulation is over, and returns the reward and its props.
+
+        When the simulation was stopped early, the props also hold the index
+        of the rule in `early_stopping_rules` (`early_stop`) and the
+        simulated time saved (`time_cut`).
+
+        When the snapshots are enabled, the props also hold the number of
+        steps restored from a snapshot (`snapshot_steps`).
+
+        With `record_trajectory`, the props also hold a copy of the columns
+        of the trajectory (`trajectory`), with the poses of the bodies.
+
+        With extra fitnesses, the props also hold the reward of each one
+        (`<name>`) and its props (`<name>.<prop>`).
+        """
+        self.rollout(actions, fitness_threshold)
+        props = dict(self.reward_props)
+        trajectory = None
+        if self._record_trajectory or self.extra_fitnesses:
+            trajectory = self.trajectory.as_dict()
+        for name, (reward, reward_props) in self.extra_rewards(
+            trajectory
+        ).items():
+            props[name] = reward
+            for prop, value in reward_props.items():
+                props[f"{name}.{prop}"] = value
+        if self.stop_rule is not None:
+            props["early_stop"] = early_stopping_rules.index(self.stop_rule)
+            props["time_cut"] = self.time_cut
+        if self.snapshots is not None:
+            props["snapshot_steps"] = self.resumed_step
+        if self._record_trajectory:
+            props["trajectory"] = trajectory
+
+        return self.reward, props
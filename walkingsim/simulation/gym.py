@@ -16,6 +16,8 @@ class Gym_Simulation(BaseSimulation, gym.Env):
         timestep: float = 1e-2,
         duration: float = 5,
         ending_delay: float = 0,
+        substeps: int = 1,
+        record_poses: bool = False,
     ) -> None:
         BaseSimulation.__init__(
             self,
@@ -27,6 +29,8 @@ class Gym_Simulation(BaseSimulation, gym.Env):
             timestep,
             duration,
             ending_delay,
+            substeps,
+            record_poses=record_poses,
         )
         gym.Env.__init__(self)
 
@@ -51,7 +55,12 @@ class Gym_Simulation(BaseSimulation, gym.Env):
         return obs_dict
 
     def _get_info(self):
-        return BaseSimulation._get_info(self)
+        # Views on the last row of the trajectory, they are only valid until
+        # the next reset
+        info = BaseSimulation._get_info(self)
+        info["position"] = self.trajectory.position[-1]
+        info["motor_rotations"] = self.trajectory.motor_rotations[-1]
+        return info
 
     def reset(self, **kwargs):
         gym.Env.reset(self, **kwargs)
@@ -0,0 +1,199 @@
+import multiprocessing as mp
+
+from walkingsim.simulation.ga import GA_Simulation
+
+
+class _Simulations:
+    """
+    Simulations of a process, one per fidelity and environment. A fidelity
+    is a tuple of `(name, value)` pairs overriding the arguments of the
+    simulation (e.g. a shorter duration), and an environment is the index of
+    the properties of its world in `environments`. `None` stands for the
+    simulation built from `sim_kwargs`.
+
+    Each simulation is built the first time it is needed and then reused, so
+    that each world is only built once.
+    """
+
+    def __init__(
+        self,
+        sim_kwargs: dict,
+        simulation: GA_Simulation = None,
+        environments: list = None,
+    ) -> None:
+        self._sim_kwargs = sim_kwargs
+        self._environments = environments or []
+        self._simulations = {}
+        if simulation is not None:
+            self._simulations[None, None] = simulation
+
+    def get(
+        self, fidelity: tuple = None, environment: int = None
+    ) -> GA_Simulation:
+        simulation = self._simulations.get((fidelity, environment), None)
+        if simulation is None:
+            kwargs = {**self._sim_kwargs, **dict(fidelity or ())}
+            if environment is not None:
+                kwargs["env_props"] = self._environments[environment]
+            simulation = GA_Simulation(**kwargs)
+            self._simulations[fidelity, environment] = simulation
+        return simulation
+
+    def prebuild(self):
+        """Builds the full simulation of each environment"""
+        for environment in range(len(self._environments)) or [None]:
+            self.get(environment=environment)
+
+    def evaluate(self, job):
+        fidelity, environment, actions, fitness_threshold = job
+        return self.get(fidelity, environment).evaluate(
+            actions, fitness_threshold
+        )
+
+
+# Simulations owned by a worker process. They are built only once and then
+# reused for every evaluation sent to this worker.
+_simulations: _Simulations = None
+
+
+def _init_worker(sim_kwargs: dict, environments: list):
+    global _simulations
+    _simulations = _Simulations(sim_kwargs, environments=environments)
+    _simulations.prebuild()
+
+
+def _evaluate(job):
+    return _simulations.evaluate(job)
+
+
+class SimulationPool:
+    """
+    Evaluates actions matrices with a pool of worker processes, each of them
+    owning its own persistent simulation.
+
+    When a single worker is requested, no process is spawned and the
+    evaluations are done in the current process, with `simulation` if given.
+
+    Each process also keeps a simulation per fidelity requested and per
+    environment of `environments` (properties of the worlds, overriding the
+    `env_props` of `sim_kwargs`), see `_Simulations`.
+    """
+
+    def __init__(
+        self,
+        sim_kwargs: dict,
+        workers: int = 1,
+        simulation: GA_Simulation = None,
+        environments: list = None,
+    ) -> None:
+        self._workers = max(1, workers)
+        self._environments = list(environments or [])
+        self._pool = None
+        self._simulations = None
+
+        if self._workers > 1:
+            # Chrono worlds are not meant to be shared with a forked process,
+            # so workers are spawned and build their simulation from scratch.
+            context = mp.get_context("spawn")
+            self._pool = context.Pool(
+                self._workers,
+                initializer=_init_worker,
+                initargs=(sim_kwargs, self._environments),
+            )
+        else:
+            self._simulations = _Simulations(
+                sim_kwargs, simulation, self._environments
+            )
+            self._simulations.prebuild()
+
+    @property
+    def workers(self):
+        return self._workers
+
+    def imap(
+        self, jobs, fidelity: tuple = None, fitness_threshold: float = None
+    ):
+        """
+        Evaluates every actions matrix in `jobs` and yields the
+        `(reward, reward_props)` of each of them, in the same order as `jobs`,
+        as soon as they are available.
+
+        The simulations which can no longer reach `fitness_threshold` are
+        stopped early.
+        """
+        jobs = (
+            (fidelity, None, actions, fitness_threshold) for actions in jobs
+        )
+        return self._imap(jobs)
+
+    def imap_environments(
+        self, jobs, fidelity: tuple = None, fitness_threshold: float = None
+    ):
+        """
+        Like `imap`, but evaluates every actions matrix in each environment,
+        and yields the list of the `(reward, reward_props)` of each actions
+        matrix in all the environments. The evaluations of all the actions
+        matrices in all the environments are spread over the workers at once.
+        """
+        environments = range(len(self._environments))
+        jobs = (
+            (fidelity, environment, actions, fitness_threshold)
+            for actions in jobs
+            for environment in environments
+        )
+        results = []
+        for result in self._imap(jobs):
+            results.append(result)
+            if len(results) == len(environments):
+                yield results
+                results = []
+
+    def _imap(self, jobs):
+        if self._pool is None:
+            return map(self._simulations.evaluate, jobs)
+
+        return self._pool.imap(_evaluate, jobs)
+
+    def submit(
+        self,
+        actions,
+        callback,
+        error_callback,
+        fidelity: tuple = None,
+        fitness_threshold: float = None,
+    ):
+        """
+        Evaluates `actions` in the background and calls `callback` with its
+        `(reward, reward_props)` once it is done, or `error_callback` with
+        the exception raised.
+
+        With a single worker, the evaluation is done right away and
+        `callback` is called before returning.
+        """
+        job = (fidelity, None, actions, fitness_threshold)
+        if self._pool is None:
+            try:
+                result = self._simulations.evaluate(job)
+            except Exception as e:
+                error_callback(e)
+            else:
+                callback(result)
+            return
+
+        self._pool.apply_async(
+            _evaluate,
+            (job,),
+            callback=callback,
+            error_callback=error_callback,
+        )
+
+    def close(self, terminate: bool = False):
+        if self._pool is None:
+            return
+
+        if terminate:
+            self._pool.terminate()
+        else:
+            self._pool.close()
+        self._pool.join()
+        self._pool = None
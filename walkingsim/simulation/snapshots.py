@@ -0,0 +1,85 @@
+import numpy as np
+
+
+class _Rollout:
+    """Snapshots taken along one rollout, with its actions and trajectory"""
+
+    def __init__(self, actions, snapshots: list, trajectory: dict, fitness):
+        self.actions = actions
+        self.snapshots = snapshots
+        self.trajectory = trajectory
+        self.fitness = fitness
+        self.nbytes = (
+            actions.nbytes
+            + sum(column.nbytes for column in trajectory.values())
+            + sum(state.nbytes + 64 * len(f[0]) for _, state, f in snapshots)
+        )
+
+
+class SnapshotCache:
+    """
+    States reached along previous rollouts, taken every `interval` steps, so
+    that a rollout whose actions start like one of them resumes from the
+    last snapshot before their first difference instead of from t=0.
+
+    A snapshot taken after `step` steps is usable by the actions whose rows
+    applied during these steps are the same. When the memory used goes over
+    `max_bytes`, the rollouts with the lowest fitness are evicted first: the
+    best ones, whose offspring are the most likely to share their prefix,
+    are kept.
+    """
+
+    def __init__(self, max_bytes: int, interval: int) -> None:
+        self.interval = max(1, interval)
+        self._max_bytes = max_bytes
+        self._rollouts = []
+        self._nbytes = 0
+
+    def __len__(self):
+        return len(self._rollouts)
+
+    @property
+    def nbytes(self):
+        return self._nbytes
+
+    def lookup(self, actions):
+        """
+        Returns the latest snapshot usable by `actions`, as a tuple of the
+            number of steps done, the state of the environment, the state of
+            the fitness and the trajectory so far, or None.
+        """
+        best = None
+        for rollout in self._rollouts:
+            if rollout.actions.shape != actions.shape or not rollout.snapshots:
+                continue
+
+            different = np.any(rollout.actions != actions, axis=1)
+            # Number of steps during which the same rows were applied
+            same_steps = np.argmax(different) if different.any() else np.inf
+            for step, state, fitness in reversed(rollout.snapshots):
+                if step <= same_steps:
+                    if best is None or step > best[0]:
+                        best = (step, state, fitness, rollout.trajectory)
+                    break
+        return best
+
+    def add(self, actions, snapshots: list, trajectory: dict, fitness):
+        """
+        Keeps the `(step, environment state, fitness state)` snapshots of a
+        rollout of `actions`, which ended with `trajectory` and `fitness`.
+        """
+        if not snapshots:
+            return
+
+        rollout = _Rollout(
+            np.array(actions, dtype=float), snapshots, trajectory, fitness
+        )
+        if rollout.nbytes > self._max_bytes:
+            return
+
+        self._rollouts.append(rollout)
+        self._nbytes += rollout.nbytes
+        if self._nbytes > self._max_bytes:
+            self._rollouts.sort(key=lambda r: r.fitness, reverse=True)
+            while self._nbytes > self._max_bytes:
+                self._nbytes -= self._rollouts.pop().nbytes
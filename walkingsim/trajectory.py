@@ -0,0 +1,172 @@
+import numpy as np
+
+
+class Trajectory:
+    """
+    Preallocated columnar buffer of the observations gathered at each step of
+    a simulation.
+
+    Each column is a NumPy array allocated once for `capacity` steps (the
+    buffer grows if more steps are recorded). The properties return views on
+    the rows recorded so far, without copying them, so they must not be
+    kept after the next `clear`.
+
+    With `bodies`, the poses (position and orientation quaternion) of that
+    many bodies are also recorded at each step, to play the trajectory back.
+    """
+
+    def __init__(self, capacity: int, motors: int, bodies: int = 0) -> None:
+        self._size = 0
+        self._motors = motors
+        self._bodies = bodies
+        self._allocate(max(1, capacity))
+
+    def _allocate(self, capacity: int):
+        self._time = np.zeros(capacity)
+        self._position = np.zeros((capacity, 3))
+        self._orientation = np.zeros((capacity, 4))
+        self._motor_rotations = np.zeros((capacity, self._motors))
+        self._distance = np.zeros(capacity)
+        self._joints_at_limits = np.zeros(capacity, dtype=np.int32)
+        self._trunk_hit_ground = np.zeros(capacity, dtype=bool)
+        self._legs_hit_ground = np.zeros(capacity, dtype=bool)
+        self._upright = np.ones(capacity)
+        self._actions = np.zeros((capacity, self._motors))
+        self._poses = np.zeros((capacity, self._bodies, 7))
+
+    def _grow(self):
+        columns = self._columns()
+        self._allocate(2 * len(self._time))
+        for name, column in columns.items():
+            getattr(self, f"_{name}")[: self._size] = column
+
+    def _columns(self):
+        columns = {
+            "time": self.time,
+            "position": self.position,
+            "orientation": self.orientation,
+            "motor_rotations": self.motor_rotations,
+            "distance": self.distance,
+            "joints_at_limits": self.joints_at_limits,
+            "trunk_hit_ground": self.trunk_hit_ground,
+            "legs_hit_ground": self.legs_hit_ground,
+            "upright": self.upright,
+            "actions": self.actions,
+        }
+        if self._bodies:
+            columns["poses"] = self.poses
+        return columns
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def capacity(self):
+        return len(self._time)
+
+    # Columns
+    @property
+    def time(self):
+        return self._time[: self._size]
+
+    @property
+    def position(self):
+        return self._position[: self._size]
+
+    @property
+    def orientation(self):
+        """Quaternion (e0, e1, e2, e3) of the orientation of the trunk"""
+        return self._orientation[: self._size]
+
+    @property
+    def motor_rotations(self):
+        return self._motor_rotations[: self._size]
+
+    @property
+    def distance(self):
+        """Distance travelled along the x axis since the first step"""
+        return self._distance[: self._size]
+
+    @property
+    def joints_at_limits(self):
+        return self._joints_at_limits[: self._size]
+
+    @property
+    def trunk_hit_ground(self):
+        return self._trunk_hit_ground[: self._size]
+
+    @property
+    def legs_hit_ground(self):
+        return self._legs_hit_ground[: self._size]
+
+    @property
+    def upright(self):
+        """
+        Cosine of the angle between the vertical axis of the trunk and the
+        vertical: 1 when upright, -1 when upside down
+        """
+        return self._upright[: self._size]
+
+    @property
+    def actions(self):
+        """
+        Actions applied to the motors during the step which led to each row
+        (0 for the initial state)
+        """
+        return self._actions[: self._size]
+
+    @property
+    def poses(self):
+        """
+        Position and orientation quaternion (x, y, z, e0, e1, e2, e3) of
+        each recorded body
+        """
+        return self._poses[: self._size]
+
+    # Methods
+    def clear(self):
+        self._size = 0
+
+    def append(
+        self,
+        time: float,
+        position: tuple,
+        motor_rotations: list,
+        joints_at_limits: int,
+        trunk_hit_ground: bool,
+        legs_hit_ground: bool,
+        upright: float = 1,
+        orientation: tuple = (1, 0, 0, 0),
+        poses: list = None,
+    ):
+        if self._size == len(self._time):
+            self._grow()
+
+        i = self._size
+        self._time[i] = time
+        self._position[i] = position
+        self._orientation[i] = orientation
+        self._motor_rotations[i] = motor_rotations
+        self._distance[i] = position[0] - self._position[0, 0]
+        self._joints_at_limits[i] = joints_at_limits
+        self._trunk_hit_ground[i] = trunk_hit_ground
+        self._legs_hit_ground[i] = legs_hit_ground
+        self._upright[i] = upright
+        self._actions[i] = 0
+        if poses is not None:
+            self._poses[i] = poses
+        self._size += 1
+
+    def restore(self, columns: dict, size: int):
+        """Replaces the rows by the first `size` rows of `columns`"""
+        while len(self._time) < size:
+            self._grow()
+        for name, column in columns.items():
+            getattr(self, f"_{name}")[:size] = column[:size]
+        self._size = size
+
+    def as_dict(self):
+        """Returns a copy of all the columns recorded so far"""
+        return {
+            name: column.copy() for name, column in self._columns().items()
+        }
@@ -1,20 +1,17 @@
 import csv
 import datetime as dt
+import glob
 import os
 import pickle
 import re
 import sys
 
+import numpy as np
 from loguru import logger
 
 
 class DataManager:
-    def __init__(
-        self
-            , group: str
-            , date: str = None
-            , fail_if_exists: bool = True
-    ):
+    def __init__(self, group: str, date: str = None):
         if date is None:
             date = dt.datetime.now().strftime("%Y%m%d-%H%M%S")
 
@@ -43,7 +40,12 @@ class DataManager:
             os.mkdir(self.__log_dir)
 
     def _ensure_data_dir(self):
+        if os.path.exists(self.__log_dir):
+            return
+
         if os.path.exists(self.__data_dir):
+            # Only sub-directories were created so far
+            os.mkdir(self.__log_dir)
             return
 
         self._create_data_dir()
@@ -55,6 +57,9 @@ class DataManager:
     def get_global_path(self, filename: str):
         return os.path.join(self.__root_dir, filename)
 
+    def get_log_path(self, filename: str):
+        return os.path.join(self.__log_dir, filename)
+
     # save
     def save_local_dat_file(self, filename: str, obj):
         self._ensure_data_dir()
@@ -63,6 +68,22 @@ class DataManager:
             pickle.dump(obj, fp)
             logger.info(f"Saved {obj} in {filepath}")
 
+    def save_checkpoint(self, filename: str, obj):
+        """
+        Saves `obj` atomically: it is written in a temporary file which then
+        replaces the previous checkpoint, so that an interruption never
+        leaves a truncated checkpoint behind.
+        """
+        self._ensure_data_dir()
+        filepath = self.get_local_path(filename)
+        tmp_filepath = f"{filepath}.tmp"
+        with open(tmp_filepath, "wb") as fp:
+            pickle.dump(obj, fp, protocol=pickle.HIGHEST_PROTOCOL)
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.replace(tmp_filepath, filepath)
+        logger.info(f"Saved checkpoint in {filepath}")
+
     def save_global_dat_file(self, filename: str, obj):
         self._ensure_data_dir()
         filepath = self.get_global_path(filename)
@@ -80,7 +101,52 @@ class DataManager:
                 writer.writeheader()
             writer.writerow(data)
 
+    def save_log_chunk(self, dirname: str, index: int, columns: dict):
+        """Saves a chunk of columns in the `dirname` directory of the logs"""
+        self._ensure_data_dir()
+        dir_path = os.path.join(self.__log_dir, dirname)
+        os.makedirs(dir_path, exist_ok=True)
+        file_path = os.path.join(dir_path, f"{index:06d}.npz")
+        np.savez(file_path, **columns)
+
+    def save_log_arrays(self, dirname: str, index: int, columns: dict):
+        """
+        Saves a chunk of columns as .npy files, which can be memory-mapped,
+        in the `dirname/<index>` directory of the logs
+        """
+        self._ensure_data_dir()
+        dir_path = os.path.join(self.__log_dir, dirname, f"{index:06d}")
+        os.makedirs(dir_path, exist_ok=True)
+        for name, column in columns.items():
+            np.save(os.path.join(dir_path, f"{name}.npy"), column)
+
     # load
+    def load_log_chunks(self, dirname: str):
+        """Loads all the chunks of columns saved in `dirname`, in order"""
+        pattern = os.path.join(self.__log_dir, dirname, "*.npz")
+        chunks = []
+        for file_path in sorted(glob.glob(pattern)):
+            with np.load(file_path) as chunk:
+                chunks.append(dict(chunk))
+
+        return chunks
+
+    def load_log_arrays(self, dirname: str):
+        """
+        Memory-maps all the chunks of columns saved in `dirname`, in order:
+        their rows are only read from the disk when accessed
+        """
+        pattern = os.path.join(self.__log_dir, dirname, "*", "")
+        chunks = []
+        for dir_path in sorted(glob.glob(pattern)):
+            chunk = {}
+            for file_path in glob.glob(os.path.join(dir_path, "*.npy")):
+                name = os.path.splitext(os.path.basename(file_path))[0]
+                chunk[name] = np.load(file_path, mmap_mode="r")
+            chunks.append(chunk)
+
+        return chunks
+
     def load_local_dat_file(self, filename: str):
         filepath = self.get_local_path(filename)
         with open(filepath, "rb") as fp:
@@ -89,6 +155,14 @@ class DataManager:
 
         return obj
 
+    def load_checkpoint(self, filename: str):
+        filepath = self.get_local_path(filename)
+        with open(filepath, "rb") as fp:
+            obj = pickle.load(fp)
+            logger.info(f"Loaded checkpoint from {filepath}")
+
+        return obj
+
     def load_global_dat_file(self, filename: str):
         filepath = self.get_global_path(filename)
         with open(filepath, "rb") as fp:
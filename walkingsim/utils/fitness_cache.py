@@ -0,0 +1,107 @@
+import collections
+import hashlib
+import json
+import os
+import shelve
+
+import numpy as np
+from loguru import logger
+
+
+class FitnessCache:
+    """
+    LRU cache of the fitness of the genomes already simulated.
+
+    Genomes are quantized on the grid of the gene space before being hashed,
+    along with everything else having an impact on the simulation (creature,
+    environment, fitness function, timestep, ...), so that the same
+    individual is never simulated twice.
+
+    When `path` is given, the entries are also stored on disk so that they
+    are shared between runs.
+    """
+
+    def __init__(
+        self,
+        context: dict,
+        step: float = None,
+        max_size: int = 10000,
+        path: str = None,
+    ) -> None:
+        self._step = step
+        self._max_size = max_size
+        self._entries = collections.OrderedDict()
+        self._store = None
+        if path is not None:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._store = shelve.open(path)
+            logger.info(f"Opened fitness cache {path}")
+
+        context = json.dumps(context, sort_keys=True, default=str)
+        self._context = hashlib.sha1(context.encode()).digest()
+
+        self._hits = 0
+        self._misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def key(self, genome) -> str:
+        genome = np.asarray(genome, dtype=np.float64)
+        if self._step:
+            genome = np.rint(genome / self._step).astype(np.int64)
+
+        digest = hashlib.sha1(self._context)
+        digest.update(genome.tobytes())
+        return digest.hexdigest()
+
+    def get(self, key: str):
+        """Returns the `(fitness, props)` stored for `key`, if any"""
+        value = self._entries.get(key, None)
+        if value is not None:
+            self._entries.move_to_end(key)
+        elif self._store is not None and key in self._store:
+            value = self._store[key]
+            self._insert(key, value)
+
+        if value is None:
+            self._misses += 1
+        else:
+            self._hits += 1
+        return value
+
+    def put(self, key: str, fitness: float, props: dict):
+        value = (fitness, props)
+        self._insert(key, value)
+        if self._store is not None:
+            self._store[key] = value
+
+    def entries(self):
+        """Returns the entries kept in memory, from the oldest to the newest"""
+        return list(self._entries.items())
+
+    def restore(self, entries: list):
+        """Adds `entries`, as returned by `entries`, to the cache"""
+        for key, value in entries:
+            self._insert(key, value)
+
+    def pop_stats(self):
+        """Returns the hits and misses since the last call"""
+        stats = {"hits": self._hits, "misses": self._misses}
+        self._hits = 0
+        self._misses = 0
+        return stats
+
+    def close(self):
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+
+    def _insert(self, key: str, value: tuple):
+        if self._max_size <= 0:
+            return
+
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
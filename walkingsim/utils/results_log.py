@@ -0,0 +1,133 @@
+import csv
+import glob
+import os
+
+import numpy as np
+
+from walkingsim.utils.data_manager import DataManager
+
+
+class ResultsLog:
+    """
+    In-memory buffer of the results of the evaluations.
+
+    The rows are kept in memory and written once per generation (on `flush`)
+    as a chunk of columns, in an append-only directory of .npz files of the
+    logs. The chunks can be read back as columns, to compute the statistics
+    of each generation, or exported as a CSV file.
+    """
+
+    _dirname = "results"
+
+    def __init__(self, dm: DataManager) -> None:
+        self._dm = dm
+        self._rows = []
+        chunks = os.path.join(dm.get_log_path(self._dirname), "*.npz")
+        self._chunks = len(glob.glob(chunks))
+
+    def __len__(self):
+        return len(self._rows)
+
+    def append(self, row: dict):
+        self._rows.append(row)
+
+    def flush(self):
+        """Writes the buffered rows as a new chunk"""
+        if not self._rows:
+            return
+
+        headers = []
+        for row in self._rows:
+            headers.extend(key for key in row if key not in headers)
+
+        columns = {
+            header: np.array(
+                [row.get(header, np.nan) for row in self._rows],
+                dtype=np.float64,
+            )
+            for header in headers
+        }
+        self._dm.save_log_chunk(self._dirname, self._chunks, columns)
+        self._chunks += 1
+        self._rows = []
+
+    # readback
+    def load(self):
+        """Returns all the flushed results, as a dict of columns"""
+        return load_results(self._dm)
+
+    def generation_stats(self):
+        return generation_stats(self.load())
+
+    def export_csv(self, filename: str = "results.csv"):
+        return export_csv(self._dm, filename)
+
+
+def load_results(dm: DataManager):
+    """Concatenates the chunks of results of a run into a dict of columns"""
+    chunks = dm.load_log_chunks(ResultsLog._dirname)
+
+    headers = []
+    for chunk in chunks:
+        headers.extend(key for key in chunk if key not in headers)
+
+    columns = {}
+    for header in headers:
+        columns[header] = np.concatenate(
+            [
+                chunk.get(header, np.full(_chunk_size(chunk), np.nan))
+                for chunk in chunks
+            ]
+        )
+    return columns
+
+
+def generation_stats(results: dict):
+    """
+    Returns the number of evaluations and the min, max, mean and standard
+    deviation of the total fitness of each generation, as a dict of columns.
+    """
+    if not results:
+        return {}
+
+    generations, inverse, counts = np.unique(
+        results["generation"], return_inverse=True, return_counts=True
+    )
+    fitness = results["total_fitness"]
+
+    order = np.argsort(inverse, kind="stable")
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    sorted_fitness = fitness[order]
+
+    mean = np.bincount(inverse, weights=fitness) / counts
+    square_mean = np.bincount(inverse, weights=fitness**2) / counts
+    return {
+        "generation": generations.astype(int),
+        "count": counts,
+        "min": np.minimum.reduceat(sorted_fitness, starts),
+        "max": np.maximum.reduceat(sorted_fitness, starts),
+        "mean": mean,
+        "std": np.sqrt(np.maximum(square_mean - mean**2, 0)),
+    }
+
+
+def export_csv(dm: DataManager, filename: str = "results.csv"):
+    """Writes all the results of a run in a CSV file of the logs"""
+    results = load_results(dm)
+    path = dm.get_log_path(filename)
+    with open(path, "w", newline="") as fp:
+        writer = csv.writer(fp)
+        writer.writerow(results.keys())
+        writer.writerows(zip(*(_csv_column(c) for c in results.values())))
+
+    return path
+
+
+def _chunk_size(chunk: dict):
+    return len(next(iter(chunk.values())))
+
+
+def _csv_column(column):
+    if np.all(np.isnan(column) | (column == np.rint(column))):
+        return ["" if np.isnan(v) else int(v) for v in column]
+    return column.tolist()
@@ -0,0 +1,85 @@
+import collections
+
+import numpy as np
+
+
+class RidgeSurrogate:
+    """
+    Ridge regression of the fitness on the genes, trained online from the
+    results of the simulations.
+
+    The model is solved in its dual form, whose cost depends on the number
+    of samples (at most `max_samples`, the most recent ones) rather than on
+    the number of genes. Besides the predicted fitness, `predict` returns
+    its standard deviation under the bayesian reading of ridge regression,
+    which is larger for the genomes far from the samples.
+    """
+
+    def __init__(
+        self,
+        alpha: float = 1.0,
+        max_samples: int = 500,
+        min_samples: int = 20,
+    ) -> None:
+        self._alpha = alpha
+        self._min_samples = min_samples
+        self._samples = collections.deque(maxlen=max_samples)
+        self._model = None
+
+    def __len__(self):
+        return len(self._samples)
+
+    @property
+    def ready(self):
+        return len(self._samples) >= self._min_samples
+
+    def add(self, genome, fitness: float):
+        self._samples.append((np.array(genome, dtype=float), float(fitness)))
+        self._model = None
+
+    def entries(self):
+        return list(self._samples)
+
+    def restore(self, entries: list):
+        self._samples.extend(entries)
+        self._model = None
+
+    def _fit(self):
+        genomes = np.array([genome for genome, _ in self._samples])
+        fitness = np.array([fitness for _, fitness in self._samples])
+        genomes_mean = genomes.mean(axis=0)
+        fitness_mean = fitness.mean()
+        centered = genomes - genomes_mean
+
+        # (K + alpha.I)^-1, K being the gram matrix of the samples
+        gram = centered @ centered.T
+        inverse = np.linalg.inv(gram + self._alpha * np.eye(len(gram)))
+        dual = inverse @ (fitness - fitness_mean)
+
+        # Noise variance, from the residuals and the effective degrees of
+        # freedom of the model
+        residuals = fitness - fitness_mean - gram @ dual
+        dof = np.trace(gram @ inverse)
+        noise = np.sum(residuals**2) / max(1.0, len(fitness) - dof)
+
+        self._model = (genomes_mean, fitness_mean, centered, dual, inverse)
+        self._noise = noise
+
+    def predict(self, genomes):
+        """
+        Returns the predicted fitness of `genomes` and its standard deviation
+        """
+        if self._model is None:
+            self._fit()
+        genomes_mean, fitness_mean, centered, dual, inverse = self._model
+
+        z = np.asarray(genomes, dtype=float) - genomes_mean
+        k = z @ centered.T
+        mean = fitness_mean + k @ dual
+
+        # x.(X'X + alpha.I)^-1.x, with the Woodbury identity
+        leverage = (
+            np.sum(z**2, axis=1) - np.einsum("ij,jk,ik->i", k, inverse, k)
+        ) / self._alpha
+        std = np.sqrt(self._noise * (1 + np.maximum(leverage, 0)))
+        return mean, std
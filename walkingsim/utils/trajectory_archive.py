@@ -0,0 +1,303 @@
+import bisect
+import collections
+import glob
+import os
+
+import numpy as np
+
+from walkingsim.fitness import fitnesses
+from walkingsim.utils.data_manager import DataManager
+
+retention_policies = ["all", "top", "elites"]
+
+# Resolution of the quantization of the float columns: number of steps per
+# unit (second, meter, radian, ...). The values are rounded down, so that
+# their sign and their floor division by the unit are kept: the fitness
+# functions are not continuous there (e.g. the `distance // 2` of
+# walking-v0).
+_resolutions = {
+    "time": 10**6,
+    "position": 10**6,
+    "orientation": 10**5,
+    "motor_rotations": 10**4,
+    "distance": 10**6,
+    "upright": 10**5,
+    "actions": 10**4,
+    "poses": 10**5,
+}
+_default_resolution = 10**4
+
+_index_dtype = np.dtype(
+    [
+        ("generation", np.int32),
+        ("specimen_id", np.int32),
+        ("fitness", np.float64),
+        ("offset", np.int64),
+        ("size", np.int32),
+    ]
+)
+_resolutions_dtype = np.dtype([("column", "U32"), ("resolution", np.int64)])
+
+
+def _smallest_int(values):
+    """Returns the smallest integer type which holds all the `values`"""
+    low, high = (values.min(), values.max()) if values.size else (0, 0)
+    for dtype in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return dtype
+    return np.int64
+
+
+def _encode(column, resolution, offsets):
+    """
+    Returns the first row of each trajectory of the quantized `column` (at
+    `offsets`), and the differences between its consecutive rows (0 for the
+    first rows)
+    """
+    if resolution is not None:
+        column = np.floor(column * resolution)
+    values = column.astype(np.int64)
+    deltas = np.zeros_like(values)
+    deltas[1:] = values[1:] - values[:-1]
+    deltas[offsets] = 0
+    return values[offsets], deltas.astype(_smallest_int(deltas))
+
+
+def _decode(first, deltas, resolution):
+    values = first + np.cumsum(deltas, axis=0, dtype=np.int64)
+    return values if resolution is None else values / resolution
+
+
+class TrajectoryArchive:
+    """
+    Trajectories of the individuals evaluated during a run, so that they can
+    be scored again offline with `Fitness.score`.
+
+    The trajectories are kept in memory and written once per generation (on
+    `flush`) as a chunk of the `trajectories` directory of the logs, with
+    one .npy file per column which is memory-mapped when read. The float
+    columns are quantized (see `_resolutions`) and all the numeric columns are
+    stored as the differences between consecutive steps, in the smallest
+    integer type that holds them: most of them fit in 1 or 2 bytes. The
+    first row of each trajectory is kept aside (in `<column>.first`). The
+    `index` of a chunk gives the generation, the specimen, the fitness and
+    the rows of each of its trajectories, and its `resolutions` the
+    resolution of each column (0 for the integer columns).
+
+    retention: all | top | elites
+        - all: every trajectory is kept
+        - top: only the `top` best trajectories of each generation are kept
+        - elites: only the trajectories of the individuals which are among
+            the elites of their generation are kept (see `flush`)
+
+    What is needed to score them (fitness function, duration and timestep)
+    is saved in `trajectories.dat`.
+    """
+
+    _dirname = "trajectories"
+    _metadata_filename = "trajectories.dat"
+
+    def __init__(
+        self,
+        dm: DataManager,
+        metadata: dict,
+        retention: str = "all",
+        top: int = 10,
+    ) -> None:
+        if retention not in retention_policies:
+            raise RuntimeError(
+                f"Retention policy `{retention}` is invalid, possible values are `{retention_policies}`"
+            )
+
+        self._dm = dm
+        self._retention = retention
+        self._top = top
+        self._trajectories = []
+        chunks = os.path.join(dm.get_log_path(self._dirname), "*", "")
+        self._chunks = len(glob.glob(chunks))
+        dm.save_local_dat_file(self._metadata_filename, metadata)
+
+    def __len__(self):
+        return len(self._trajectories)
+
+    def append(
+        self,
+        generation: int,
+        specimen_id: int,
+        fitness: float,
+        trajectory: dict,
+    ):
+        self._trajectories.append(
+            (generation, specimen_id, fitness, trajectory)
+        )
+
+    def _retained(self, elites_fitness: float):
+        trajectories = sorted(
+            self._trajectories, key=lambda t: t[2], reverse=True
+        )
+        if self._retention == "top":
+            # A flush can hold several generations (e.g. the initial
+            # population and the first generation)
+            counts = collections.Counter()
+            retained = []
+            for trajectory in trajectories:
+                if counts[trajectory[0]] < self._top:
+                    retained.append(trajectory)
+                    counts[trajectory[0]] += 1
+            return retained
+        if self._retention == "elites":
+            return [t for t in trajectories if t[2] >= elites_fitness]
+        return self._trajectories
+
+    def flush(self, elites_fitness: float = -np.inf):
+        """
+        Writes the retained trajectories as a new chunk. `elites_fitness` is
+        the lowest fitness of the elites of the generation.
+        """
+        trajectories = self._retained(elites_fitness)
+        self._trajectories = []
+        if not trajectories:
+            return
+
+        generations, specimens, fitness, trajectories = zip(*trajectories)
+        index = np.zeros(len(trajectories), dtype=_index_dtype)
+        index["generation"] = generations
+        index["specimen_id"] = [-1 if s is None else s for s in specimens]
+        index["fitness"] = fitness
+        index["size"] = [len(t["time"]) for t in trajectories]
+        index["offset"][1:] = np.cumsum(index["size"][:-1])
+
+        columns = {"index": index}
+        resolutions = []
+        for name in trajectories[0]:
+            column = np.concatenate([t[name] for t in trajectories])
+            if column.dtype == bool:
+                columns[name] = column
+                continue
+
+            resolution = None
+            if np.issubdtype(column.dtype, np.floating):
+                resolution = _resolutions.get(name, _default_resolution)
+            first, columns[name] = _encode(column, resolution, index["offset"])
+            columns[f"{name}.first"] = first
+            resolutions.append((name, resolution or 0))
+        columns["resolutions"] = np.array(
+            resolutions, dtype=_resolutions_dtype
+        )
+
+        self._dm.save_log_arrays(self._dirname, self._chunks, columns)
+        self._chunks += 1
+
+
+class TrajectoryReader:
+    """
+    Read access to the archived trajectories of a run.
+
+    The chunks are memory-mapped: only the index is read when the reader is
+    created, and the rows of a trajectory are read and decoded when it is
+    accessed, so that all the trajectories can be swept without holding
+    them in memory.
+    """
+
+    def __init__(self, dm: DataManager) -> None:
+        self.metadata = dm.load_local_dat_file(
+            TrajectoryArchive._metadata_filename
+        )
+        self._chunks = dm.load_log_arrays(TrajectoryArchive._dirname)
+        self._resolutions = [
+            {name: int(res) or None for name, res in chunk["resolutions"]}
+            for chunk in self._chunks
+        ]
+        self._starts = list(
+            np.cumsum([0] + [len(c["index"]) for c in self._chunks])
+        )
+
+    def __len__(self):
+        return self._starts[-1]
+
+    @property
+    def index(self):
+        """The index of all the trajectories, as a structured array"""
+        if not self._chunks:
+            return np.zeros(0, dtype=_index_dtype)
+        return np.concatenate([chunk["index"] for chunk in self._chunks])
+
+    def __getitem__(self, i: int):
+        """
+        Returns the `i`-th trajectory as `(generation, specimen_id, fitness,
+            trajectory)`
+        """
+        if not 0 <= i < len(self):
+            raise IndexError(f"Trajectory {i} is out of range")
+        c = bisect.bisect_right(self._starts, i) - 1
+        chunk = self._chunks[c]
+        j = i - self._starts[c]
+        entry = chunk["index"][j]
+        rows = slice(entry["offset"], entry["offset"] + entry["size"])
+
+        trajectory = {}
+        resolutions = self._resolutions[c]
+        for name, column in chunk.items():
+            if name in resolutions:
+                first = chunk[f"{name}.first"][j]
+                trajectory[name] = _decode(
+                    first, column[rows], resolutions[name]
+                )
+            elif column.dtype == bool:
+                trajectory[name] = np.array(column[rows])
+
+        return (
+            int(entry["generation"]),
+            int(entry["specimen_id"]),
+            float(entry["fitness"]),
+            trajectory,
+        )
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+def load_trajectories(dm: DataManager):
+    """
+    Returns the metadata of the archive of a run, and a reader of its
+    trajectories, which iterates over them as `(generation, specimen_id,
+    fitness, trajectory)`
+    """
+    reader = TrajectoryReader(dm)
+    return reader.metadata, reader
+
+
+def rescore(dm: DataManager, fitness: str):
+    """
+    Scores again all the archived trajectories of a run with the `fitness`
+    function, without simulating them. Returns a dict of columns sorted by
+    decreasing new fitness, `trajectory` being the index of the trajectory
+    in the archive.
+    """
+    metadata, trajectories = load_trajectories(dm)
+    fitness_cls = fitnesses.get(fitness, None)
+    if fitness_cls is None:
+        raise RuntimeError(
+            f"Fitness `{fitness}` is invalid, possible values are `{fitnesses.keys()}`"
+        )
+    scorer = fitness_cls(metadata["duration"], metadata["timestep"])
+
+    rows = []
+    for i, (generation, specimen_id, old_fitness, trajectory) in enumerate(
+        trajectories
+    ):
+        new_fitness, _ = scorer.score(trajectory)
+        rows.append((i, generation, specimen_id, old_fitness, new_fitness))
+    rows.sort(key=lambda row: row[4], reverse=True)
+
+    names = [
+        "trajectory",
+        "generation",
+        "specimen_id",
+        "fitness",
+        "new_fitness",
+    ]
+    columns = [np.array(column) for column in zip(*rows)] or [[]] * 5
+    return dict(zip(names, columns))